@@ -1,22 +1,30 @@
 import asyncio
+import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from module.binance_p2p import P2PBinance
+from module.async_poller import AsyncP2PPoller
+
+logger = logging.getLogger(__name__)
 
 def thongke_job_sync():
     #df = binance_p2p().thongke_today()
     print("DONE")
 
-def transactions_trading_sync():
-    P2PBinance().transactions_trading()
-
 async def main():
     loop = asyncio.get_running_loop()
-    loop.run_in_executor(None, transactions_trading_sync)
+    poller = AsyncP2PPoller(P2PBinance())
+    poll_task = asyncio.create_task(poller.run())
     scheduler = AsyncIOScheduler()
     scheduler.add_job(lambda: loop.run_in_executor(None, thongke_job_sync), 'cron', minute=21)
     scheduler.start()
-    while True:
-        await asyncio.sleep(3600)
+    try:
+        # Poller dừng vì lỗi thì báo ngay và thoát, không chờ tới lần kiểm tra sau
+        await poll_task
+    except Exception:
+        logger.exception("💥 Poller dừng do lỗi")
+        raise
+    finally:
+        scheduler.shutdown(wait=False)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Script benchmark cho các bước xử lý order
+
+Ví dụ:
+    python benchmark.py extract 22768168737054167040 --repeat 5
+    python benchmark.py parse fixtures/order_detail_buy.html
+    python benchmark.py fields fixtures/order_detail_buy.html
+    python benchmark.py qr --remote
+    python benchmark.py banks --count 10000
+    python benchmark.py storage-save --sizes 10 1000 50000
+    python benchmark.py storage-query --days 30 180 365
+    python benchmark.py storage-range --days 31 365 --workers 1 4 8
+    python benchmark.py profile 22768168737054167040 --repeat 5
+    python benchmark.py batch 22768168737054167040 22768168737054167041 --tabs 1 2 4
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+sys.path.append(os.path.dirname(__file__))
+
+
+def timeit(func, number):
+    """Chạy func number lần, trả về thời gian trung bình (ms)"""
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) * 1000 / number
+
+
+def bench_extract(args):
+    """Đo độ trễ trích xuất thông tin order qua Selenium (cần Chrome remote-debugging)"""
+    from module.selenium_get_info import extract_order_info, get_extraction_latency
+
+    for _ in range(args.repeat):
+        for order_number in args.orders:
+            extract_order_info(order_number)
+
+    print(json.dumps(get_extraction_latency(), indent=2, ensure_ascii=False))
+
+
+def _chrome_rss_mb(profile_dir):
+    """Tổng RSS (MB) của các tiến trình Chrome dùng user-data-dir nằm trong profile_dir"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    total = 0
+    for proc in psutil.process_iter(["name", "cmdline", "memory_info"]):
+        try:
+            cmdline = " ".join(proc.info["cmdline"] or [])
+            if "chrome" in (proc.info["name"] or "").lower() and str(profile_dir) in cmdline:
+                total += proc.info["memory_info"].rss
+        except (psutil.Error, TypeError):
+            continue
+    return total / 1024 / 1024
+
+
+def bench_profile(args):
+    """So sánh thời gian trang sẵn sàng và RAM của Chrome giữa profile visible và headless"""
+    from module import selenium_get_info as sgi
+
+    profile_dirs = {"visible": sgi.PROFILE_PATH, "headless": sgi.HEADLESS_PROFILE_ROOT}
+    for profile in args.profiles:
+        for hist in sgi.EXTRACTION_LATENCY.values():
+            hist.reset()
+        for _ in range(args.repeat):
+            for order_number in args.orders:
+                sgi.extract_order_info(order_number, mode=args.mode, profile=profile)
+        ready = sgi.EXTRACTION_LATENCY["ready"].snapshot()
+        total = sgi.EXTRACTION_LATENCY["total"].snapshot()
+        rss = _chrome_rss_mb(profile_dirs[profile])
+        print(f"[{profile}] ready p50={ready['p50_ms']:.0f}ms p95={ready['p95_ms']:.0f}ms | "
+              f"total p50={total['p50_ms']:.0f}ms p95={total['p95_ms']:.0f}ms | "
+              f"Chrome RSS={'n/a (cần psutil)' if rss is None else f'{rss:.0f}MB'}")
+    sgi.close_driver_pool()
+
+
+def bench_batch(args):
+    """Thông lượng trích xuất theo lô với số tab khác nhau (cần Chrome remote-debugging)"""
+    from module import selenium_get_info as sgi
+
+    for tabs in args.tabs:
+        start = time.perf_counter()
+        results = sgi.extract_orders_info(args.orders, max_tabs=tabs, profile=args.profile)
+        elapsed = time.perf_counter() - start
+        ok = sum(1 for info in results.values() if info)
+        print(f"[{tabs} tab] {ok}/{len(args.orders)} order trong {elapsed:.2f}s "
+              f"({len(args.orders) / elapsed:.2f} order/s)")
+    sgi.close_driver_pool()
+
+
+def _legacy_parse(page_html):
+    """Cách quét cũ bằng BeautifulSoup html.parser, giữ lại để so sánh"""
+    from bs4 import BeautifulSoup
+    from module.order_detail_parser import parse_currency
+
+    bank_info = {}
+    soup = BeautifulSoup(page_html, "html.parser")
+    fiat_block = soup.select_one("div.subtitle6.text-textBuy")
+    if fiat_block:
+        bank_info["Fiat amount"] = parse_currency(fiat_block.get_text(strip=True))
+    sections = soup.find('div', class_='relative w-full')
+    if not sections:
+        return bank_info
+    label_tag, value_tag = None, None
+    for section in sections.find_all(recursive=False):
+        for div in section.find_all("div"):
+            if div.get("class") and "body2" in div.get("class") and "text-tertiaryText" in div.get("class"):
+                label_tag = div
+            if div.get("class") and "body2" in div.get("class") and "text-right" in div.get("class") and "break-words" in div.get("class"):
+                value_tag = div
+            if label_tag and value_tag:
+                bank_info[label_tag.text.strip()] = value_tag.text.strip()
+    return bank_info
+
+
+def bench_parse(args):
+    """So sánh parser lxml với cách quét BeautifulSoup cũ trên các file HTML đã lưu"""
+    from module.order_detail_parser import parse_order_detail
+
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            page_html = f.read()
+        new = parse_order_detail(page_html)
+        old = _legacy_parse(page_html)
+        print(f"{path}: {len(page_html)} bytes, kết quả {'khớp' if new == old else 'KHÁC'}")
+        print(f"  bs4 html.parser : {timeit(lambda: _legacy_parse(page_html), args.number):.3f} ms")
+        print(f"  lxml one-pass   : {timeit(lambda: parse_order_detail(page_html), args.number):.3f} ms")
+
+
+def _legacy_map(data):
+    """Cách map nhãn cũ (tối đa 5 lần re.search cho mỗi nhãn), giữ lại để so sánh"""
+    import re
+    result = {}
+    for key, value in data.items():
+        key_lower = key.lower()
+        if re.search(r'fiat amount', key_lower):
+            result['Fiat amount'] = value
+        elif re.search(r'reference message', key_lower):
+            result['Reference message'] = value
+        elif re.search(r'^name$|full name', key_lower):
+            result['Full Name'] = value
+        elif re.search(r'bank card|account number', key_lower):
+            result['Bank Card'] = value
+        elif re.search(r'bank name', key_lower):
+            result['Bank Name'] = value
+    return result
+
+
+def bench_fields(args):
+    """So sánh FieldMapper (regex biên dịch sẵn + ghi nhớ) với cách map nhãn cũ"""
+    from module.field_mapper import FieldMapper
+    from module.order_detail_parser import parse_order_detail
+
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = parse_order_detail(f.read())
+        mapper = FieldMapper()
+        new = mapper.map(data)
+        print(f"{path}: {len(data)} nhãn, kết quả {'khớp' if new == _legacy_map(data) else 'KHÁC'}")
+        print(f"  re.search từng nhãn : {timeit(lambda: _legacy_map(data), args.number) * 1000:.2f} µs")
+        print(f"  FieldMapper (memo)  : {timeit(lambda: mapper.map(data), args.number) * 1000:.2f} µs")
+
+
+def bench_qr(args):
+    """Thời gian tạo ảnh QR VietQR cục bộ, lấy lại từ cache (và qua API nếu có --remote)"""
+    import tempfile
+    from module.generate_qrcode import generate_vietqr, generate_vietqr_local, create_vietqr
+    from module.qr_cache import QRCache
+
+    params = dict(accountno=args.account, acqid=args.bin, addInfo="REF22768168737054167040",
+                  amount=16301820, template="rc9Vk60")
+    print(f"  local  : {timeit(lambda: generate_vietqr_local(**params), args.number):.2f} ms")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = QRCache(cache_dir)
+        print(f"  cached : {timeit(lambda: create_vietqr(mode='local', cache=cache, **params), args.number):.3f} ms"
+              f" | {cache.metrics()}")
+    if args.remote:
+        from module.generate_qrcode import vietqr_client
+        print(f"  remote : {timeit(lambda: generate_vietqr(**params), args.remote_number):.2f} ms")
+        metrics = vietqr_client.metrics()
+        latency = metrics.pop("latency")
+        print(f"  remote p50={latency['p50_ms']:.0f}ms p95={latency['p95_ms']:.0f}ms "
+              f"p99={latency['p99_ms']:.0f}ms max={latency['max_ms']:.0f}ms | {metrics}")
+
+
+def _sample_bank_names(count, seed=0):
+    """Sinh tên ngân hàng giống cách người bán nhập (kèm tên chủ TK, viết hoa/thường, lỗi gõ)"""
+    import random
+    from module.generate_qrcode import bank_dict_path
+
+    with open(bank_dict_path, 'r', encoding='utf-8') as f:
+        banks = json.load(f)
+    rng = random.Random(seed)
+    bases = [name for key, info in banks.items() for name in (key, info.get("code") or key)]
+    owners = ["Nguyen Van A", "Tran Thi B", "Chau Duc Lam", "Le Van C", "Pham Minh D"]
+    names = []
+    for _ in range(count):
+        name = rng.choice(bases)
+        roll = rng.random()
+        if roll < 0.3:
+            name = f"{name} ( {rng.choice(owners)} )"
+        elif roll < 0.5:
+            name = name.upper() if rng.random() < 0.5 else name.lower()
+        elif roll < 0.7 and len(name) > 3:
+            i = rng.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        elif roll < 0.8:
+            name = f"NH {name} chi nhanh {rng.randint(1, 99)}"
+        names.append(name)
+    return names
+
+
+def bench_banks(args):
+    """So sánh tra tên ngân hàng từng tên (vòng lặp) với resolve_many (một lần cdist)"""
+    import logging
+    from module.generate_qrcode import bank_dict_path, find_best_match
+    from module.bank_resolver import BankResolver
+
+    logging.disable(logging.WARNING)
+    names = _sample_bank_names(args.count)
+    resolver = BankResolver(bank_dict_path)
+    resolver.resolve_many(names[:1])  # Nạp bank_list.json trước khi đo
+    with open(bank_dict_path, 'r', encoding='utf-8') as f:
+        bank_keys = list(json.load(f))
+
+    print(f"{len(names)} tên, {len(set(names))} tên khác nhau")
+    if args.legacy:
+        subset = names[:1000]
+        elapsed = timeit(lambda: [find_best_match(name, bank_keys) for name in subset], 1)
+        print(f"  find_best_match vòng lặp : {elapsed * len(names) / len(subset):.0f} ms (ước lượng từ 1000 tên)")
+    print(f"  BankResolver.resolve     : {timeit(lambda: [resolver.resolve(name) for name in names], 1):.0f} ms")
+    for workers in args.workers:
+        elapsed = timeit(lambda: resolver.resolve_many(names, workers=workers), 1)
+        print(f"  resolve_many workers={workers:<3}: {elapsed:.0f} ms")
+    resolved = sum(1 for bin_code, _ in resolver.resolve_many(names) if bin_code)
+    print(f"  Tra được {resolved}/{len(names)} tên (điểm >= {resolver.min_score})")
+
+
+def _sample_transaction(i, timestamp):
+    return {
+        "type": "buy" if i % 2 else "sell", "order_number": f"2276816873705{i:07d}",
+        "amount": 1000000 + i, "bank_name": "Vietcombank", "account_number": f"{i:010d}",
+        "account_name": "NGUYEN VAN A", "reference": f"REF{i:07d}", "timestamp": timestamp,
+    }
+
+
+def bench_storage_save(args):
+    """Độ trễ save_transaction khi ngày đã có N giao dịch: file mảng JSON so với journal JSONL"""
+    import shutil
+    import logging
+    import tempfile
+    from datetime import datetime
+    from module.transaction_storage import TransactionStorage
+
+    logging.disable(logging.INFO)
+    timestamp = datetime.now().timestamp()
+    for size in args.sizes:
+        existing = [_sample_transaction(i, timestamp) for i in range(size - 1)]
+        # Ngày lớn ghi lại cả file mỗi lần: giảm số lần đo để benchmark không quá lâu
+        number = max(1, min(args.number, 200000 // size))
+        row = []
+        for journal in (False, True):
+            base_dir = tempfile.mkdtemp(prefix="bench_storage_")
+            try:
+                storage = TransactionStorage(base_dir, journal=journal)
+                date_file = storage._get_date_file_path(datetime.fromtimestamp(timestamp))
+                if journal:
+                    with open(date_file.with_suffix(".jsonl"), 'w', encoding='utf-8') as f:
+                        f.writelines(json.dumps(t, ensure_ascii=False) + "\n" for t in existing)
+                else:
+                    storage._write_day(date_file, existing)
+                counter = iter(range(size, size + number))
+                elapsed = timeit(lambda: storage.save_transaction(_sample_transaction(next(counter), timestamp)), number)
+                row.append(f"{'jsonl' if journal else 'json '}: {elapsed:8.2f} ms")
+            finally:
+                shutil.rmtree(base_dir, ignore_errors=True)
+        print(f"  {size:>6} giao dịch/ngày | " + " | ".join(row) + f" (x{number})")
+
+
+def bench_storage_query(args):
+    """Tra theo order và lấy N giao dịch gần nhất theo số ngày lịch sử: file JSON so với SQLite"""
+    import shutil
+    import logging
+    import tempfile
+    from datetime import datetime, timedelta
+    from module.transaction_storage import TransactionStorage
+    from module.sqlite_storage import SQLiteTransactionStorage
+
+    logging.disable(logging.INFO)
+    today = datetime.now()
+    for days in args.days:
+        base_dir = tempfile.mkdtemp(prefix="bench_storage_")
+        try:
+            storage = TransactionStorage(base_dir, journal=False)
+            counter = 0
+            for day in range(days):
+                timestamp = (today - timedelta(days=days - 1 - day)).timestamp()
+                batch = [_sample_transaction(counter + i, timestamp) for i in range(args.per_day)]
+                storage._write_day(storage._get_date_file_path(datetime.fromtimestamp(timestamp)), batch)
+                counter += args.per_day
+            # Order mới nhất: bản JSON phải đọc hết các ngày trước đó
+            newest_order = _sample_transaction(counter - 1, 0)["order_number"]
+
+            started = time.perf_counter()
+            storage.rebuild_index()
+            index_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            sqlite_storage = SQLiteTransactionStorage(base_dir)
+            import_ms = (time.perf_counter() - started) * 1000
+
+            print(f"  {days:>4} ngày x {args.per_day} giao dịch "
+                  f"(dựng index order: {index_ms:.0f} ms, nhập SQLite: {import_ms:.0f} ms)")
+            for name, store in (("json  ", storage), ("sqlite", sqlite_storage)):
+                by_order = timeit(lambda: store.get_transaction_by_order(newest_order), args.number)
+                recent = timeit(lambda: store.get_recent_transactions(10), args.number)
+                print(f"    {name}: theo order {by_order:9.3f} ms | 10 gần nhất {recent:9.3f} ms")
+            sqlite_storage.close()
+        finally:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def bench_storage_range(args):
+    """Đọc giao dịch theo khoảng ngày (có/không bộ lọc) theo số luồng đọc file"""
+    import shutil
+    import logging
+    import tempfile
+    from datetime import datetime, timedelta
+    from module.transaction_storage import TransactionStorage
+
+    logging.disable(logging.INFO)
+    today = datetime.now()
+    base_dir = tempfile.mkdtemp(prefix="bench_storage_")
+    try:
+        storage = TransactionStorage(base_dir, journal=False)
+        days = max(args.days)
+        for day in range(days):
+            timestamp = (today - timedelta(days=day)).timestamp()
+            batch = [_sample_transaction(day * args.per_day + i, timestamp) for i in range(args.per_day)]
+            storage._write_day(storage._get_date_file_path(datetime.fromtimestamp(timestamp)), batch)
+
+        for span in args.days:
+            start = today - timedelta(days=span - 1)
+            print(f"  {span:>4} ngày x {args.per_day} giao dịch")
+            for workers in args.workers:
+                elapsed = timeit(lambda: storage.get_transactions_by_date_range(start, today, workers=workers), 1)
+                filtered = timeit(lambda: storage.get_transactions_by_date_range(
+                    start, today, workers=workers, trade_type="buy", min_amount=1000500, text="REF"), 1)
+                print(f"    workers={workers:<2}: {elapsed:8.1f} ms | có bộ lọc {filtered:8.1f} ms")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Binance P2P app")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extract", help="Độ trễ trích xuất order (histogram theo bước)")
+    p.add_argument("orders", nargs="+", help="Danh sách order number")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_extract)
+
+    p = sub.add_parser("profile", help="So sánh profile trích xuất visible/headless")
+    p.add_argument("orders", nargs="+", help="Danh sách order number")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--mode", default="dom", choices=["dom", "cdp"])
+    p.add_argument("--profiles", nargs="+", default=["visible", "headless"])
+    p.set_defaults(func=bench_profile)
+
+    p = sub.add_parser("batch", help="Trích xuất nhiều order trên nhiều tab")
+    p.add_argument("orders", nargs="+", help="Danh sách order number")
+    p.add_argument("--tabs", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--profile", default="visible", choices=["visible", "headless"])
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("parse", help="Parser HTML trang chi tiết order")
+    p.add_argument("files", nargs="+", help="File HTML đã lưu")
+    p.add_argument("--number", type=int, default=200)
+    p.set_defaults(func=bench_parse)
+
+    p = sub.add_parser("fields", help="Map nhãn trang order sang trường chuẩn")
+    p.add_argument("files", nargs="+", help="File HTML đã lưu")
+    p.add_argument("--number", type=int, default=10000)
+    p.set_defaults(func=bench_fields)
+
+    p = sub.add_parser("qr", help="Tạo ảnh QR VietQR")
+    p.add_argument("--bin", default="970415", help="Mã BIN ngân hàng")
+    p.add_argument("--account", default="0123456789")
+    p.add_argument("--number", type=int, default=200)
+    p.add_argument("--remote", action="store_true", help="Đo thêm API api.vietqr.io")
+    p.add_argument("--remote-number", type=int, default=20)
+    p.set_defaults(func=bench_qr)
+
+    p = sub.add_parser("banks", help="Tra mã BIN hàng loạt từ tên ngân hàng")
+    p.add_argument("--count", type=int, default=10000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, -1])
+    p.add_argument("--legacy", action="store_true", help="Đo thêm find_best_match theo vòng lặp")
+    p.set_defaults(func=bench_banks)
+
+    p = sub.add_parser("storage-save", help="Độ trễ lưu giao dịch theo số giao dịch trong ngày")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    p.add_argument("--number", type=int, default=50)
+    p.set_defaults(func=bench_storage_save)
+
+    p = sub.add_parser("storage-query", help="Tra giao dịch theo order / gần nhất theo số ngày lịch sử")
+    p.add_argument("--days", type=int, nargs="+", default=[30, 180, 365])
+    p.add_argument("--per-day", type=int, default=50)
+    p.add_argument("--number", type=int, default=5)
+    p.set_defaults(func=bench_storage_query)
+
+    p = sub.add_parser("storage-range", help="Đọc giao dịch theo khoảng ngày")
+    p.add_argument("--days", type=int, nargs="+", default=[31, 365])
+    p.add_argument("--per-day", type=int, default=50)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    p.set_defaults(func=bench_storage_range)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
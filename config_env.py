@@ -31,4 +31,36 @@ TELEGRAM_URL = os.getenv("TELEGRAM_URL")
 
 # CHROME
 CHROME_PATH = os.getenv("CHROME_PATH")
-CHROME_DRIVE = os.getenv("CHROME_DRIVE")
\ No newline at end of file
+CHROME_DRIVE = os.getenv("CHROME_DRIVE")
+
+# POLL SCHEDULER
+POLL_ACTIVE_INTERVAL = float(os.getenv("POLL_ACTIVE_INTERVAL", "0.5"))
+POLL_IDLE_INTERVAL = float(os.getenv("POLL_IDLE_INTERVAL", "1"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "15"))
+POLL_BACKOFF_FACTOR = float(os.getenv("POLL_BACKOFF_FACTOR", "2"))
+POLL_WEIGHT_BUDGET = float(os.getenv("POLL_WEIGHT_BUDGET", "0.8"))
+
+# ORDER WORKERS
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "2"))
+
+# SELENIUM
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", str(ORDER_WORKERS)))
+# Cách lấy dữ liệu order: 'cdp' (bắt JSON qua DevTools, DOM dự phòng) hoặc 'dom'
+EXTRACT_MODE = os.getenv("EXTRACT_MODE", "cdp")
+# Profile trích xuất: 'visible' (Chrome remote-debugging) hoặc 'headless'
+EXTRACT_PROFILE = os.getenv("EXTRACT_PROFILE", "visible")
+# Số tab tối đa mở cùng lúc khi trích xuất nhiều order theo lô
+EXTRACT_MAX_TABS = int(os.getenv("EXTRACT_MAX_TABS", "4"))
+# Số luồng prefetch thông tin order BUY mới (0 = tắt)
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "1"))
+# Các locale nhãn trang order được nhận diện (vd: "en,vi")
+FIELD_LOCALES = [locale.strip() for locale in os.getenv("FIELD_LOCALES", "en,vi").split(",") if locale.strip()]
+# Cách tạo QR: 'local' (tạo cục bộ, API VietQR dự phòng) hoặc 'remote' (chỉ dùng API)
+QR_MODE = os.getenv("QR_MODE", "local")
+# Dung lượng tối đa của cache ảnh QR trên đĩa (MB)
+QR_CACHE_MB = int(os.getenv("QR_CACHE_MB", "50"))
+# Thời gian tối đa cho một lần gọi API VietQR (giây)
+VIETQR_DEADLINE = float(os.getenv("VIETQR_DEADLINE", "5"))
+# Kiểu lưu giao dịch: 'json' (một file mảng JSON mỗi ngày), 'jsonl' (journal ghi nối tiếp)
+# hoặc 'sqlite' (transactions.db có index, tự nhập dữ liệu JSON cũ ở lần mở đầu tiên)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(__file__))
 
 from module.binance_p2p import P2PBinance
 from module.selenium_get_info import extract_order_info, extract_info_by_key
+from module.order_cache import OrderDetailCache
 
 # Thiết lập logging chi tiết
 logging.basicConfig(
@@ -23,6 +24,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Dùng chung cache với bot để chạy lại debug không phải scrape lại
+order_cache = OrderDetailCache(os.path.join("transactions", "order_cache.json"))
+
 def test_order_extraction(order_number):
     """Test việc trích xuất thông tin order"""
     logger.info(f"🧪 Bắt đầu test trích xuất order: {order_number}")
@@ -30,7 +34,7 @@ def test_order_extraction(order_number):
     try:
         # Test extract_order_info
         logger.info("1️⃣ Test extract_order_info...")
-        raw_info = extract_order_info(order_number)
+        raw_info = order_cache.get_or_fetch(order_number, extract_order_info)
         logger.info(f"📊 Raw info: {raw_info}")
         
         if not raw_info:
@@ -68,7 +72,7 @@ def test_p2p_handling(order_number):
     logger.info(f"🧪 Bắt đầu test P2P handling cho order: {order_number}")
     
     try:
-        p2p = P2PBinance()
+        p2p = P2PBinance(order_cache=order_cache)
         
         # Tạo message giả lập
         message = f"""
@@ -10,7 +10,7 @@ from PyQt5.QtGui import QFont, QIcon, QPixmap, QImage
 
 import sys
 import logging
-from module.selenium_get_info import login_app, launch_chrome_remote_debugging
+from module.selenium_get_info import login_app, launch_chrome_remote_debugging, close_driver_pool
 from module.binance_p2p import P2PBinance
 from datetime import datetime
 import tracemalloc
@@ -23,9 +23,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from module.generate_qrcode import generate_vietqr, get_bank_bin, get_nganhang_api
+from module.generate_qrcode import create_vietqr, get_bank_bin, get_nganhang_api, bank_resolver, get_qr_cache
 from dotenv import load_dotenv
-from module.transaction_storage import TransactionStorage
+from module.transaction_storage import create_storage
 from transaction_viewer import TransactionViewer
 from module.resource_path import resource_path
 
@@ -118,6 +118,7 @@ class MainWindow(QMainWindow):
         self.p2p_instance = P2PBinance()
         self.chrome_thread = ChromeThread()
         self.bank_cache = None  # Cache cho danh sách ngân hàng
+        self.pending_aliases = []  # Tên ngân hàng chờ xác nhận
         self.current_page = 0  # Trang hiện tại của danh sách ngân hàng
         self.rows_per_page = 20  # Số dòng mỗi trang của danh sách ngân hàng
         self.transaction_cache = None  # Cache cho danh sách giao dịch
@@ -125,7 +126,7 @@ class MainWindow(QMainWindow):
         self.transaction_rows_per_page = 20  # Số dòng mỗi trang của danh sách giao dịch
         
         # Khởi tạo storage trước
-        self.transaction_storage = TransactionStorage()
+        self.transaction_storage = create_storage()
         
         # Khởi tạo logging và UI
         self.init_logging()
@@ -386,6 +387,40 @@ class MainWindow(QMainWindow):
         pagination_layout.addWidget(self.page_label)
         pagination_layout.addWidget(self.next_page_btn)
         bank_layout.addLayout(pagination_layout)
+
+        # Tên ngân hàng người bán nhập chưa tra được chắc chắn, chờ xác nhận
+        alias_group = QGroupBox("Tên ngân hàng chờ xác nhận")
+        alias_layout = QVBoxLayout()
+        self.alias_table = QTableWidget()
+        self.alias_table.setColumnCount(4)
+        self.alias_table.setHorizontalHeaderLabels([
+            "Tên người bán nhập", "Gợi ý", "Điểm", "Số lần gặp"
+        ])
+        self.alias_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.alias_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.alias_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.alias_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.alias_table.itemSelectionChanged.connect(self.on_alias_selected)
+        alias_layout.addWidget(self.alias_table)
+
+        alias_button_layout = QHBoxLayout()
+        self.alias_bank_combo = QComboBox()
+        alias_button_layout.addWidget(self.alias_bank_combo)
+        confirm_alias_btn = QPushButton("Xác nhận")
+        confirm_alias_btn.clicked.connect(self.confirm_alias)
+        alias_button_layout.addWidget(confirm_alias_btn)
+        reject_alias_btn = QPushButton("Bỏ qua")
+        reject_alias_btn.clicked.connect(self.reject_alias)
+        alias_button_layout.addWidget(reject_alias_btn)
+        refresh_alias_btn = QPushButton("Làm mới")
+        refresh_alias_btn.clicked.connect(self.load_pending_aliases)
+        alias_button_layout.addWidget(refresh_alias_btn)
+        alias_layout.addLayout(alias_button_layout)
+
+        self.alias_stats_label = QLabel()
+        alias_layout.addWidget(self.alias_stats_label)
+        alias_group.setLayout(alias_layout)
+        bank_layout.addWidget(alias_group)
         
         bank_tab.setLayout(bank_layout)
         self.tab_widget.addTab(main_tab, "Chính")
@@ -395,6 +430,7 @@ class MainWindow(QMainWindow):
         
         # Load danh sách ngân hàng
         self.load_bank_list()
+        self.load_pending_aliases()
 
     def load_bank_list(self):
         """Load danh sách ngân hàng từ file bank_list.json hoặc cache"""
@@ -543,6 +579,7 @@ class MainWindow(QMainWindow):
                 self.bank_cache = banks  # Cập nhật cache
                 self.current_page = 0  # Reset về trang đầu
                 self.display_bank_page()
+                self.load_pending_aliases()
                 self.log(f"✅ Đã cập nhật {len(banks)} ngân hàng thành công")
                 QMessageBox.information(
                     self,
@@ -566,10 +603,65 @@ class MainWindow(QMainWindow):
         finally:
             self._syncing_banks = False  # Xóa đánh dấu đồng bộ
 
+    def load_pending_aliases(self):
+        """Hiển thị các tên ngân hàng chờ xác nhận và thống kê bảng alias"""
+        try:
+            self.alias_bank_combo.clear()
+            self.alias_bank_combo.addItems(sorted((self.bank_cache or {}).keys(), key=str.lower))
+
+            self.pending_aliases = bank_resolver.aliases.pending()
+            self.alias_table.setRowCount(len(self.pending_aliases))
+            for row, entry in enumerate(self.pending_aliases):
+                self.alias_table.setItem(row, 0, QTableWidgetItem(entry["raw"]))
+                self.alias_table.setItem(row, 1, QTableWidgetItem(entry.get("candidate") or ""))
+                self.alias_table.setItem(row, 2, QTableWidgetItem(f"{entry.get('score', 0):.1f}"))
+                self.alias_table.setItem(row, 3, QTableWidgetItem(str(entry.get("seen", 1))))
+
+            stats = bank_resolver.aliases.metrics()
+            self.alias_stats_label.setText(
+                f"Alias đã học: {stats['size']} | Chờ xác nhận: {stats['pending']} | "
+                f"Tỉ lệ hit: {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+            )
+        except Exception as e:
+            self.log(f"❌ Lỗi khi tải danh sách tên ngân hàng chờ xác nhận: {str(e)}")
+
+    def _selected_alias(self):
+        """Tên ngân hàng chờ xác nhận đang được chọn, None nếu chưa chọn"""
+        row = self.alias_table.currentRow()
+        if row < 0 or row >= len(self.pending_aliases):
+            return None
+        return self.pending_aliases[row]
+
+    def on_alias_selected(self):
+        """Chọn sẵn ngân hàng gợi ý cho dòng đang chọn"""
+        entry = self._selected_alias()
+        if entry and entry.get("candidate"):
+            index = self.alias_bank_combo.findText(entry["candidate"])
+            if index >= 0:
+                self.alias_bank_combo.setCurrentIndex(index)
+
+    def confirm_alias(self):
+        """Xác nhận tên đang chọn thuộc ngân hàng trong combo box"""
+        entry = self._selected_alias()
+        bank = self.alias_bank_combo.currentText()
+        if not entry or not bank:
+            QMessageBox.warning(self, "Cảnh báo", "Vui lòng chọn tên cần xác nhận và ngân hàng")
+            return
+        bank_resolver.aliases.confirm(entry["key"], bank)
+        self.log(f"✅ '{entry['raw']}' -> {bank}")
+        self.load_pending_aliases()
+
+    def reject_alias(self):
+        """Bỏ tên đang chọn khỏi danh sách chờ"""
+        entry = self._selected_alias()
+        if entry:
+            bank_resolver.aliases.reject(entry["key"])
+            self.load_pending_aliases()
+
     def show_transaction_viewer(self):
         """Mở giao diện xem giao dịch"""
         try:
-            self.viewer = TransactionViewer()
+            self.viewer = TransactionViewer(self.transaction_storage)
             self.viewer.show()
         except Exception as e:
             QMessageBox.critical(
@@ -919,13 +1011,14 @@ class MainWindow(QMainWindow):
 
             # Tạo mã QR
             acqid_bank = get_bank_bin(bank_name)
-            qr_image = generate_vietqr(
+            qr_image = create_vietqr(
                 accountno=account_number,
                 accountname=account_name,
                 acqid=acqid_bank,
                 addInfo=reference or order_number,
                 amount=amount,
-                template="rc9Vk60"
+                template="rc9Vk60",
+                cache=get_qr_cache(self.transaction_storage.qr_dir),
             )
 
             # Hiển thị mã QR
@@ -981,6 +1074,7 @@ class MainWindow(QMainWindow):
             except RuntimeError:
                 pass  # Thread có thể đã bị delete
 
+        close_driver_pool()
         logging.getLogger().removeHandler(self.log_handler)
         event.accept()
 
@@ -0,0 +1,121 @@
+"""
+Engine poll bất đồng bộ cho Binance P2P.
+Lấy lịch sử BUY và SELL song song qua AsyncClient (một session aiohttp dùng chung),
+đẩy việc xử lý order TRADING sang pool worker để không chặn lượt poll tiếp theo.
+Các bước chặn (xử lý order, gửi thông báo HTTP/Telegram, lưu trạng thái) chạy trong
+executor để event loop không bị treo khi thông báo chậm.
+"""
+
+import asyncio
+import logging
+import time
+
+from binance import AsyncClient
+from config_env import BINANCE_KEY, BINANCE_SECRET
+from module.poll_watermark import SideWatermark
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncP2PPoller:
+    def __init__(self, p2p):
+        """
+        Khởi tạo AsyncP2PPoller
+        Args:
+            p2p: Instance P2PBinance dùng cho xử lý order, scheduler, pool worker và thông báo
+        """
+        self.p2p = p2p
+        self.client = None
+        self.used_orders = p2p.order_states
+        self.watermarks = {trade_type: SideWatermark(trade_type) for trade_type in ("BUY", "SELL")}
+
+    async def run(self):
+        """Vòng lặp poll chính, chạy tới khi p2p.stop() được gọi"""
+        self.client = await AsyncClient.create(BINANCE_KEY, BINANCE_SECRET)
+        loop = asyncio.get_running_loop()
+        err_count = 0
+        try:
+            if not self.p2p.load_order_states():
+                await self._startup_update()
+            self.p2p.order_workers.start()
+            self.p2p.prefetcher.start()
+            logger.info("🚀 Async poller đã khởi động")
+
+            while not self.p2p._stop_flag:
+                try:
+                    results = await asyncio.gather(
+                        *(self._fetch_orders(w) for w in self.watermarks.values())
+                    )
+                    changed = await loop.run_in_executor(None, self._apply_orders, results)
+                    active = self.p2p._has_active_orders(self.watermarks, self.used_orders)
+                    await asyncio.sleep(self.p2p.scheduler.update(active, changed))
+
+                except Exception as e:
+                    err_count += 1
+                    logger.error(f"💥 Lỗi khi poll: {e}")
+                    self.p2p.scheduler.record_error(e)
+                    if err_count > 3:
+                        self.p2p._running = False
+                        await loop.run_in_executor(
+                            None, self.p2p._send_notification, f"Error Count is {err_count}. Bot Stopped."
+                        )
+                    await asyncio.sleep(self.p2p.scheduler.update(False, False))
+        finally:
+            self.used_orders.snapshot()
+            await self.client.close_connection()
+            self.p2p.order_workers.stop()
+            self.p2p.prefetcher.stop()
+            logger.info("🛑 Async poller đã dừng")
+
+    def _apply_orders(self, results) -> bool:
+        """
+        Xử lý các order của một lượt poll (chạy trong executor: _process_order gửi thông báo
+        và lưu trạng thái), trả về True nếu có order đổi trạng thái
+        """
+        changed = False
+        trading_orders = []
+        try:
+            for watermark, orders in zip(self.watermarks.values(), results):
+                for order in orders:
+                    changed |= self.p2p._process_order(
+                        order, watermark.trade_type, self.used_orders,
+                        dispatch=lambda *args: trading_orders.append(args),
+                    )
+                    watermark.observe(
+                        order["orderNumber"], order["orderStatus"], order["createTime"]
+                    )
+        finally:
+            self.p2p.dispatch_trading_orders(trading_orders)
+        self.used_orders.maybe_snapshot()
+        return changed
+
+    async def _startup_update(self):
+        """Nạp trạng thái ban đầu cho cả hai phía song song"""
+        results = await asyncio.gather(
+            *(self._get_history(trade_type) for trade_type in self.watermarks)
+        )
+        for (trade_type, watermark), res in zip(self.watermarks.items(), results):
+            for k in res.get("data") or []:
+                self.used_orders[k["orderNumber"]] = k["orderStatus"]
+                watermark.observe(k["orderNumber"], k["orderStatus"], k["createTime"])
+
+    async def _fetch_orders(self, watermark: SideWatermark, rows: int = 100) -> list:
+        """Lấy các order trong cửa sổ watermark của một phía, tự động phân trang"""
+        start, end = watermark.window(int(time.time() * 1000))
+        orders = []
+        page = 1
+        while True:
+            result = await self._get_history(
+                watermark.trade_type, startTimestamp=start, endTimestamp=end,
+                page=page, rows=rows,
+            )
+            data = result.get("data") or []
+            orders.extend(data)
+            if len(data) < rows:
+                return orders
+            page += 1
+
+    async def _get_history(self, trade_type, **params):
+        result = await self.client.get_c2c_trade_history(tradeType=trade_type, **params)
+        self.p2p.scheduler.record_response(getattr(self.client, "response", None))
+        return result
@@ -0,0 +1,129 @@
+"""
+Bảng alias tên ngân hàng đã học (lưu cạnh bank_list.json).
+- Tên người bán đã tra được với độ tin cậy cao được ghi nhớ: lần sau tra ngay, luôn cùng kết quả
+- Tên tra được với độ tin cậy thấp được đưa vào hàng chờ để xác nhận trên GUI
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class BankAliasTable:
+    def __init__(self, path=None, max_size: int = 2000, max_pending: int = 200):
+        """
+        Khởi tạo BankAliasTable
+        Args:
+            path: File JSON lưu bảng alias (None = chỉ giữ trong bộ nhớ)
+            max_size: Số alias tối đa, alias lâu không dùng nhất bị bỏ trước
+            max_pending: Số tên chờ xác nhận tối đa
+        """
+        self.path = Path(path) if path else None
+        self.max_size = max_size
+        self.max_pending = max_pending
+        # tên đã chuẩn hóa -> {"bank": khóa ngân hàng, "score": điểm, "confirmed": bool}
+        self._aliases = OrderedDict()
+        # tên đã chuẩn hóa -> {"raw": tên gốc, "candidate": khóa gợi ý, "score": điểm, "seen": số lần}
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, normalized: str):
+        """Khóa ngân hàng đã ghi nhớ cho tên đã chuẩn hóa, None nếu chưa có"""
+        with self._lock:
+            entry = self._aliases.get(normalized)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._aliases.move_to_end(normalized)
+            self.hits += 1
+            return entry["bank"]
+
+    def learn(self, normalized: str, bank: str, score: float, confirmed: bool = False) -> None:
+        """Ghi nhớ một alias và bỏ nó khỏi hàng chờ"""
+        with self._lock:
+            self._aliases[normalized] = {
+                "bank": bank, "score": round(score, 1), "confirmed": confirmed, "updated_at": time.time(),
+            }
+            self._aliases.move_to_end(normalized)
+            while len(self._aliases) > self.max_size:
+                self._aliases.popitem(last=False)
+            self._pending.pop(normalized, None)
+        self._save()
+
+    def queue(self, normalized: str, raw: str, candidate, score: float) -> None:
+        """Đưa tên chưa chắc chắn vào hàng chờ xác nhận"""
+        with self._lock:
+            entry = self._pending.pop(normalized, None) or {"raw": raw, "seen": 0}
+            entry.update(candidate=candidate, score=round(score, 1), updated_at=time.time())
+            entry["seen"] += 1
+            self._pending[normalized] = entry
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+            is_new = entry["seen"] == 1
+        if is_new:
+            logger.info(f"🏦 Tên ngân hàng chờ xác nhận: '{raw}' -> {candidate} ({score:.1f})")
+        self._save()
+
+    def pending(self) -> list:
+        """Danh sách tên chờ xác nhận, mới nhất trước"""
+        with self._lock:
+            return [dict(entry, key=key) for key, entry in reversed(self._pending.items())]
+
+    def confirm(self, normalized: str, bank: str) -> None:
+        """Xác nhận tên chờ thuộc về ngân hàng bank"""
+        self.learn(normalized, bank, 100.0, confirmed=True)
+        logger.info(f"✅ Đã xác nhận alias ngân hàng: '{normalized}' -> {bank}")
+
+    def reject(self, normalized: str) -> None:
+        """Bỏ tên khỏi hàng chờ"""
+        with self._lock:
+            removed = self._pending.pop(normalized, None)
+        if removed:
+            self._save()
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            aliases = sorted(data.get("aliases", {}).items(), key=lambda item: item[1].get("updated_at", 0))
+            self._aliases = OrderedDict(aliases[-self.max_size:])
+            self._pending = OrderedDict(data.get("pending", {}))
+        except Exception as e:
+            logger.error(f"Lỗi khi đọc bảng alias ngân hàng: {e}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = {"aliases": dict(self._aliases), "pending": dict(self._pending)}
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with self._save_lock:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Lỗi khi lưu bảng alias ngân hàng: {e}")
+
+    def metrics(self) -> dict:
+        """Trả về số lần hit/miss, tỉ lệ hit và kích thước bảng"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._aliases),
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,219 @@
+"""
+Tra mã BIN ngân hàng từ tên ngân hàng người bán nhập (vd: "Vietinbank ( Chau Duc Lam )").
+- Đọc bank_list.json một lần, tự nạp lại khi file thay đổi (mtime)
+- Tên đã chuẩn hóa (tên viết tắt, mã, tên đầy đủ) nằm trong dict: khớp chính xác là O(1)
+- Tên đã tra trước đó lấy từ bảng alias (BankAliasTable), không phải chấm điểm lại
+- Chỉ khi không khớp chính xác mới chấm điểm rapidfuzz trên toàn bộ danh sách (~60 ngân hàng):
+  lọc trước ứng viên có thể bỏ sót ngân hàng đúng, mà BIN sai thì tiền chuyển nhầm ngân hàng
+"""
+
+import re
+import json
+import logging
+import threading
+import functools
+import unicodedata
+from pathlib import Path
+
+from rapidfuzz import process, fuzz
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+_SPACES = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_text(text):
+    """Chữ thường, bỏ dấu tiếng Việt, bỏ ký tự đặc biệt, gộp khoảng trắng"""
+    try:
+        text = text.lower()
+        text = unicodedata.normalize('NFD', text)
+        text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+        text = _NON_ALNUM.sub('', text)
+        return _SPACES.sub(' ', text).strip()
+    except Exception as e:
+        logger.error(f"Error normalizing text: {e}")
+        return text
+
+
+class BankResolver:
+    def __init__(self, path, min_score: float = 88, aliases=None):
+        """
+        Khởi tạo BankResolver
+        Args:
+            path: Đường dẫn bank_list.json
+            min_score: Điểm rapidfuzz tối thiểu để chấp nhận kết quả
+            aliases: BankAliasTable ghi nhớ kết quả tra tên người bán (None = không dùng)
+        """
+        self.path = Path(path)
+        self.min_score = min_score
+        self.aliases = aliases
+        self.banks = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+        # tên đã chuẩn hóa -> khóa ngân hàng trong bank_list.json
+        self._exact = {}
+        # Tên dùng cho so khớp mờ (khóa và tên viết tắt, giống cách so khớp cũ)
+        self._fuzzy_names = []
+        self._fuzzy_keys = []
+
+        self.exact_hits = 0
+        self.alias_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self) -> bool:
+        """Nạp lại bank_list.json nếu file thay đổi; False nếu không đọc được"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            logger.error("bank_list.json not found.")
+            return bool(self.banks)
+        if mtime == self._mtime:
+            return True
+        with self._lock:
+            if mtime == self._mtime:
+                return True
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    banks = json.load(f)
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON format in bank_list.json.")
+                return bool(self.banks)
+            self._build(banks)
+            self._mtime = mtime
+            logger.info(f"🏦 Đã nạp {len(banks)} ngân hàng vào BankResolver")
+        return True
+
+    def _build(self, banks: dict) -> None:
+        exact, fuzzy_names, fuzzy_keys = {}, [], []
+        for key, info in banks.items():
+            fuzzy_aliases = {normalize_text(key), normalize_text(info.get('short_name') or key)}
+            aliases = fuzzy_aliases | {
+                normalize_text(info.get('code') or ''), normalize_text(info.get('name') or ''),
+            }
+            for alias in aliases:
+                # Tên ngân hàng đầu tiên giữ alias khi trùng (giống thứ tự ưu tiên cũ)
+                if alias:
+                    exact.setdefault(alias, key)
+            # Thứ tự cố định theo bank_list.json để khi bằng điểm thì chọn giống cách cũ
+            for alias in sorted(fuzzy_aliases):
+                if alias:
+                    fuzzy_names.append(alias)
+                    fuzzy_keys.append(key)
+        self.banks = banks
+        self._exact = exact
+        self._fuzzy_names = fuzzy_names
+        self._fuzzy_keys = fuzzy_keys
+
+    def resolve(self, name: str):
+        """
+        Tìm ngân hàng khớp nhất với tên
+        Returns:
+            tuple (khóa ngân hàng, điểm) hoặc None nếu không tìm thấy
+        """
+        if not name or not self._ensure_loaded():
+            return None
+        query = normalize_text(name)
+        key = self._exact.get(query)
+        if key is not None:
+            self.exact_hits += 1
+            return key, 100.0
+        if self.aliases is not None:
+            key = self.aliases.get(query)
+            if key in self.banks:
+                self.alias_hits += 1
+                return key, 100.0
+
+        match = process.extractOne(query, self._fuzzy_names)
+        if match is None:
+            self.misses += 1
+            if self.aliases is not None and query:
+                self.aliases.queue(query, name, None, 0.0)
+            return None
+        self.fuzzy_hits += 1
+        key, score = self._fuzzy_keys[match[2]], match[1]
+        if self.aliases is not None:
+            if score >= self.min_score:
+                self.aliases.learn(query, key, score)
+            else:
+                self.aliases.queue(query, name, key, score)
+        return key, score
+
+    def resolve_many(self, names, workers: int = -1) -> list:
+        """
+        Tra nhiều tên cùng lúc (backfill, xuất báo cáo): chuẩn hóa mỗi tên một lần,
+        khớp chính xác/alias trước, phần còn lại chấm điểm bằng một lần process.cdist
+        Args:
+            names: Danh sách tên ngân hàng
+            workers: Số luồng cho cdist (-1 = tất cả CPU)
+        Returns:
+            list: (bin, điểm) theo đúng thứ tự names; (None, 0.0) nếu không đạt min_score
+        """
+        names = list(names)
+        if not names or not self._ensure_loaded():
+            return [(None, 0.0)] * len(names)
+
+        resolved = {}
+        unresolved = []
+        for query in {normalize_text(name or '') for name in names}:
+            key = self._exact.get(query)
+            if key is None and self.aliases is not None:
+                key = self.aliases.get(query)
+            if key in self.banks:
+                resolved[query] = (key, 100.0)
+            elif query:
+                unresolved.append(query)
+
+        if unresolved and self._fuzzy_names:
+            # score_cutoff cho phép rapidfuzz dừng sớm với các cặp chắc chắn không đạt
+            scores = process.cdist(
+                unresolved, self._fuzzy_names, scorer=fuzz.WRatio,
+                score_cutoff=self.min_score, workers=workers,
+            )
+            best = scores.argmax(axis=1)
+            for row, query in enumerate(unresolved):
+                column = int(best[row])
+                if scores[row, column] > 0:
+                    resolved[query] = (self._fuzzy_keys[column], round(float(scores[row, column]), 2))
+
+        results = []
+        for name in names:
+            key, score = resolved.get(normalize_text(name or ''), (None, 0.0))
+            results.append((self.banks[key].get("bin"), score) if key is not None else (None, 0.0))
+        return results
+
+    def get_bin(self, name: str):
+        """Mã BIN của ngân hàng khớp với tên, None nếu không đủ tin cậy"""
+        result = self.resolve(name)
+        if not result:
+            logger.warning(f"No match found for {name}")
+            return None
+        key, score = result
+        if score < self.min_score:
+            logger.warning(f"Low confidence match for '{name}': {key} ({score})")
+            return None
+        logger.info(f"Best match: {key} with accuracy: {score}")
+        return self.banks[key].get("bin")
+
+    def find_containing(self, name: str):
+        """BIN của ngân hàng đầu tiên có khóa/tên/tên viết tắt chứa chuỗi tìm kiếm"""
+        if not name or not self._ensure_loaded():
+            return None
+        name = name.upper()
+        for key, info in self.banks.items():
+            if (name in key.upper() or name in (info.get('name') or '').upper()
+                    or name in (info.get('short_name') or '').upper()):
+                return info.get('bin')
+        return None
+
+    def metrics(self) -> dict:
+        """Trả về số lần khớp chính xác / theo alias / khớp mờ / không tìm thấy"""
+        metrics = {
+            "exact_hits": self.exact_hits, "alias_hits": self.alias_hits,
+            "fuzzy_hits": self.fuzzy_hits, "misses": self.misses,
+        }
+        if self.aliases is not None:
+            metrics["aliases"] = self.aliases.metrics()
+        return metrics
@@ -3,16 +3,29 @@ import time
 from datetime import datetime
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
-from config_env import BINANCE_KEY, BINANCE_SECRET
-from module.generate_qrcode import generate_vietqr, get_nganhang_id
+from config_env import (
+    BINANCE_KEY, BINANCE_SECRET, POLL_ACTIVE_INTERVAL, POLL_IDLE_INTERVAL,
+    POLL_MAX_INTERVAL, POLL_BACKOFF_FACTOR, POLL_WEIGHT_BUDGET, ORDER_WORKERS, PREFETCH_WORKERS,
+)
+from module.generate_qrcode import create_vietqr, get_nganhang_id, get_qr_cache
 
 # from module.telegram_send_message import TelegramBot
 from module.discord_send_message import DiscordBot
-from module.selenium_get_info import extract_order_info, extract_info_by_key
+from module.selenium_get_info import (
+    extract_order_info, extract_orders_info, extract_info_by_key, has_required_fields,
+    prefetch_order_info,
+)
 import pandas as pd
-from module.transaction_storage import TransactionStorage
+from module.transaction_storage import create_storage
+from module.poll_watermark import SideWatermark, DEFAULT_MAX_LOOKBACK_MS
+from module.order_state import OrderStateTable
+from module.order_worker import OrderWorkerPool
+from module.order_cache import OrderDetailCache
+from module.order_prefetch import OrderPrefetcher
+from module.poll_scheduler import PollScheduler, ACTIVE_STATUSES
 from dotenv import load_dotenv
 import os
+from pathlib import Path
 
 # Load biến môi trường
 load_dotenv()
@@ -24,19 +37,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ORDER_STATUS_LABELS = {
+    "COMPLETED": "COMPLETED",
+    "PENDING": "PENDING",
+    "TRADING": "TRADING",
+    "BUYER_PAYED": "BUYER PAYED",
+    "DISTRIBUTING": "DISTRIBUTING",
+    "IN_APPEAL": "IN APPEAL",
+    "CANCELLED": "CANCELLED",
+    "CANCELLED_BY_SYSTEM": "CANCELLED BY SYSTEM",
+}
+
 
 class P2PBinance:
-    def __init__(self, storage_dir: str = "transactions"):
+    def __init__(self, storage_dir: str = "transactions", order_cache: OrderDetailCache = None):
         """
         Khởi tạo P2PBinance
         Args:
             storage_dir: Thư mục lưu trữ dữ liệu giao dịch
+            order_cache: Cache thông tin chi tiết order (mặc định lưu trong storage_dir)
         """
         self._stop_flag = False
         self._running = False
         self.current_transaction = None
         self.logger = logging.getLogger("P2P")
-        self.storage = TransactionStorage(storage_dir)
+        self.storage = create_storage(storage_dir)
+        self.qr_cache = get_qr_cache(self.storage.qr_dir)
+        self.order_states = OrderStateTable(Path(storage_dir) / "order_state.json")
+        self.order_workers = OrderWorkerPool(self.handle_trading_order, max_workers=ORDER_WORKERS)
+        self.order_cache = order_cache or OrderDetailCache(
+            Path(storage_dir) / "order_cache.json", is_complete=has_required_fields
+        )
+        self.prefetcher = OrderPrefetcher(self.order_cache, prefetch_order_info, max_concurrent=PREFETCH_WORKERS)
+        self.scheduler = PollScheduler(
+            active_interval=POLL_ACTIVE_INTERVAL,
+            idle_interval=POLL_IDLE_INTERVAL,
+            max_interval=POLL_MAX_INTERVAL,
+            backoff_factor=POLL_BACKOFF_FACTOR,
+            weight_budget=POLL_WEIGHT_BUDGET,
+        )
 
         # Khởi tạo Binance client
         try:
@@ -56,7 +95,12 @@ class P2PBinance:
         try:
             # Trích xuất thông tin từ order
             self.logger.info(f"📋 Đang trích xuất thông tin cho order: {order_number}")
-            infor_seller = extract_order_info(order_number)
+            infor_seller = self.order_cache.get_or_fetch(order_number, extract_order_info)
+            if infor_seller and not has_required_fields(infor_seller):
+                # Kết quả thiếu trường (prefetch sớm, trang chưa render xong): trích xuất lại một lần
+                self.logger.warning(f"⚠️ Thông tin order {order_number} thiếu trường, trích xuất lại")
+                self.order_cache.invalidate(order_number)
+                infor_seller = self.order_cache.get_or_fetch(order_number, extract_order_info)
             self.logger.info(f"📊 Thông tin trích xuất ban đầu: {infor_seller}")
             
             if not infor_seller:
@@ -120,13 +164,14 @@ class P2PBinance:
                 acqid_bank = get_nganhang_id(bank_name)
                 self.logger.info(f"🏦 Bank ID: {acqid_bank} cho ngân hàng: {bank_name}")
                 
-                qr_image = generate_vietqr(
+                qr_image = create_vietqr(
                     accountno=bank_card,
                     accountname=full_name,
                     acqid=acqid_bank,
                     addInfo=reference_message,
                     amount=fiat_amount,
                     template="rc9Vk60",
+                    cache=self.qr_cache,
                 )
 
                 # Chuyển đổi BytesIO thành bytes
@@ -153,8 +198,8 @@ class P2PBinance:
         self.logger.info(f"🔍 Bắt đầu xử lý SELL order: {order_number}")
         
         try:
-            qr_image = generate_vietqr(
-                addInfo=order_number, amount=fiat_amount, template="rc9Vk60"
+            qr_image = create_vietqr(
+                addInfo=order_number, amount=fiat_amount, template="rc9Vk60", cache=self.qr_cache
             )
 
             # Chuyển đổi BytesIO thành bytes
@@ -182,110 +227,215 @@ class P2PBinance:
         except Exception as e:
             self.logger.error(f"💥 Lỗi khi xử lý SELL order {order_number}: {str(e)}", exc_info=True)
 
-    def get_recent_transactions(self, limit: int = 10) -> list:
+    def get_recent_transactions(self, limit: int = 10, offset: int = 0) -> list:
         """Lấy danh sách giao dịch gần đây"""
-        return self.storage.get_recent_transactions(limit)
+        return self.storage.get_recent_transactions(limit, offset)
 
     def get_transaction(self, order_number: str) -> dict:
         """Lấy thông tin giao dịch theo mã đơn hàng"""
-        return self.storage.get_transaction(order_number)
+        return self.storage.get_transaction_by_order(order_number)
 
-    def get_transactions_by_date(self, start_date: str, end_date: str) -> list:
-        """Lấy danh sách giao dịch trong khoảng thời gian"""
-        return self.storage.get_transactions_by_date(start_date, end_date)
+    def get_transactions_by_date(self, start_date, end_date, **filters) -> list:
+        """
+        Lấy danh sách giao dịch trong khoảng thời gian
+        Args:
+            start_date, end_date: datetime / date / chuỗi 'YYYY-MM-DD' (tính cả hai ngày)
+            **filters: trade_type, bank, min_amount, max_amount, text
+        """
+        return self.storage.get_transactions_by_date_range(start_date, end_date, **filters)
 
     def transactions_trading(self):
-        status = {
-            "COMPLETED": "COMPLETED",
-            "PENDING": "PENDING",
-            "TRADING": "TRADING",
-            "BUYER_PAYED": "BUYER PAYED",
-            "DISTRIBUTING": "DISTRIBUTING",
-            "IN_APPEAL": "IN APPEAL",
-            "CANCELLED": "CANCELLED",
-            "CANCELLED_BY_SYSTEM": "CANCELLED BY SYSTEM",
-        }
-        side = {"BUY": "BUY", "SELL": "SELL"}
-        used_orders = {}
+        used_orders = self.order_states
         err_count = 0
+        watermarks = {trade_type: SideWatermark(trade_type) for trade_type in ("BUY", "SELL")}
 
-        self.startup_update(used_orders)
+        if not self.load_order_states():
+            self.startup_update(used_orders, watermarks)
 
-        while not self._stop_flag:
-            try:
-                for trade_type in ["BUY", "SELL"]:
-                    end = int(datetime.utcnow().timestamp() * 1000)
-                    start = end - 7200000     # ~45 minutes
-
-                    result = self.get_c2c_trade_history(
-                        tradeType=trade_type, startDate=start, endDate=end
-                    )
-
-                    for order in result["data"]:
-                        order_status = order["orderStatus"]
-                        order_number = order["orderNumber"]
-                        previous_status = used_orders.get(order_number)
-                        if order_status == "TRADING":
-                            self.logger.info(
-                                f"[Order] #{order_number} | Status: {order_status} | Type: {order['tradeType']} | "
-                                f"Price: {order['fiatSymbol']}{order['unitPrice']} | "
-                                f"Fiat Amount: {order['totalPrice']} {order['fiat']} | "
-                                f"Crypto Amount: {order['amount']} {order['asset']} | "
-                                f"Created at: {datetime.fromtimestamp(order['createTime']/1000).strftime('%Y-%m-%d %H:%M:%S')}"
+        self.order_workers.start()
+        self.prefetcher.start()
+        try:
+            while not self._stop_flag:
+                try:
+                    changed = False
+                    trading_orders = []
+                    try:
+                        for watermark in watermarks.values():
+                            changed |= self._poll_side(
+                                watermark, used_orders,
+                                dispatch=lambda *args: trading_orders.append(args),
                             )
+                    finally:
+                        self.dispatch_trading_orders(trading_orders)
 
-                        if previous_status is None or previous_status != order_status:
-                            self.logger.info(f"🔄 Status thay đổi cho order {order_number}: {previous_status} -> {order_status}")
-                            
-                            message = (
-                                f"Status: {status.get(order_status)}\n"
-                                f"Type: {side.get(order['tradeType'])}\n"
-                                f"Price: {order['fiatSymbol']}{order['unitPrice']}\n"
-                                f"Fiat Amount: {float(order['totalPrice'])} {order['fiat']}\n"
-                                f"Crypto Amount: {float(order['amount'])} {order['asset']}\n"
-                                f"Order No.: {order_number}"
-                            )
+                    used_orders.maybe_snapshot()
+                    active = self._has_active_orders(watermarks, used_orders)
+                    self._sleep(self.scheduler.update(active, changed))
+
+                except Exception as e:
+                    err_count += 1
+                    self.scheduler.record_error(e)
+                    if err_count > 3:
+                        self._running = False
+                        self._send_notification(f"Error Count is {err_count}. Bot Stopped.")
+                    self._sleep(self.scheduler.update(False, False))
+        finally:
+            used_orders.snapshot()
+            self.order_workers.stop()
+            self.prefetcher.stop()
+
+    def load_order_states(self) -> bool:
+        """
+        Nạp bảng trạng thái order từ snapshot trên đĩa
+        Returns:
+            bool: True nếu snapshot còn nằm trong cửa sổ poll, khi đó không cần quét API
+        """
+        return self.order_states.load(max_age=DEFAULT_MAX_LOOKBACK_MS / 1000)
+
+    def _sleep(self, seconds: float):
+        """Ngủ theo từng bước ngắn để stop() có hiệu lực ngay cả khi đang backoff"""
+        deadline = time.time() + seconds
+        while not self._stop_flag:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.5))
+
+    @staticmethod
+    def _has_active_orders(watermarks: dict, used_orders: dict) -> bool:
+        """Kiểm tra có order mở nào đang ở trạng thái cần poll nhanh không"""
+        return any(
+            used_orders.get(order_number) in ACTIVE_STATUSES
+            for watermark in watermarks.values()
+            for order_number in watermark.open_orders
+        )
+
+    def get_poll_metrics(self) -> dict:
+        """Lấy các chỉ số của bộ lập lịch poll, pool xử lý order, prefetch và cache QR"""
+        metrics = self.scheduler.metrics()
+        metrics["workers"] = self.order_workers.metrics()
+        metrics["prefetch"] = self.prefetcher.metrics()
+        metrics["qr_cache"] = self.qr_cache.metrics()
+        return metrics
+
+    def _poll_side(self, watermark: SideWatermark, used_orders: dict, dispatch=None) -> bool:
+        """Poll các order mới/đang mở của một phía, trả về True nếu có order đổi trạng thái"""
+        changed = False
+        start, end = watermark.window(int(time.time() * 1000))
+        for order in self._fetch_orders(watermark.trade_type, start, end):
+            changed |= self._process_order(order, watermark.trade_type, used_orders, dispatch)
+            watermark.observe(order["orderNumber"], order["orderStatus"], order["createTime"])
+        return changed
+
+    def _fetch_orders(self, trade_type, start, end, rows=100):
+        """Lấy các order trong cửa sổ [start, end], tự động phân trang"""
+        page = 1
+        while True:
+            result = self.get_c2c_trade_history(
+                tradeType=trade_type, startTimestamp=start, endTimestamp=end,
+                page=page, rows=rows,
+            )
+            orders = result.get("data") or []
+            yield from orders
+            if len(orders) < rows:
+                break
+            page += 1
+
+    def _process_order(self, order, trade_type, used_orders, dispatch=None):
+        """
+        Xử lý một order: chỉ làm việc khi trạng thái thay đổi
+        Args:
+            dispatch: Hàm nhận (order_number, trade_type, fiat_amount, message) để chạy
+                xử lý TRADING ở nơi khác; mặc định chạy trực tiếp
+        """
+        order_status = order["orderStatus"]
+        order_number = order["orderNumber"]
+        previous_status = used_orders.get(order_number)
+        # Đường đi nhanh: không đổi trạng thái thì không format/log gì cả
+        if previous_status == order_status:
+            return False
+        if previous_status is None:
+            self.scheduler.record_detection(order["createTime"])
+
+        if order_status == "TRADING":
+            self.logger.info(
+                f"[Order] #{order_number} | Status: {order_status} | Type: {order['tradeType']} | "
+                f"Price: {order['fiatSymbol']}{order['unitPrice']} | "
+                f"Fiat Amount: {order['totalPrice']} {order['fiat']} | "
+                f"Crypto Amount: {order['amount']} {order['asset']} | "
+                f"Created at: {datetime.fromtimestamp(order['createTime']/1000).strftime('%Y-%m-%d %H:%M:%S')}"
+            )
+
+        self.logger.info(f"🔄 Status thay đổi cho order {order_number}: {previous_status} -> {order_status}")
+
+        message = (
+            f"Status: {ORDER_STATUS_LABELS.get(order_status)}\n"
+            f"Type: {order['tradeType']}\n"
+            f"Price: {order['fiatSymbol']}{order['unitPrice']}\n"
+            f"Fiat Amount: {float(order['totalPrice'])} {order['fiat']}\n"
+            f"Crypto Amount: {float(order['amount'])} {order['asset']}\n"
+            f"Order No.: {order_number}"
+        )
+
+        used_orders[order_number] = order_status
+        self._prefetch_order(order_number, trade_type, previous_status, order_status)
+        self._send_notification(message)
+
+        if order_status == "TRADING":
+            self.logger.info(f"🎯 Bắt đầu xử lý order TRADING: {order_number} (Type: {trade_type})")
+            (dispatch or self.handle_trading_order)(
+                order_number, trade_type, float(order["totalPrice"]), message
+            )
+        else:
+            self.logger.info(f"📝 Order {order_number} có status {order_status} (không phải TRADING)")
+        return True
 
-                            used_orders[order_number] = order_status
-                            self._send_notification(message)
-
-                            if order_status == "TRADING":
-                                self.logger.info(f"🎯 Bắt đầu xử lý order TRADING: {order_number} (Type: {trade_type})")
-                                if trade_type == "BUY":
-                                    self.logger.info(f"🛒 Gọi handle_buy_order cho order: {order_number}")
-                                    self.handle_buy_order(order_number, message)
-                                elif trade_type == "SELL":
-                                    self.logger.info(f"🛍️ Gọi handle_sell_order cho order: {order_number}")
-                                    self.handle_sell_order(
-                                        order_number,
-                                        float(order["totalPrice"]),
-                                        message,
-                                    )
-                                else:
-                                    self.logger.warning(f"⚠️ Trade type không xác định: {trade_type}")
-                            else:
-                                self.logger.info(f"📝 Order {order_number} có status {order_status} (không phải TRADING)")
-
-                time.sleep(1)
-
-            except Exception as e:
-                err_count += 1
-                if err_count > 3:
-                    self._running = False
-                    self._send_notification(f"Error Count is {err_count}. Bot Stopped.")
+    def dispatch_trading_orders(self, trading_orders: list):
+        """
+        Gửi các order TRADING của một lượt poll vào pool xử lý.
+        Nếu nhiều order BUY vào TRADING cùng lúc, trích xuất trước theo lô trên nhiều tab;
+        handle_buy_order sẽ chờ kết quả lô qua order_cache thay vì scrape lần lượt.
+        Args:
+            trading_orders: Danh sách (order_number, trade_type, fiat_amount, message)
+        """
+        buy_orders = [args[0] for args in trading_orders if args[1] == "BUY"]
+        if len(buy_orders) > 1:
+            self.logger.info(f"📦 {len(buy_orders)} order BUY cùng lúc, trích xuất theo lô")
+            self.order_cache.fetch_many(buy_orders, extract_orders_info, background=True)
+        for args in trading_orders:
+            self.order_workers.submit(*args)
+
+    def _prefetch_order(self, order_number, trade_type, previous_status, order_status):
+        """Prefetch thông tin order BUY mới thấy lần đầu, hủy khi order bị hủy"""
+        if order_status in ("CANCELLED", "CANCELLED_BY_SYSTEM"):
+            self.prefetcher.cancel(order_number)
+        elif order_status != "PENDING":
+            # TRADING trở đi được handle_buy_order lấy trực tiếp từ cache
+            self.prefetcher.discard(order_number)
+        elif previous_status is None and trade_type == "BUY":
+            self.prefetcher.submit(order_number)
+
+    def handle_trading_order(self, order_number, trade_type, fiat_amount, message):
+        """Chuyển order TRADING tới handler tương ứng với phía giao dịch"""
+        if trade_type == "BUY":
+            self.logger.info(f"🛒 Gọi handle_buy_order cho order: {order_number}")
+            self.handle_buy_order(order_number, message)
+        elif trade_type == "SELL":
+            self.logger.info(f"🛍️ Gọi handle_sell_order cho order: {order_number}")
+            self.handle_sell_order(order_number, fiat_amount, message)
+        else:
+            self.logger.warning(f"⚠️ Trade type không xác định: {trade_type}")
 
     def stop(self):
         self._stop_flag = True
         logger.info("🛑 Yêu cầu dừng Binance P2P...")
 
-    def get_c2c_trade_history(self, tradeType, startDate=None, endDate=None):
+    def get_c2c_trade_history(self, tradeType, **params):
         """Lấy lịch sử giao dịch C2C"""
-        try:
-            return self.client.get_c2c_trade_history(
-                tradeType=tradeType, startDate=startDate, endDate=endDate
-            )
-        except Exception as e:
-            raise
+        params = {k: v for k, v in params.items() if v is not None}
+        result = self.client.get_c2c_trade_history(tradeType=tradeType, **params)
+        self.scheduler.record_response(getattr(self.client, "response", None))
+        return result
 
     def _send_notification(self, message):
         """Gửi thông báo qua các kênh đã cấu hình"""
@@ -419,9 +569,11 @@ class P2PBinance:
             df_today = pd.DataFrame()
         return df_today
 
-    def startup_update(self, database: dict):
+    def startup_update(self, database: dict, watermarks: dict = None):
         for trd in ["BUY", "SELL"]:
             res = self.get_c2c_trade_history(tradeType=trd)
             logger.debug(f"Startup Trade History Result: {res}")
             for k in res["data"]:
                 database[k["orderNumber"]] = k["orderStatus"]
+                if watermarks and trd in watermarks:
+                    watermarks[trd].observe(k["orderNumber"], k["orderStatus"], k["createTime"])
@@ -0,0 +1,144 @@
+"""
+Pool WebDriver dùng lại lâu dài, gắn vào Chrome remote-debugging.
+Mỗi phiên giữ một driver và một tab riêng; sau khi dùng xong thì trả lại pool
+thay vì quit, nên mỗi lần trích xuất chỉ tốn một lần điều hướng trang.
+"""
+
+import queue
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession:
+    """Một driver cùng tab mà nó sở hữu (và thư mục profile riêng nếu có)"""
+
+    __slots__ = ("driver", "handle", "profile_dir")
+
+    def __init__(self, driver, handle, profile_dir=None):
+        self.driver = driver
+        self.handle = handle
+        self.profile_dir = profile_dir
+
+
+class DriverPool:
+    def __init__(self, factory, size: int = 2, setup=None, page_load_timeout: float = None):
+        """
+        Khởi tạo DriverPool
+        Args:
+            factory: Hàm không tham số tạo một WebDriver mới; nếu driver có thuộc tính
+                profile_dir thì thư mục đó bị xóa khi phiên bị bỏ
+            size: Số driver tối đa tồn tại cùng lúc
+            setup: Hàm nhận driver, gọi sau khi đã chuyển sang tab riêng của phiên
+                (vd: gửi lệnh CDP chỉ áp dụng cho tab hiện tại)
+            page_load_timeout: Page-load timeout của driver (giây, None = mặc định của WebDriver);
+                lệnh gửi tới tab đang điều hướng cũng chỉ chờ tối đa chừng này
+        """
+        self.factory = factory
+        self.size = size
+        self.setup = setup
+        self.page_load_timeout = page_load_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _create(self) -> PooledSession:
+        driver = self.factory()
+        session = PooledSession(driver, None, getattr(driver, "profile_dir", None))
+        try:
+            if self.page_load_timeout is not None:
+                driver.set_page_load_timeout(self.page_load_timeout)
+            driver.execute_script("window.open('');")
+            session.handle = driver.window_handles[-1]
+            driver.switch_to.window(session.handle)
+            if self.setup:
+                self.setup(driver)
+        except Exception:
+            self._close(session)
+            raise
+        logger.info("🆕 Đã tạo phiên driver mới trong pool")
+        return session
+
+    @staticmethod
+    def _is_healthy(session: PooledSession) -> bool:
+        """Kiểm tra driver còn sống và tab của nó còn tồn tại"""
+        try:
+            session.driver.switch_to.window(session.handle)
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(session: PooledSession) -> None:
+        """Đóng driver và xóa bản sao profile của phiên"""
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        if session.profile_dir:
+            shutil.rmtree(session.profile_dir, ignore_errors=True)
+
+    def _discard(self, session: PooledSession) -> None:
+        with self._lock:
+            self._created -= 1
+        self._close(session)
+
+    def acquire(self, timeout: float = None) -> PooledSession:
+        """Lấy một phiên còn sống; tạo mới hoặc kết nối lại nếu cần"""
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._create()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                session = self._idle.get(timeout=timeout)
+
+            if self._is_healthy(session):
+                return session
+            logger.warning("♻️ Phiên driver không còn hoạt động, kết nối lại")
+            self._discard(session)
+
+    def release(self, session: PooledSession, healthy: bool = True) -> None:
+        """Trả phiên về pool (hoặc bỏ đi nếu đã hỏng)"""
+        if healthy:
+            self._idle.put(session)
+        else:
+            self._discard(session)
+
+    @contextmanager
+    def session(self, timeout: float = None):
+        """Context manager trả về driver, tự trả lại pool khi xong"""
+        session = self.acquire(timeout)
+        healthy = True
+        try:
+            yield session.driver
+        except WebDriverException as e:
+            # Timeout chờ phần tử không làm hỏng driver
+            healthy = isinstance(e, TimeoutException)
+            raise
+        finally:
+            self.release(session, healthy)
+
+    def close_all(self) -> None:
+        """Đóng toàn bộ driver đang rảnh trong pool"""
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(session)
@@ -0,0 +1,109 @@
+"""
+Map nhãn trên trang chi tiết order sang tên trường chuẩn (Full Name, Bank Card, ...).
+- Bảng đồng nghĩa theo locale (en, vi), biên dịch một regex duy nhất lúc khởi tạo
+- Ghi nhớ kết quả nhãn -> trường chuẩn nên mỗi nhãn chỉ phải so regex một lần
+"""
+
+import re
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Trường chuẩn -> {locale: [regex trên nhãn đã chuẩn hóa]}
+# Thứ tự trường là thứ tự ưu tiên khi một nhãn khớp nhiều trường
+FIELD_SYNONYMS = {
+    "Fiat amount": {
+        "en": [r"fiat amount"],
+        "vi": [r"số tiền pháp định", r"tổng số tiền"],
+    },
+    "Reference message": {
+        "en": [r"reference message"],
+        "vi": [r"nội dung chuyển khoản", r"lời nhắn tham chiếu", r"nội dung tham chiếu"],
+    },
+    "Full Name": {
+        "en": [r"^name$", r"full name"],
+        "vi": [r"^tên$", r"họ và tên", r"họ tên", r"tên đầy đủ", r"tên chủ tài khoản"],
+    },
+    "Bank Card": {
+        "en": [r"bank card", r"account number"],
+        "vi": [r"số tài khoản", r"số thẻ"],
+    },
+    "Bank Name": {
+        "en": [r"bank name"],
+        "vi": [r"tên ngân hàng", r"^ngân hàng$"],
+    },
+}
+
+
+def normalize_label(label: str) -> str:
+    """Chuẩn hóa nhãn: NFC, chữ thường, gộp khoảng trắng, bỏ dấu ':' cuối"""
+    label = unicodedata.normalize("NFC", label)
+    return " ".join(label.lower().split()).rstrip(":").rstrip()
+
+
+class FieldMapper:
+    def __init__(self, synonyms: dict = FIELD_SYNONYMS, locales=None, memo_size: int = 1024):
+        """
+        Khởi tạo FieldMapper
+        Args:
+            synonyms: Bảng trường chuẩn -> {locale: [regex]}
+            locales: Các locale được dùng (None = tất cả locale trong bảng)
+            memo_size: Số nhãn tối đa được ghi nhớ
+        """
+        self.fields = list(synonyms)
+        self.memo_size = memo_size
+        self._memo = {}
+        self._lock = threading.Lock()
+
+        # Mỗi trường là một nhánh neo ở đầu chuỗi, nhánh đứng trước được thử trước
+        branches = []
+        for index, field in enumerate(self.fields):
+            patterns = [
+                pattern
+                for locale, locale_patterns in synonyms[field].items()
+                if locales is None or locale in locales
+                for pattern in locale_patterns
+            ]
+            if patterns:
+                branches.append(f"^(?=.*?(?:{'|'.join(patterns)}))(?P<f{index}>)")
+        self._regex = re.compile("|".join(branches)) if branches else None
+
+        self.hits = 0
+        self.misses = 0
+
+    def canonical(self, label: str):
+        """
+        Tìm trường chuẩn của một nhãn
+        Returns:
+            str hoặc None nếu nhãn không thuộc trường nào
+        """
+        try:
+            field = self._memo[label]
+            self.hits += 1
+            return field
+        except KeyError:
+            pass
+
+        self.misses += 1
+        match = self._regex.match(normalize_label(label)) if self._regex else None
+        field = self.fields[int(match.lastgroup[1:])] if match else None
+        with self._lock:
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[label] = field
+        return field
+
+    def map(self, data: dict) -> dict:
+        """Đổi dict nhãn/giá trị thành dict trường chuẩn/giá trị, bỏ các nhãn không biết"""
+        result = {}
+        for key, value in data.items():
+            field = self.canonical(key)
+            if field:
+                result[field] = value
+        return result
+
+    def metrics(self) -> dict:
+        """Trả về số lần hit/miss của bộ nhớ nhãn"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memo)}
@@ -1,26 +1,39 @@
-from config_env import VIETQR_KEY, VIETQR_SECRET,ACQID, ACCOUNTNAME, ACQID,ACCOUNTNO
+from config_env import VIETQR_KEY, VIETQR_SECRET,ACQID, ACCOUNTNAME, ACQID,ACCOUNTNO, QR_MODE, QR_CACHE_MB, VIETQR_DEADLINE
 import requests
-import base64
 import io
 import logging
 import json
 from rapidfuzz import process
-import unicodedata
-import re
 import os
+import threading
+import segno
+from pathlib import Path
+from module.vietqr_payload import build_vietqr_payload
+from module.qr_cache import QRCache, qr_cache_key
+from module.vietqr_client import VietQRClient
+from module.bank_resolver import BankResolver, normalize_text
+from module.bank_aliases import BankAliasTable
 
 
 bank_dict_path =  os.path.join(os.path.dirname(os.path.dirname(__file__)), "bank_list.json")
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def generate_vietqr(accountno=ACCOUNTNO, accountname=ACCOUNTNAME, acqid=ACQID, addInfo='', amount='', template=''):
-    url = "https://api.vietqr.io/v2/generate"
-    headers = {
-        "x-client-id": VIETQR_KEY,
-        "x-api-key": VIETQR_SECRET,
-        "Content-Type": "application/json"
-    }
+# Ảnh QR đã tạo, dùng lại cho các yêu cầu trùng nội dung (vd: bấm "Tạo QR" nhiều lần).
+# Mặc định chỉ giữ trong bộ nhớ; bot và GUI dùng get_qr_cache(storage.qr_dir) để lưu cả trên đĩa
+qr_cache = QRCache()
+_qr_caches = {}
+_qr_caches_lock = threading.Lock()
+# Client API VietQR dùng chung (keep-alive, deadline, hedge, circuit breaker)
+vietqr_client = VietQRClient(VIETQR_KEY, VIETQR_SECRET, deadline=VIETQR_DEADLINE)
+# Tra BIN ngân hàng dùng chung cho bot (handle_buy_order) và GUI (MainWindow.generate_qr)
+# Bảng alias tên ngân hàng đã học được lưu cạnh bank_list.json
+bank_resolver = BankResolver(
+    bank_dict_path,
+    aliases=BankAliasTable(os.path.join(os.path.dirname(bank_dict_path), "bank_aliases.json")),
+)
+
+def generate_vietqr(accountno=ACCOUNTNO, accountname=ACCOUNTNAME, acqid=ACQID, addInfo='', amount='', template='', timeout=None):
     payload = {
         "accountNo": accountno,
         "accountName": accountname,
@@ -30,11 +43,68 @@ def generate_vietqr(accountno=ACCOUNTNO, accountname=ACCOUNTNAME, acqid=ACQID, a
         "template": template # Template for the QR code
     }
 
-    response = requests.post(url, json=payload, headers=headers)
-    qr_data_url = response.json()["data"]["qrDataURL"]
-    header, encoded = qr_data_url.split(",", 1)
-    image_data = base64.b64decode(encoded)
-    return io.BytesIO(image_data)
+    return vietqr_client.generate(payload, deadline=timeout)
+
+def generate_vietqr_local(accountno=ACCOUNTNO, accountname=ACCOUNTNAME, acqid=ACQID, addInfo='', amount='', template='', scale=8):
+    """
+    Tạo ảnh QR VietQR ngay trong tiến trình, không gọi API.
+    Cùng tham số và kiểu trả về với generate_vietqr; accountname và template
+    chỉ dùng cho ảnh của API nên được bỏ qua (payload không chứa tên người nhận).
+    Args:
+        scale: Số pixel cho mỗi module QR
+    Returns:
+        io.BytesIO: Ảnh PNG
+    """
+    payload = build_vietqr_payload(acqid, accountno, amount, addInfo)
+    buffer = io.BytesIO()
+    segno.make(payload, error='m', micro=False).save(buffer, kind='png', scale=scale, border=4)
+    buffer.seek(0)
+    return buffer
+
+def get_qr_cache(qr_dir) -> QRCache:
+    """
+    QRCache dùng chung cho một thư mục ảnh QR của storage (ảnh lưu trong qr_dir/cache)
+    Các instance storage cùng thư mục dùng chung một cache để tổng dung lượng được tính đúng
+    """
+    cache_dir = (Path(qr_dir) / "cache").resolve()
+    with _qr_caches_lock:
+        cache = _qr_caches.get(cache_dir)
+        if cache is None:
+            cache = _qr_caches[cache_dir] = QRCache(cache_dir, max_disk_bytes=QR_CACHE_MB * 1024 * 1024)
+        return cache
+
+def create_vietqr(accountno=ACCOUNTNO, accountname=ACCOUNTNAME, acqid=ACQID, addInfo='', amount='', template='', mode=QR_MODE, cache=qr_cache):
+    """
+    Tạo QR VietQR: mặc định tạo cục bộ, lỗi thì dùng API VietQR (template) làm dự phòng.
+    Ở mode 'remote', API lỗi/quá deadline/đang ngắt thì tạo cục bộ.
+    Yêu cầu trùng nội dung được lấy lại từ cache.
+    Args:
+        mode: 'local' (tạo cục bộ, API dự phòng) hoặc 'remote' (API, cục bộ dự phòng)
+        cache: QRCache dùng chung (None = không cache)
+    Returns:
+        io.BytesIO: Ảnh PNG
+    """
+    def create():
+        args = (accountno, accountname, acqid, addInfo, amount, template)
+        if mode == "local":
+            try:
+                return generate_vietqr_local(*args).getvalue()
+            except Exception as e:
+                logger.warning(f"Không tạo được QR cục bộ, chuyển sang API VietQR: {e}")
+            return generate_vietqr(*args).getvalue()
+        try:
+            return generate_vietqr(*args).getvalue()
+        except Exception as e:
+            logger.warning(f"API VietQR lỗi, tạo QR cục bộ: {e}")
+        return generate_vietqr_local(*args).getvalue()
+
+    if cache is None:
+        return io.BytesIO(create())
+    key = qr_cache_key(
+        accountno=accountno, accountname=accountname, acqid=acqid,
+        addInfo=addInfo, amount=amount, template=template, mode=mode,
+    )
+    return io.BytesIO(cache.get_or_create(key, create))
 
 def get_nganhang_api():
     """
@@ -82,50 +152,18 @@ def get_nganhang_api():
 
 def get_nganhang_id(name_bank: str) -> str:
     try:
-        with open(bank_dict_path, 'r', encoding="utf-8") as f:
-            banks = json.load(f)
-            list_banks = list(banks.keys())
-            result = find_best_match(name_bank, list_banks)
-            if result:
-                key, score = result
-                if score >= 88:
-                    logger.info(f"Best match: {key} with accuracy: {score}")
-                    return banks[key].get("bin")
-                else:
-                    logger.warning(f"Low confidence match for '{name_bank}': {key} ({score})")
-            else:
-                logger.warning(f"No match found for {name_bank}")
-            return None
-    except FileNotFoundError:
-        logger.error("bank_list.json not found.")
-        return None
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON format in bank_list.json.")
-        return None
+        return bank_resolver.get_bin(name_bank)
     except Exception as e:  
         logger.error(f"Unexpected error: {e}")
         return None
 
-def normalize_text(text):
-    try:
-        text = text.lower()
-        text = unicodedata.normalize('NFD', text)
-        text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
-        text = re.sub(r'[^a-z0-9\s]', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
-    except Exception as e:
-        logger.error(f"Error normalizing text: {e}")
-        return text
-
 def find_best_match(query, choices):
     try:
         norm_query = normalize_text(query)
         norm_choices = [normalize_text(c) for c in choices]
         match = process.extractOne(norm_query, norm_choices)
         if match:
-            original_match = choices[norm_choices.index(match[0])]
-            return original_match, match[1]
+            return choices[match[2]], match[1]
         return None
     except Exception as e:
         logger.error(f"Error finding best match: {e}")
@@ -140,22 +178,7 @@ def get_bank_bin(bank_name: str) -> str:
         str: Mã BIN của ngân hàng, nếu không tìm thấy trả về None
     """
     try:
-        # Đọc file bank_list.json
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        bank_list_path = os.path.join(os.path.dirname(current_dir), "bank_list.json")
-        
-        with open(bank_list_path, 'r', encoding='utf-8') as f:
-            banks = json.load(f)
-        
-        # Tìm kiếm ngân hàng theo tên
-        bank_name = bank_name.upper()
-        for bank_code, bank_info in banks.items():
-            if (bank_name in bank_code.upper() or 
-                bank_name in bank_info['name'].upper() or 
-                bank_name in bank_info['short_name'].upper()):
-                return bank_info['bin']
-        
-        return None
+        return bank_resolver.get_bin(bank_name) or bank_resolver.find_containing(bank_name)
     except Exception as e:
         print(f"Lỗi khi lấy mã BIN ngân hàng: {e}")
         return None
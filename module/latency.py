@@ -0,0 +1,76 @@
+"""
+Histogram độ trễ đơn giản (bucket theo mili-giây, tăng dần theo cấp số nhân).
+Dùng để đo thời gian các bước trích xuất/tạo QR và tính percentile.
+"""
+
+import bisect
+import threading
+
+# Biên trên của các bucket (ms)
+DEFAULT_BUCKETS_MS = (
+    5, 10, 25, 50, 100, 250, 500, 750, 1000, 1500, 2000, 3000,
+    5000, 7500, 10000, 15000, 30000, 60000,
+)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        # Bucket cuối cùng cho các giá trị vượt biên lớn nhất
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Ghi nhận một lần đo (giây)"""
+        ms = seconds * 1000
+        index = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def reset(self) -> None:
+        """Xóa toàn bộ dữ liệu đã ghi nhận"""
+        with self._lock:
+            self.counts = [0] * (len(self.buckets_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Ước lượng percentile theo biên trên của bucket
+        Args:
+            p: Phần trăm (0-100)
+        Returns:
+            float: Giá trị (ms), 0 nếu chưa có dữ liệu
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = self.count * p / 100
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= target and n:
+                    if index < len(self.buckets_ms):
+                        return float(min(self.buckets_ms[index], self.max_ms))
+                    return self.max_ms
+            return self.max_ms
+
+    def snapshot(self) -> dict:
+        """Trả về thống kê hiện tại"""
+        labels = [f"<={b}ms" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
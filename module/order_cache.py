@@ -0,0 +1,197 @@
+"""
+Cache thông tin chi tiết order (dict nhãn/giá trị thô) theo order number.
+- TTL trong bộ nhớ, có thể kèm file JSON trên đĩa cạnh TransactionStorage
+- Single-flight: các yêu cầu đồng thời cho cùng một order dùng chung một lần scrape
+- Chỉ lưu kết quả đủ trường (is_complete): kết quả thiếu (prefetch lúc PENDING, trang
+  chưa render xong) không được dùng lại mà lần sau trích xuất lại
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """Một lần fetch đang chạy mà các luồng khác có thể chờ"""
+
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class OrderDetailCache:
+    def __init__(self, cache_path=None, ttl: float = 6 * 3600, max_size: int = 1000, is_complete=None):
+        """
+        Khởi tạo OrderDetailCache
+        Args:
+            cache_path: File JSON lưu cache (None = chỉ giữ trong bộ nhớ)
+            ttl: Thời gian sống của một mục (giây)
+            max_size: Số order tối đa trong cache
+            is_complete: Hàm nhận dict thông tin, True nếu đủ trường để lưu cache
+                (None = mọi dict không rỗng)
+        """
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl = ttl
+        self.max_size = max_size
+        self.is_complete = is_complete or bool
+        # order_number -> (thời điểm lưu, dict thông tin)
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, order_number: str):
+        """Lấy thông tin đã cache, None nếu không có hoặc đã hết hạn"""
+        with self._lock:
+            entry = self._entries.get(order_number)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl:
+                del self._entries[order_number]
+                return None
+            self._entries.move_to_end(order_number)
+            return dict(entry[1])
+
+    def put(self, order_number: str, info: dict) -> None:
+        """Lưu thông tin order vào cache (bỏ qua kết quả rỗng hoặc thiếu trường)"""
+        if not info:
+            return
+        if not self.is_complete(info):
+            logger.info(f"Không cache thông tin thiếu trường của order: {order_number}")
+            return
+        with self._lock:
+            self._entries[order_number] = (time.time(), dict(info))
+            self._entries.move_to_end(order_number)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        self._save()
+
+    def invalidate(self, order_number: str) -> None:
+        """Xóa một order khỏi cache"""
+        with self._lock:
+            removed = self._entries.pop(order_number, None)
+        if removed:
+            self._save()
+
+    def get_or_fetch(self, order_number: str, fetch) -> dict:
+        """
+        Lấy từ cache, nếu chưa có thì gọi fetch(order_number) đúng một lần
+        kể cả khi nhiều luồng cùng yêu cầu một order.
+        Lần trích xuất đang chạy (lô nhiều tab, prefetch) trả về rỗng hoặc thiếu trường
+        thì luồng chờ tự gọi fetch(order_number) một lần, chỉ kết quả đủ trường là cuối cùng
+        """
+        for _ in range(2):
+            cached = self.get(order_number)
+            if cached is not None:
+                self.hits += 1
+                logger.info(f"⚡ Cache hit thông tin order: {order_number}")
+                return cached
+
+            with self._lock:
+                flight = self._flights.get(order_number)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[order_number] = _Flight()
+
+            if not leader:
+                logger.info(f"⏳ Chờ lần trích xuất đang chạy cho order: {order_number}")
+                flight.event.wait()
+                if flight.result and self.is_complete(flight.result):
+                    return dict(flight.result)
+                logger.warning(f"⚠️ Lần trích xuất chung không có kết quả cho order {order_number}, trích xuất lại")
+                continue
+
+            self.misses += 1
+            try:
+                flight.result = fetch(order_number)
+                self.put(order_number, flight.result)
+                return flight.result
+            finally:
+                with self._lock:
+                    del self._flights[order_number]
+                flight.event.set()
+        return {}
+
+    def fetch_many(self, order_numbers, fetch_many, background: bool = False) -> list:
+        """
+        Giữ chỗ single-flight cho các order chưa có trong cache rồi gọi fetch_many
+        một lần cho cả lô; get_or_fetch cho các order này sẽ chờ kết quả của lô
+        Args:
+            order_numbers: Danh sách order
+            fetch_many: Hàm nhận list order, trả về dict order -> thông tin
+            background: Chạy fetch ở luồng nền (việc giữ chỗ vẫn làm ngay)
+        Returns:
+            list: Các order do lô này đảm nhận
+        """
+        claimed = {}
+        now = time.time()
+        with self._lock:
+            for order_number in dict.fromkeys(order_numbers):
+                entry = self._entries.get(order_number)
+                if order_number in self._flights or (entry and now - entry[0] <= self.ttl):
+                    continue
+                claimed[order_number] = self._flights[order_number] = _Flight()
+
+        if claimed:
+            if background:
+                threading.Thread(target=self._run_batch, args=(claimed, fetch_many), daemon=True).start()
+            else:
+                self._run_batch(claimed, fetch_many)
+        return list(claimed)
+
+    def _run_batch(self, claimed: dict, fetch_many) -> None:
+        self.misses += len(claimed)
+        results = {}
+        try:
+            results = fetch_many(list(claimed)) or {}
+        except Exception as e:
+            logger.error(f"Lỗi khi trích xuất lô order: {e}")
+        finally:
+            for order_number, flight in claimed.items():
+                flight.result = results.get(order_number) or {}
+                self.put(order_number, flight.result)
+                with self._lock:
+                    del self._flights[order_number]
+                flight.event.set()
+
+    def _load(self) -> None:
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for order_number, (saved_at, info) in sorted(data.items(), key=lambda item: item[1][0]):
+                if now - saved_at <= self.ttl and self.is_complete(info):
+                    self._entries[order_number] = (saved_at, info)
+        except Exception as e:
+            logger.error(f"Lỗi khi đọc cache thông tin order: {e}")
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = {k: [saved_at, info] for k, (saved_at, info) in self._entries.items()}
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        try:
+            with self._save_lock:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.error(f"Lỗi khi lưu cache thông tin order: {e}")
+
+    def metrics(self) -> dict:
+        """Trả về số lần hit/miss và kích thước cache"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
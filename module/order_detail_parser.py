@@ -0,0 +1,101 @@
+"""
+Parser trang chi tiết order (p2p.binance.com/en/fiatOrderDetail).
+- parse_order_detail: HTML -> dict, dùng lxml với XPath biên dịch sẵn, quét một lượt
+- parse_order_detail_json: JSON API order-detail (bắt qua CDP) -> dict cùng định dạng
+Đều là hàm thuần nên có thể benchmark/test với file đã lưu.
+"""
+
+import logging
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+
+def _has_classes(*names) -> str:
+    """Biểu thức XPath kiểm tra phần tử có đủ các class"""
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names
+    )
+
+
+_FIAT_XPATH = etree.XPath(f"(//div[{_has_classes('subtitle6', 'text-textBuy')}])[1]")
+_CONTAINER_XPATH = etree.XPath("(//div[@class='relative w-full'])[1]")
+_LABEL_CLASSES = _has_classes("body2", "text-tertiaryText")
+_VALUE_CLASSES = _has_classes("body2", "text-right", "break-words")
+# Nhãn và giá trị trả về theo đúng thứ tự trong tài liệu
+_FIELD_XPATH = etree.XPath(f".//div[({_LABEL_CLASSES}) or ({_VALUE_CLASSES})]")
+
+
+def parse_currency(vnd_str: str):
+    """Chuyển chuỗi tiền VND (vd: '16,301,820.00 ₫') thành float"""
+    try:
+        return float(vnd_str.replace("₫", "").replace(",", "").strip())
+    except Exception as e:
+        logger.error(f"[LỖI] parse_currency: {e}")
+        return None
+
+
+def parse_order_detail(page_html: str) -> dict:
+    """
+    Trích xuất thông tin từ HTML trang chi tiết order
+    Args:
+        page_html: HTML của trang (driver.page_source)
+    Returns:
+        dict: {"Fiat amount": float, <nhãn>: <giá trị>, ...}
+    """
+    result = {}
+    if not page_html:
+        return result
+    root = lxml_html.fromstring(page_html)
+
+    fiat_nodes = _FIAT_XPATH(root)
+    if fiat_nodes:
+        result["Fiat amount"] = parse_currency(fiat_nodes[0].text_content())
+
+    containers = _CONTAINER_XPATH(root)
+    if not containers:
+        return result
+
+    # Ghép mỗi nhãn với giá trị đầu tiên xuất hiện sau nó
+    label = None
+    for node in _FIELD_XPATH(containers[0]):
+        if "text-tertiaryText" in (node.get("class") or "").split():
+            label = node.text_content().strip()
+        elif label is not None:
+            result[label] = node.text_content().strip()
+            label = None
+    return result
+
+
+# Khóa cấp cao trong JSON order-detail -> nhãn tương ứng trên trang
+_JSON_TOP_LEVEL_LABELS = {
+    "totalPrice": "Fiat amount",
+}
+
+
+def parse_order_detail_json(payload: dict, order_no: str = None) -> dict:
+    """
+    Chuyển response JSON của API order-detail thành dict giống parse_order_detail
+    Args:
+        payload: Response đã json.loads ({"code": ..., "data": {...}})
+        order_no: Nếu có, response của order khác (vd: XHR muộn của trang trước) trả về dict rỗng
+    Returns:
+        dict: {"Fiat amount": float, <fieldName>: <fieldValue>, ...}
+    """
+    result = {}
+    data = (payload or {}).get("data") or {}
+    if order_no is not None and str(data.get("orderNumber")) != str(order_no):
+        return result
+    for key, label in _JSON_TOP_LEVEL_LABELS.items():
+        if data.get(key) is not None:
+            result[label] = parse_currency(str(data[key]))
+
+    pay_methods = data.get("payMethods") or []
+    # Ưu tiên phương thức thanh toán đã được chọn cho order
+    selected = [m for m in pay_methods if m.get("id") == data.get("selectedPayId")]
+    for method in selected or pay_methods[:1]:
+        for field in method.get("fields") or []:
+            name, value = field.get("fieldName"), field.get("fieldValue")
+            if name and value is not None:
+                result[name.strip()] = str(value).strip()
+    return result
@@ -0,0 +1,148 @@
+"""
+Prefetch thông tin chi tiết order BUY ngay khi order mới xuất hiện (trước khi TRADING).
+Kết quả nằm trong OrderDetailCache nên khi order chuyển TRADING, handle_buy_order
+lấy được thông tin người bán ngay hoặc chờ lần trích xuất đang chạy (single-flight).
+Số lần prefetch đồng thời bị giới hạn, hàm fetch nên dùng pool driver riêng
+(prefetch_order_info) để không chiếm phiên driver của việc chính.
+Kết quả thiếu trường (order còn PENDING, trang chưa render xong) bị bỏ, không vào cache.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class OrderPrefetcher:
+    def __init__(self, cache, fetch, max_concurrent: int = 1, max_pending: int = 100):
+        """
+        Khởi tạo OrderPrefetcher
+        Args:
+            cache: OrderDetailCache nhận kết quả
+            fetch: Hàm trích xuất nhận order_number, trả về dict thông tin
+            max_concurrent: Số lần prefetch chạy cùng lúc (0 = tắt prefetch)
+            max_pending: Số order chờ prefetch tối đa, order cũ nhất bị bỏ khi đầy
+        """
+        self.cache = cache
+        self.fetch = fetch
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+
+        self._pending = OrderedDict()
+        self._running = set()
+        self._cancelled = set()
+        self._cond = threading.Condition()
+        self._threads = []
+        # Tăng mỗi lần stop: luồng của lần start trước thoát khi thấy thế hệ đã đổi,
+        # kể cả khi start lại ngay sau đó, nên không chạy quá max_concurrent luồng
+        self._generation = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.incomplete = 0
+        self.cancelled = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Khởi động các luồng prefetch (gọi nhiều lần không sao)"""
+        with self._cond:
+            if self._threads or self.max_concurrent <= 0:
+                return
+            for i in range(self.max_concurrent):
+                thread = threading.Thread(
+                    target=self._worker, args=(self._generation,), name=f"order-prefetch-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"🔮 Đã khởi động {self.max_concurrent} luồng prefetch order")
+
+    def stop(self) -> None:
+        """Dừng prefetch, bỏ các order còn đang chờ"""
+        with self._cond:
+            self._generation += 1
+            self._threads = []
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def submit(self, order_number: str) -> bool:
+        """
+        Xếp order vào hàng đợi prefetch
+        Returns:
+            bool: False nếu prefetch đang tắt, order đã có trong cache hoặc đã được xếp
+        """
+        if self.max_concurrent <= 0 or self.cache.get(order_number) is not None:
+            return False
+        with self._cond:
+            if order_number in self._pending or order_number in self._running:
+                return False
+            self._pending[order_number] = True
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self.submitted += 1
+            self._cond.notify()
+        self.start()
+        return True
+
+    def discard(self, order_number: str) -> None:
+        """Bỏ order khỏi hàng đợi (vd: đã TRADING và được xử lý trực tiếp)"""
+        with self._cond:
+            self._pending.pop(order_number, None)
+
+    def cancel(self, order_number: str) -> None:
+        """Hủy prefetch của order đã bị hủy và xóa kết quả khỏi cache"""
+        with self._cond:
+            removed = self._pending.pop(order_number, None)
+            running = order_number in self._running
+            if running:
+                # Không ngắt được Selenium giữa chừng, xóa kết quả khi chạy xong
+                self._cancelled.add(order_number)
+        if removed or running:
+            self.cancelled += 1
+            logger.info(f"🚫 Hủy prefetch order: {order_number}")
+        if not running:
+            self.cache.invalidate(order_number)
+
+    def _worker(self, generation: int) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and self._generation == generation:
+                    self._cond.wait()
+                if self._generation != generation:
+                    break
+                order_number, _ = self._pending.popitem(last=False)
+                self._running.add(order_number)
+            try:
+                logger.info(f"🔮 Prefetch thông tin order: {order_number}")
+                info = self.cache.get_or_fetch(order_number, self.fetch)
+                complete = bool(info) and self.cache.is_complete(info)
+                with self._cond:
+                    if complete:
+                        self.completed += 1
+                    else:
+                        self.incomplete += 1
+                if not complete:
+                    # OrderDetailCache không lưu kết quả thiếu, order sẽ được trích xuất lại khi TRADING
+                    logger.info(f"🔮 Bỏ kết quả prefetch thiếu trường của order: {order_number}")
+            except Exception as e:
+                logger.error(f"💥 Lỗi khi prefetch order {order_number}: {e}")
+            finally:
+                with self._cond:
+                    self._running.discard(order_number)
+                    cancelled = order_number in self._cancelled
+                    self._cancelled.discard(order_number)
+                if cancelled:
+                    self.cache.invalidate(order_number)
+
+    def metrics(self) -> dict:
+        """Trả về các chỉ số prefetch"""
+        return {
+            "pending": len(self._pending),
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "incomplete": self.incomplete,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,170 @@
+"""
+Bảng trạng thái order có giới hạn kích thước, thay cho dict used_orders.
+- Order ở trạng thái kết thúc bị loại sau TTL, bảng bị chặn bởi max_size (LRU)
+- Định kỳ snapshot ra đĩa để khởi động lại chỉ cần đọc file thay vì quét API
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+from module.poll_watermark import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class OrderRecord:
+    """Bản ghi gọn cho một order"""
+
+    __slots__ = ("status", "updated_at")
+
+    def __init__(self, status: str, updated_at: float):
+        self.status = status
+        self.updated_at = updated_at
+
+
+class OrderStateTable:
+    def __init__(self, snapshot_path=None, max_size: int = 5000,
+                 terminal_ttl: float = 3 * 3600, snapshot_interval: float = 30):
+        """
+        Khởi tạo OrderStateTable
+        Args:
+            snapshot_path: File JSON lưu snapshot (None = chỉ giữ trong bộ nhớ)
+            max_size: Số order tối đa giữ trong bảng
+            terminal_ttl: Số giây giữ order sau khi vào trạng thái kết thúc;
+                nên lớn hơn cửa sổ poll để order không bị coi là mới
+            snapshot_interval: Khoảng thời gian tối thiểu giữa hai lần snapshot
+        """
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.max_size = max_size
+        self.terminal_ttl = terminal_ttl
+        self.snapshot_interval = snapshot_interval
+
+        # order_number -> OrderRecord, theo thứ tự dùng gần nhất (LRU)
+        self._records = OrderedDict()
+        # order_number -> thời điểm vào trạng thái kết thúc, theo thứ tự thời gian
+        self._terminal = OrderedDict()
+        self._dirty = False
+        self._last_snapshot = time.time()
+
+    def get(self, order_number, default=None):
+        record = self._records.get(order_number)
+        return record.status if record else default
+
+    def __getitem__(self, order_number):
+        return self._records[order_number].status
+
+    def __setitem__(self, order_number, status):
+        now = time.time()
+        status = sys.intern(status)
+        record = self._records.get(order_number)
+        if record:
+            record.status = status
+            record.updated_at = now
+            self._records.move_to_end(order_number)
+        else:
+            self._records[order_number] = OrderRecord(status, now)
+
+        self._terminal.pop(order_number, None)
+        if status in TERMINAL_STATUSES:
+            self._terminal[order_number] = now
+
+        self._dirty = True
+        self.evict(now)
+
+    def __contains__(self, order_number):
+        return order_number in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def evict(self, now: float = None) -> int:
+        """Loại order kết thúc đã quá TTL và order cũ nhất khi vượt max_size"""
+        now = now or time.time()
+        removed = 0
+        while self._terminal:
+            order_number, terminal_at = next(iter(self._terminal.items()))
+            if now - terminal_at < self.terminal_ttl:
+                break
+            self._terminal.popitem(last=False)
+            del self._records[order_number]
+            removed += 1
+
+        while len(self._records) > self.max_size:
+            # Ưu tiên bỏ order đã kết thúc, sau đó mới tới order dùng lâu nhất
+            if self._terminal:
+                order_number, _ = self._terminal.popitem(last=False)
+                del self._records[order_number]
+            else:
+                order_number, _ = self._records.popitem(last=False)
+            removed += 1
+
+        if removed:
+            self._dirty = True
+        return removed
+
+    def load(self, max_age: float = None) -> bool:
+        """
+        Nạp snapshot từ đĩa
+        Args:
+            max_age: Bỏ qua snapshot cũ hơn số giây này
+        Returns:
+            bool: True nếu đã nạp được snapshot còn hiệu lực
+        """
+        if not self.snapshot_path or not self.snapshot_path.exists():
+            return False
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Lỗi khi đọc snapshot trạng thái order: {e}")
+            return False
+
+        saved_at = data.get("saved_at", 0)
+        if max_age is not None and time.time() - saved_at > max_age:
+            logger.info("Snapshot trạng thái order đã cũ, bỏ qua")
+            return False
+
+        self._records.clear()
+        self._terminal.clear()
+        rows = sorted(data.get("orders", {}).items(), key=lambda item: item[1][1])
+        for order_number, (status, updated_at) in rows:
+            status = sys.intern(status)
+            self._records[order_number] = OrderRecord(status, updated_at)
+            if status in TERMINAL_STATUSES:
+                self._terminal[order_number] = updated_at
+        self.evict()
+        self._dirty = False
+        logger.info(f"Đã nạp {len(self._records)} order từ {self.snapshot_path}")
+        return True
+
+    def snapshot(self) -> None:
+        """Ghi snapshot ra đĩa (ghi file tạm rồi thay thế để tránh hỏng file)"""
+        if not self.snapshot_path:
+            return
+        data = {
+            "saved_at": time.time(),
+            "orders": {
+                order_number: [record.status, record.updated_at]
+                for order_number, record in self._records.items()
+            },
+        }
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+            self._dirty = False
+            self._last_snapshot = data["saved_at"]
+        except Exception as e:
+            logger.error(f"Lỗi khi lưu snapshot trạng thái order: {e}")
+
+    def maybe_snapshot(self) -> None:
+        """Loại order hết hạn, snapshot nếu có thay đổi và đã tới chu kỳ"""
+        self.evict()
+        if self._dirty and time.time() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
@@ -0,0 +1,134 @@
+"""
+Pool luồng xử lý order TRADING tách khỏi vòng lặp poll.
+Poller chỉ đẩy order vào hàng đợi, các worker chạy Selenium/VietQR ở phía sau,
+nên một lần trích xuất chậm không làm chậm việc phát hiện order khác.
+"""
+
+import queue
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class OrderWorkerPool:
+    def __init__(self, handler, max_workers: int = 2, queue_size: int = 0,
+                 dedupe_size: int = 1000):
+        """
+        Khởi tạo OrderWorkerPool
+        Args:
+            handler: Hàm xử lý nhận (order_number, *args)
+            max_workers: Số luồng worker chạy song song
+            queue_size: Kích thước tối đa hàng đợi (0 = không giới hạn)
+            dedupe_size: Số order_number gần nhất được nhớ để chống xử lý trùng
+        """
+        self.handler = handler
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.dedupe_size = dedupe_size
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        # Mỗi lần start là một thế hệ worker với sự kiện dừng riêng; sự kiện cũng là
+        # sentinel đưa vào hàng đợi, nên worker thế hệ mới không dừng nhầm vì sentinel cũ
+        self._stop_event = None
+        self._lock = threading.Lock()
+        # Order đã nhận (đang chờ, đang chạy hoặc đã xong), giữ theo thứ tự để giới hạn
+        self._seen = OrderedDict()
+        self._in_flight = 0
+
+        self.processed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Khởi động các luồng worker (gọi nhiều lần không sao)"""
+        with self._lock:
+            if self._threads:
+                return
+            stop_event = self._stop_event = threading.Event()
+            for i in range(self.max_workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(stop_event,), name=f"order-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"👷 Đã khởi động {self.max_workers} worker xử lý order")
+
+    def stop(self, wait: bool = False) -> None:
+        """Dừng các worker sau khi chúng làm xong việc đang dở"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            stop_event, self._stop_event = self._stop_event, None
+        if stop_event is None:
+            return
+        stop_event.set()
+        for _ in threads:
+            self._queue.put(stop_event)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def submit(self, order_number, *args) -> bool:
+        """
+        Đưa order vào hàng đợi xử lý, không chặn poller
+        Returns:
+            bool: False nếu order đã được nhận trước đó hoặc hàng đợi đầy
+        """
+        with self._lock:
+            if order_number in self._seen:
+                self.duplicates += 1
+                logger.info(f"⏭️ Bỏ qua order trùng: {order_number}")
+                return False
+            self._seen[order_number] = True
+            while len(self._seen) > self.dedupe_size:
+                self._seen.popitem(last=False)
+
+        try:
+            self._queue.put_nowait((order_number, args))
+        except queue.Full:
+            with self._lock:
+                self._seen.pop(order_number, None)
+                self.dropped += 1
+            logger.error(f"❌ Hàng đợi xử lý đầy, bỏ order: {order_number}")
+            return False
+
+        self.start()
+        return True
+
+    def _worker(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                # Sentinel của thế hệ khác thì bỏ qua; worker của thế hệ đó tự dừng qua sự kiện
+                if item is stop_event:
+                    break
+                continue
+            order_number, args = item
+            with self._lock:
+                self._in_flight += 1
+            try:
+                self.handler(order_number, *args)
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                logger.error(f"💥 Worker lỗi khi xử lý order {order_number}: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+    def metrics(self) -> dict:
+        """Trả về các chỉ số của pool"""
+        return {
+            "workers": len(self._threads),
+            "queued": self._queue.qsize(),
+            "in_flight": self._in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+        }
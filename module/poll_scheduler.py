@@ -0,0 +1,164 @@
+"""
+Bộ lập lịch poll thích ứng cho vòng lặp transactions_trading.
+- Rút ngắn chu kỳ khi có order đang hoạt động (TRADING/PENDING/BUYER_PAYED)
+- Giãn chu kỳ theo hàm mũ khi không có gì thay đổi
+- Theo dõi request weight Binance trả về trong header để không bị 429/418
+"""
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Các trạng thái cần phát hiện nhanh
+ACTIVE_STATUSES = frozenset({"TRADING", "PENDING", "BUYER_PAYED"})
+
+# Header weight Binance trả về (sapi trước, api sau)
+WEIGHT_HEADERS = (
+    "x-sapi-used-ip-weight-1m",
+    "x-sapi-used-uid-weight-1m",
+    "x-mbx-used-weight-1m",
+)
+
+
+class PollScheduler:
+    def __init__(self, active_interval: float = 0.5, idle_interval: float = 1.0,
+                 max_interval: float = 15.0, backoff_factor: float = 2.0,
+                 weight_limit: int = 12000, weight_budget: float = 0.8,
+                 requests_per_tick: int = 2):
+        """
+        Khởi tạo PollScheduler
+        Args:
+            active_interval: Chu kỳ (giây) khi có order đang hoạt động
+            idle_interval: Chu kỳ (giây) khởi đầu khi rảnh
+            max_interval: Chu kỳ tối đa khi backoff
+            backoff_factor: Hệ số nhân backoff mỗi tick rảnh
+            weight_limit: Giới hạn weight mỗi phút của Binance
+            weight_budget: Tỉ lệ weight tối đa được dùng trước khi giãn chu kỳ
+            requests_per_tick: Số request mỗi tick (BUY + SELL)
+        """
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.weight_limit = weight_limit
+        self.weight_budget = weight_budget
+        self.requests_per_tick = requests_per_tick
+
+        self.active = False
+        self.idle_streak = 0
+        self.used_weight = 0
+        self.banned_until = 0.0
+        self.current_interval = idle_interval
+
+        # Bộ đếm cho metrics
+        self.ticks = 0
+        self.requests = 0
+        self.throttled = 0
+        self.bans = 0
+        self.detections = 0
+        self.detection_lag_total = 0.0
+        self.detection_lag_max = 0.0
+
+    def record_response(self, response) -> None:
+        """Đọc weight đã dùng từ header của response python-binance"""
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return
+        self.requests += 1
+        for name in WEIGHT_HEADERS:
+            value = headers.get(name)
+            if value is not None:
+                try:
+                    self.used_weight = int(value)
+                except ValueError:
+                    pass
+                break
+
+    def record_error(self, error: Exception) -> None:
+        """Ghi nhận lỗi API; tôn trọng Retry-After khi bị 429/418"""
+        status_code = getattr(error, "status_code", None)
+        if status_code not in (418, 429):
+            return
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            retry_after = float(headers.get("Retry-After", 60))
+        except ValueError:
+            retry_after = 60.0
+        self.bans += 1
+        self.banned_until = max(self.banned_until, time.time() + retry_after)
+        logger.warning(f"⛔ Binance trả về {status_code}, tạm dừng poll {retry_after:.0f}s")
+
+    def record_detection(self, create_time_ms: int) -> None:
+        """Ghi nhận độ trễ từ lúc tạo order đến lúc phát hiện"""
+        lag = max(0.0, time.time() - create_time_ms / 1000)
+        self.detections += 1
+        self.detection_lag_total += lag
+        self.detection_lag_max = max(self.detection_lag_max, lag)
+
+    def update(self, active: bool, changed: bool) -> float:
+        """
+        Cập nhật trạng thái sau một tick và tính chu kỳ tiếp theo
+        Args:
+            active: Có order nào ở trạng thái ACTIVE_STATUSES không
+            changed: Tick vừa rồi có order nào đổi trạng thái không
+        Returns:
+            float: Số giây chờ trước tick tiếp theo
+        """
+        self.ticks += 1
+        self.active = active
+        if active or changed:
+            self.idle_streak = 0
+        else:
+            self.idle_streak += 1
+
+        if active:
+            interval = self.active_interval
+        else:
+            interval = min(
+                self.idle_interval * self.backoff_factor ** max(self.idle_streak - 1, 0),
+                self.max_interval,
+            )
+
+        interval = max(interval, self._weight_interval())
+
+        now = time.time()
+        if self.banned_until > now:
+            interval = max(interval, self.banned_until - now)
+
+        self.current_interval = interval
+        return interval
+
+    def _weight_interval(self) -> float:
+        """Chu kỳ tối thiểu để phần weight còn lại đủ dùng tới hết phút hiện tại"""
+        budget = self.weight_limit * self.weight_budget
+        if self.used_weight < budget:
+            return 0.0
+        self.throttled += 1
+        seconds_left = 60 - time.time() % 60
+        remaining = self.weight_limit - self.used_weight
+        if remaining <= self.requests_per_tick:
+            # Hết weight: chờ sang phút mới
+            return seconds_left
+        return seconds_left / (remaining / self.requests_per_tick)
+
+    def metrics(self) -> dict:
+        """Trả về các chỉ số để tinh chỉnh thời gian phát hiện và chi phí API"""
+        return {
+            "active": self.active,
+            "current_interval": self.current_interval,
+            "idle_streak": self.idle_streak,
+            "ticks": self.ticks,
+            "requests": self.requests,
+            "used_weight_1m": self.used_weight,
+            "weight_limit_1m": self.weight_limit,
+            "throttled": self.throttled,
+            "bans": self.bans,
+            "banned_until": self.banned_until,
+            "detections": self.detections,
+            "detection_lag_avg": (
+                self.detection_lag_total / self.detections if self.detections else 0.0
+            ),
+            "detection_lag_max": self.detection_lag_max,
+        }
@@ -0,0 +1,61 @@
+"""
+Watermark cho việc poll lịch sử giao dịch C2C theo từng phía (BUY/SELL).
+Thay vì tải lại toàn bộ cửa sổ 2 giờ mỗi tick, chỉ hỏi các order mới kể từ
+createTime cuối cùng đã thấy, cộng với các order chưa kết thúc còn đang mở.
+"""
+
+# Các trạng thái kết thúc: order sẽ không thay đổi nữa
+TERMINAL_STATUSES = frozenset({"COMPLETED", "CANCELLED", "CANCELLED_BY_SYSTEM"})
+
+# Cửa sổ tối đa nhìn lại (giống hành vi cũ: ~2 giờ)
+DEFAULT_MAX_LOOKBACK_MS = 7200000
+# Khoảng chồng lấn để không bỏ sót order xuất hiện trễ trên API
+DEFAULT_OVERLAP_MS = 60000
+
+
+class SideWatermark:
+    """Theo dõi watermark và các order đang mở cho một phía giao dịch"""
+
+    __slots__ = ("trade_type", "last_create_time", "open_orders", "overlap_ms", "max_lookback_ms")
+
+    def __init__(self, trade_type: str, overlap_ms: int = DEFAULT_OVERLAP_MS,
+                 max_lookback_ms: int = DEFAULT_MAX_LOOKBACK_MS):
+        self.trade_type = trade_type
+        self.last_create_time = None
+        # order_number -> createTime của các order chưa ở trạng thái kết thúc
+        self.open_orders = {}
+        self.overlap_ms = overlap_ms
+        self.max_lookback_ms = max_lookback_ms
+
+    def window(self, now_ms: int) -> tuple:
+        """
+        Tính cửa sổ (startTimestamp, endTimestamp) cho lần poll tiếp theo
+        Args:
+            now_ms: Thời điểm hiện tại (ms)
+        Returns:
+            tuple: (start_ms, end_ms)
+        """
+        floor = now_ms - self.max_lookback_ms
+
+        # Bỏ các order mở đã quá cũ để cửa sổ luôn bị chặn
+        if self.open_orders:
+            stale = [k for k, t in self.open_orders.items() if t < floor]
+            for k in stale:
+                del self.open_orders[k]
+
+        if self.last_create_time is None:
+            start = floor
+        else:
+            start = self.last_create_time - self.overlap_ms
+        if self.open_orders:
+            start = min(start, min(self.open_orders.values()))
+        return max(start, floor), now_ms
+
+    def observe(self, order_number: str, status: str, create_time: int) -> None:
+        """Cập nhật watermark từ một order vừa nhận được"""
+        if self.last_create_time is None or create_time > self.last_create_time:
+            self.last_create_time = create_time
+        if status in TERMINAL_STATUSES:
+            self.open_orders.pop(order_number, None)
+        else:
+            self.open_orders[order_number] = create_time
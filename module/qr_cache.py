@@ -0,0 +1,166 @@
+"""
+Cache ảnh QR VietQR theo nội dung yêu cầu (tài khoản, BIN, số tiền, nội dung, template).
+- LRU trong bộ nhớ đứng trước kho file PNG trên đĩa
+- Kho trên đĩa giới hạn theo tổng dung lượng, file ít dùng nhất bị xóa trước;
+  tổng dung lượng được cộng dồn khi ghi, chỉ quét thư mục lúc mở và khi vượt giới hạn
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Khi vượt giới hạn, xóa tới còn tỷ lệ này của giới hạn để không phải quét lại ở mỗi lần ghi
+EVICT_TARGET_RATIO = 0.9
+
+
+def qr_cache_key(**params) -> str:
+    """Băm các tham số tạo QR (đã chuẩn hóa) thành khóa cache"""
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        normalized[name] = "" if value is None else str(value).strip()
+    raw = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QRCache:
+    def __init__(self, cache_dir=None, memory_size: int = 128, max_disk_bytes: int = 50 * 1024 * 1024):
+        """
+        Khởi tạo QRCache
+        Args:
+            cache_dir: Thư mục lưu ảnh PNG (None = chỉ giữ trong bộ nhớ)
+            memory_size: Số ảnh tối đa giữ trong bộ nhớ
+            max_disk_bytes: Tổng dung lượng tối đa của thư mục cache
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        # Tổng dung lượng file PNG trong cache_dir, tính khi ghi lần đầu
+        self._disk_bytes = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Lấy ảnh QR (bytes) theo khóa, None nếu chưa có"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # Đánh dấu vừa dùng để eviction theo mtime
+            except OSError:
+                data = None
+            if data:
+                self.disk_hits += 1
+                self._remember(key, data)
+                return data
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Lưu ảnh QR vào bộ nhớ và đĩa"""
+        if not data:
+            return
+        self._remember(key, data)
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with self._disk_lock:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                if self._disk_bytes is None:
+                    self._disk_bytes = self._scan_disk()[1]
+                try:
+                    replaced = path.stat().st_size
+                except OSError:
+                    replaced = 0
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(data) - replaced
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+        except Exception as e:
+            logger.error(f"Lỗi khi lưu cache QR: {e}")
+
+    def _scan_disk(self) -> tuple:
+        """Quét cache_dir, trả về ([(mtime, size, path)], tổng dung lượng)"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def _evict_disk(self) -> None:
+        """Xóa các file dùng lâu nhất tới khi tổng dung lượng dưới mức đích (gọi khi giữ _disk_lock)"""
+        entries, total = self._scan_disk()
+        self._disk_bytes = total
+        if total <= self.max_disk_bytes:
+            return
+        target = self.max_disk_bytes * EVICT_TARGET_RATIO
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            with self._lock:
+                self._memory.pop(path.stem, None)
+            self.evictions += 1
+            total -= size
+            if total <= target:
+                break
+        self._disk_bytes = total
+
+    def get_or_create(self, key: str, create) -> bytes:
+        """Lấy ảnh từ cache, nếu chưa có thì gọi create() (trả về bytes) và lưu lại"""
+        data = self.get(key)
+        if data is None:
+            data = create()
+            self.put(key, data)
+        return data
+
+    def metrics(self) -> dict:
+        """Trả về số lần hit/miss, kích thước cache trong bộ nhớ và dung lượng trên đĩa"""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_size": len(self._memory),
+            "disk_bytes": self._disk_bytes or 0,
+        }
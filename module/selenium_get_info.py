@@ -9,17 +9,29 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException, WebDriverException, JavascriptException
 import os
 import time
 import re
 import subprocess
 import sys
 import logging
+import json
+import shutil
+import tempfile
+import functools
+import urllib.request
 from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from config_env import CHROME_DRIVE, CHROME_PATH
+from config_env import (
+    CHROME_DRIVE, CHROME_PATH, DRIVER_POOL_SIZE, EXTRACT_MODE, EXTRACT_PROFILE, EXTRACT_MAX_TABS,
+    FIELD_LOCALES, PREFETCH_WORKERS,
+)
 from webdriver_manager.chrome import ChromeDriverManager
+from module.driver_pool import DriverPool
+from module.field_mapper import FieldMapper
+from module.latency import LatencyHistogram
+from module.order_detail_parser import parse_order_detail, parse_order_detail_json
 
 # Thiết lập logging
 logging.basicConfig(level=logging.INFO)
@@ -28,24 +40,94 @@ logger = logging.getLogger(__name__)
 # Sử dụng Path để xử lý đường dẫn an toàn hơn
 BASE_DIR = Path(__file__).parent.parent
 PROFILE_PATH = BASE_DIR / "Default"
+# Thư mục chứa các bản sao profile đã đăng nhập cho chế độ headless
+HEADLESS_PROFILE_ROOT = BASE_DIR / "HeadlessProfiles"
+
+# Các thư mục/file không cần sao chép khi clone profile (cache, khóa tiến trình)
+PROFILE_CLONE_IGNORE = shutil.ignore_patterns(
+    "Cache", "Code Cache", "GPUCache", "DawnCache", "GrShaderCache", "ShaderCache",
+    "CacheStorage", "ScriptCache", "Crashpad", "BrowserMetrics*", "Singleton*", "*.lock", "LOCK",
+)
+
+# File giữ phiên đăng nhập: thiếu các file này thì bản sao profile bị đăng xuất
+PROFILE_LOGIN_FILES = ("Cookies", "Login Data", "Local State", "Web Data", "Preferences")
+
+# Tài nguyên nặng bị chặn ở profile headless qua CDP Network.setBlockedURLs
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*sensorsdata*", "*hotjar*", "*facebook.net*", "*bnbstatic.com/image*",
+]
+
+ORDER_DETAIL_URL = "https://p2p.binance.com/en/fiatOrderDetail?orderNo={}"
+
+# Selector của trang chi tiết order
+FIAT_SELECTOR = "div.subtitle6.text-textBuy"
+LABEL_SELECTOR = "div.body2.text-tertiaryText"
+VALUE_SELECTOR = "div.body2.text-right.break-words"
+
+# Các nhãn bắt buộc (regex, chữ thường) để trang được coi là sẵn sàng
+REQUIRED_LABEL_PATTERNS = [
+    r"^name$|full name",
+    r"bank card|account number",
+    r"bank name",
+    r"reference message",
+]
+# Nếu thiếu nhãn bắt buộc, coi là sẵn sàng khi DOM không đổi trong khoảng này (ms)
+DOM_SETTLE_MS = 800
+# Thời gian tối đa driver.get chờ trang của driver trong pool (giây)
+PAGE_LOAD_TIMEOUT = 30
+# Ở chế độ nhiều tab, lệnh gửi tới tab đang điều hướng chỉ chờ tối đa chừng này (giây)
+# để một tab treo không chặn các tab khác
+TAB_COMMAND_TIMEOUT = 2
+
+# Script kiểm tra trang chi tiết order đã sẵn sàng.
+# Gắn MutationObserver một lần để biết lần thay đổi DOM gần nhất.
+_READY_SCRIPT = """
+const [fiatSel, labelSel, valueSel, patterns, settleMs] = arguments;
+if (!window.__p2pObserver) {
+    window.__p2pLastMutation = performance.now();
+    window.__p2pObserver = new MutationObserver(() => { window.__p2pLastMutation = performance.now(); });
+    window.__p2pObserver.observe(document, {childList: true, subtree: true, characterData: true});
+}
+const fiat = document.querySelector(fiatSel);
+if (!fiat || !fiat.textContent.trim()) return false;
+const labels = Array.from(document.querySelectorAll(labelSel)).map(e => e.textContent.trim().toLowerCase());
+const values = document.querySelectorAll(valueSel);
+const complete = values.length >= labels.length &&
+    patterns.every(p => labels.some(l => new RegExp(p).test(l)));
+if (complete) return true;
+return performance.now() - window.__p2pLastMutation > settleMs;
+"""
+
+# Đường dẫn API mà trang chi tiết order gọi để lấy dữ liệu
+ORDER_DETAIL_API = "/bapi/c2c/v2/private/c2c/order-match/order-detail"
+
+# Histogram độ trễ của từng bước trích xuất
+EXTRACTION_LATENCY = {
+    "navigate": LatencyHistogram(),
+    "ready": LatencyHistogram(),
+    "total": LatencyHistogram(),
+}
+
+def get_extraction_latency() -> dict:
+    """Lấy thống kê độ trễ trích xuất theo từng bước"""
+    return {phase: hist.snapshot() for phase, hist in EXTRACTION_LATENCY.items()}
+
+def order_detail_ready(driver) -> bool:
+    """Điều kiện cho WebDriverWait: fiat amount và đủ các nhãn bắt buộc đã hiển thị"""
+    return driver.execute_script(
+        _READY_SCRIPT, FIAT_SELECTOR, LABEL_SELECTOR, VALUE_SELECTOR,
+        REQUIRED_LABEL_PATTERNS, DOM_SETTLE_MS,
+    )
+
+# Map nhãn trên trang (en/vi, ...) sang tên trường chuẩn
+field_mapper = FieldMapper(locales=FIELD_LOCALES)
 
 def extract_info_by_key(data):
     """Trích xuất thông tin từ dữ liệu giao dịch"""
-    result = {}
-    for key, value in data.items():
-        key_lower = key.lower()
-        # Map các trường dữ liệu
-        if re.search(r'fiat amount', key_lower):
-            result['Fiat amount'] = value
-        elif re.search(r'reference message', key_lower):
-            result['Reference message'] = value
-        elif re.search(r'^name$|full name', key_lower):
-            result['Full Name'] = value
-        elif re.search(r'bank card|account number', key_lower):
-            result['Bank Card'] = value
-        elif re.search(r'bank name', key_lower):
-            result['Bank Name'] = value
-    return result
+    return field_mapper.map(data)
 
 def create_options(headless: bool = False, port: int = 9222) -> Options:
     """Tạo Chrome options với các cài đặt an toàn"""
@@ -64,6 +146,10 @@ def create_options(headless: bool = False, port: int = 9222) -> Options:
     
     # Cài đặt debug port
     chrome_options.debugger_address = f"127.0.0.1:{port}"
+    # driver.get trả về ngay khi DOM sẵn sàng, phần còn lại do order_detail_ready chờ
+    chrome_options.page_load_strategy = 'eager'
+    # Bật performance log để bắt sự kiện Network của CDP
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
     
     # Cài đặt headless nếu cần
     if headless:
@@ -73,98 +159,370 @@ def create_options(headless: bool = False, port: int = 9222) -> Options:
     
     return chrome_options
 
+@functools.lru_cache(maxsize=1)
+def get_driver_path() -> str:
+    """Cài/tìm chromedriver một lần cho cả phiên làm việc"""
+    return ChromeDriverManager().install()
+
 def create_driver(headless: bool = True) -> webdriver.Chrome:
     """Tạo Chrome driver với các cài đặt an toàn"""
     try:
         return webdriver.Chrome(
             options=create_options(headless=headless),
-            service=Service(ChromeDriverManager().install())
+            service=Service(get_driver_path())
         )
     except Exception as e:
         logger.error(f"Lỗi khi tạo driver: {e}")
         raise
 
-def extract_order_info(order_no: str) -> dict:
-    def parse_currency(vnd_str):
-        try:
-            return float(vnd_str.replace("₫", "").replace(",", "").strip())
-        except Exception as e:
-            logger.error(f"[LỖI] parse_currency: {e}")
-            return None
+def _safe_copy(src, dst):
+    """Sao chép file, bỏ qua (có ghi log) file đang bị Chrome khóa"""
+    try:
+        shutil.copy2(src, dst)
+    except OSError as e:
+        if Path(src).name in PROFILE_LOGIN_FILES:
+            logger.warning(f"⚠️ Không sao chép được {src} sang profile headless, "
+                           f"profile có thể bị đăng xuất: {e}")
+        else:
+            logger.debug(f"Bỏ qua file profile đang bị khóa {src}: {e}")
 
-    driver = None
+def clone_profile(source: Path = PROFILE_PATH) -> Path:
+    """
+    Sao chép profile đã đăng nhập sang thư mục riêng để Chrome headless dùng
+    (hai tiến trình Chrome không thể dùng chung một user-data-dir)
+    Returns:
+        Path: Thư mục profile mới
+    """
+    HEADLESS_PROFILE_ROOT.mkdir(parents=True, exist_ok=True)
+    target = Path(tempfile.mkdtemp(prefix="profile_", dir=HEADLESS_PROFILE_ROOT))
+    shutil.copytree(source, target, ignore=PROFILE_CLONE_IGNORE,
+                    copy_function=_safe_copy, dirs_exist_ok=True)
+    return target
+
+def create_headless_options(profile_dir: Path) -> Options:
+    """Tạo Chrome options cho profile trích xuất headless, tắt phần render không cần"""
+    chrome_options = Options()
+    chrome_options.add_argument(f'user-data-dir={str(profile_dir)}')
+    chrome_options.add_argument('--headless=new')
+    chrome_options.add_argument('--window-size=1280,800')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_argument('--disable-notifications')
+    chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+    chrome_options.add_argument('--disable-remote-fonts')
+    chrome_options.add_argument('--disable-background-networking')
+    chrome_options.add_argument('--disable-component-update')
+    chrome_options.add_argument('--disable-sync')
+    chrome_options.add_argument('--mute-audio')
+    chrome_options.add_argument('--no-first-run')
+    chrome_options.add_argument('--disable-features=Translate,MediaRouter,OptimizationHints')
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+def create_headless_driver() -> webdriver.Chrome:
+    """Khởi chạy một Chrome headless riêng trên bản sao profile đã đăng nhập"""
+    profile_dir = clone_profile()
+    try:
+        driver = webdriver.Chrome(
+            options=create_headless_options(profile_dir),
+            service=Service(get_driver_path())
+        )
+        # DriverPool xóa bản sao profile khi bỏ phiên này
+        driver.profile_dir = profile_dir
+        return driver
+    except Exception as e:
+        logger.error(f"Lỗi khi tạo driver headless: {e}")
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+
+def block_heavy_resources(driver) -> None:
+    """Chặn ảnh, font, video và analytics cho tab hiện tại"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+# Pool driver theo profile trích xuất, dùng lại giữa các order:
+# - visible: gắn vào Chrome remote-debugging đang mở (như trước)
+# - headless: Chrome headless riêng, chặn tài nguyên nặng
+_driver_pools = {
+    "visible": DriverPool(lambda: create_driver(False), size=DRIVER_POOL_SIZE,
+                          page_load_timeout=PAGE_LOAD_TIMEOUT),
+    "headless": DriverPool(create_headless_driver, size=DRIVER_POOL_SIZE,
+                           setup=block_heavy_resources, page_load_timeout=PAGE_LOAD_TIMEOUT),
+}
+# Pool riêng, nhỏ cho prefetch: prefetch không bao giờ giữ phiên của luồng xử lý
+# order TRADING hay lô nhiều tab, nên order đã thanh toán không phải chờ
+_prefetch_pools = {
+    "visible": DriverPool(lambda: create_driver(False), size=PREFETCH_WORKERS,
+                          page_load_timeout=PAGE_LOAD_TIMEOUT),
+    "headless": DriverPool(create_headless_driver, size=PREFETCH_WORKERS,
+                           setup=block_heavy_resources, page_load_timeout=PAGE_LOAD_TIMEOUT),
+}
+
+def close_driver_pool() -> None:
+    """Đóng các driver trong pool (gọi khi thoát ứng dụng)"""
+    for pool in list(_driver_pools.values()) + list(_prefetch_pools.values()):
+        pool.close_all()
+    shutil.rmtree(HEADLESS_PROFILE_ROOT, ignore_errors=True)
+
+def has_required_fields(info: dict) -> bool:
+    """Kiểm tra dict đã có đủ các nhãn bắt buộc chưa"""
+    labels = [label.lower() for label in info]
+    return all(any(re.search(p, label) for label in labels) for p in REQUIRED_LABEL_PATTERNS)
+
+def _drain_order_detail_response(driver, state: dict):
+    """
+    Đọc performance log, trả về JSON order-detail của một response đã tải xong
+    Chỉ xét request gửi sau khi bắt đầu điều hướng (log đã được đọc bỏ trước đó),
+    mỗi response chỉ trả về một lần
+    Args:
+        state: Lưu requestId của các request order-detail giữa các lần gọi
+    """
+    requests = state.setdefault("requests", set())
+    finished = state.setdefault("finished", [])
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.requestWillBeSent" and ORDER_DETAIL_API in params["request"]["url"]:
+            requests.add(params["requestId"])
+        elif method == "Network.loadingFinished" and params.get("requestId") in requests:
+            finished.append(params["requestId"])
+    if finished:
+        body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": finished.pop(0)})
+        return json.loads(body["body"])
+    return None
+
+def _wait_for_order_detail(driver, order_no: str, mode: str, timeout: float = 30) -> dict:
+    """
+    Chờ dữ liệu order: bắt JSON qua CDP (mode 'cdp') hoặc chờ DOM render xong.
+    Ở mode 'cdp' hai cách chạy song song, cách nào xong trước thì dùng cách đó.
+    Response JSON của order khác (tab dùng lại từ pool) bị bỏ qua.
+    """
+    if mode != "cdp":
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(order_detail_ready)
+        return parse_order_detail(driver.page_source)
+
+    state = {}
+    use_cdp = True
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if use_cdp:
+            try:
+                payload = _drain_order_detail_response(driver, state)
+            except Exception as e:
+                logger.warning(f"⚠️ Không đọc được response order-detail qua CDP: {e}")
+                payload, use_cdp = None, False
+            if payload:
+                info = parse_order_detail_json(payload, order_no)
+                if has_required_fields(info):
+                    logger.info("⚡ Lấy dữ liệu order trực tiếp từ response JSON")
+                    return info
+                if info:
+                    logger.info("JSON order-detail thiếu trường, chuyển sang đọc DOM")
+                    use_cdp = False
+                else:
+                    logger.warning(f"⚠️ Bỏ qua response order-detail không thuộc order {order_no}")
+        if order_detail_ready(driver):
+            return parse_order_detail(driver.page_source)
+        time.sleep(0.1)
+    raise TimeoutException(f"Trang chi tiết order không sẵn sàng sau {timeout}s")
+
+def extract_order_info(order_no: str, mode: str = EXTRACT_MODE,
+                       profile: str = EXTRACT_PROFILE, prefetch: bool = False) -> dict:
+    """
+    Trích xuất thông tin người bán của một order
+    Args:
+        order_no: Mã order
+        mode: 'cdp' (bắt JSON từ DevTools, DOM làm dự phòng) hoặc 'dom'
+        profile: 'visible' (Chrome remote-debugging) hoặc 'headless'
+        prefetch: Dùng pool driver riêng của prefetch (PREFETCH_WORKERS phiên)
+    """
     bank_info = {}
-    label,value = None, None
+    started = time.perf_counter()
     try:
         logger.info(f"🚀 Bắt đầu trích xuất thông tin cho order: {order_no}")
-        driver = create_driver(False)
-        driver.execute_script("window.open('');")
-        tabs = driver.window_handles
-        driver.switch_to.window(tabs[-1])
-        
-        url = f"https://p2p.binance.com/en/fiatOrderDetail?orderNo={order_no}"
-        logger.info(f"🌐 Đang truy cập URL: {url}")
-        driver.get(url)
-        time.sleep(3)
-        
-        logger.info("⏳ Đang chờ trang load...")
-        WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div.subtitle6.text-textBuy'))
-                )
-        logger.info("✅ Trang đã load thành công")
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        logger.info("📄 Đã parse HTML thành công")
-        
-        # Tìm fiat amount
-        fiat_block = soup.select_one("div.subtitle6.text-textBuy")
-        if fiat_block:
-            fiat_amount = fiat_block.get_text(strip=True)
-            bank_info["Fiat amount"] = parse_currency(fiat_amount)
-            logger.info(f"💰 Tìm thấy Fiat Amount: {fiat_amount} -> {bank_info['Fiat amount']}")
-        else:
-            logger.warning("⚠️ Không tìm thấy Fiat Amount block")
+        pools = _prefetch_pools if prefetch else _driver_pools
+        with pools[profile].session() as driver:
+            if mode == "cdp":
+                driver.execute_cdp_cmd("Network.enable", {})
+            driver.get_log("performance")  # Bỏ các sự kiện cũ để log không dồn lại
 
-        # Tìm các thông tin khác
-        sections = soup.find('div',class_='relative w-full')
-        if not sections:
-            logger.warning("⚠️ Không tìm thấy section chính")
-            return bank_info
-            
-        label_tag,value_tag = None, None
-        found_fields = 0
-        
-        for section in sections:
-            all_divs = section.find_all("div")  
-            for div in all_divs:
-                if div.get("class") and "body2" in div.get("class") and "text-tertiaryText" in div.get("class"):
-                    label_tag = div
-                if div.get("class") and "body2" in div.get("class") and "text-right" in div.get("class") and "break-words" in div.get("class"):
-                    value_tag = div
-
-                if label_tag and value_tag:
-                    label = label_tag.text.strip()
-                    value = value_tag.text.strip()
-                    bank_info[label] = value
-                    found_fields += 1
-                    logger.info(f"📋 Tìm thấy field: {label} = {value}")
-                    label,value = None, None
-
-        logger.info(f"📊 Tổng số fields tìm thấy: {found_fields}")
+            url = ORDER_DETAIL_URL.format(order_no)
+            logger.info(f"🌐 Đang truy cập URL: {url}")
+            t0 = time.perf_counter()
+            driver.get(url)
+            t1 = time.perf_counter()
+            EXTRACTION_LATENCY["navigate"].record(t1 - t0)
+
+            logger.info("⏳ Đang chờ trang load...")
+            bank_info = _wait_for_order_detail(driver, order_no, mode)
+            t2 = time.perf_counter()
+            EXTRACTION_LATENCY["ready"].record(t2 - t1)
+            logger.info(f"✅ Trang đã load thành công sau {t2 - t0:.2f}s")
+
+        if "Fiat amount" not in bank_info:
+            logger.warning("⚠️ Không tìm thấy Fiat Amount block")
+        logger.info(f"📊 Tổng số fields tìm thấy: {len(bank_info)}")
         logger.info(f"🎯 Thông tin cuối cùng: {bank_info}")
-        
-        driver.close()
         logger.info("✅ Hoàn thành trích xuất thông tin")
         
     except Exception as e:
         logger.error(f"💥 Lỗi khi trích xuất dữ liệu cho order {order_no}: {str(e)}", exc_info=True)
 
     finally:
-        if driver:
-            driver.quit()
-            logger.info("🔒 Đã đóng driver")
+        EXTRACTION_LATENCY["total"].record(time.perf_counter() - started)
     return bank_info
 
+def prefetch_order_info(order_no: str) -> dict:
+    """Trích xuất thông tin order cho prefetch (pool driver riêng, xem extract_order_info)"""
+    return extract_order_info(order_no, prefetch=True)
+
+def _navigate_tab(driver, order_no: str) -> bool:
+    """Điều hướng tab hiện tại tới order không chờ tải xong; False nếu tab đang treo"""
+    try:
+        driver.execute_script("window.location.href = arguments[0];", ORDER_DETAIL_URL.format(order_no))
+        return True
+    except WebDriverException as e:
+        logger.warning(f"⚠️ Không điều hướng được tab tới order {order_no}: {e.__class__.__name__}")
+        return False
+
+def iter_orders_info(order_numbers, max_tabs: int = EXTRACT_MAX_TABS, timeout: float = 30,
+                     profile: str = EXTRACT_PROFILE):
+    """
+    Trích xuất nhiều order song song trên nhiều tab của cùng một driver.
+    Các tab được điều hướng không chờ (window.location) rồi kiểm tra lần lượt,
+    tab nào xong thì nhận order tiếp theo. Đọc theo DOM vì performance log
+    của CDP không tách được theo tab.
+    Trong lô, page-load timeout của driver hạ xuống TAB_COMMAND_TIMEOUT nên lệnh tới
+    một tab đang treo chỉ chờ ngắn; order quá hạn trả về dict rỗng và tab đó không
+    nhận order nữa. Order không có kết quả được trích xuất lại từng order một
+    (OrderDetailCache.get_or_fetch không coi kết quả rỗng của lô là cuối cùng).
+    Args:
+        order_numbers: Danh sách order
+        max_tabs: Số tab mở cùng lúc
+        timeout: Thời gian chờ tối đa cho mỗi order (giây); quá hạn trả về dict rỗng
+        profile: 'visible' hoặc 'headless'
+    Yields:
+        (order_no, bank_info) theo thứ tự order nào xong trước
+    """
+    pending = list(dict.fromkeys(order_numbers))[::-1]
+    if not pending:
+        return
+    pool = _driver_pools[profile]
+    with pool.session() as driver:
+        driver.get_log("performance")  # Không dùng log ở chế độ nhiều tab
+        home = driver.current_window_handle
+        opened = []
+        driver.set_page_load_timeout(TAB_COMMAND_TIMEOUT)
+        try:
+            for _ in range(min(max_tabs, len(pending)) - 1):
+                driver.switch_to.new_window("tab")
+                opened.append(driver.current_window_handle)
+                if pool.setup:
+                    pool.setup(driver)
+            logger.info(f"🗂️ Trích xuất {len(pending)} order trên {len(opened) + 1} tab")
+
+            # handle -> (order_no, thời điểm bắt đầu) hoặc None nếu tab rảnh/đã bỏ
+            tabs = {}
+
+            def assign(handle):
+                """Giao order tiếp theo cho tab hiện tại; tab treo thì bỏ, order chờ tab khác"""
+                order_no = pending.pop()
+                if _navigate_tab(driver, order_no):
+                    tabs[handle] = (order_no, time.perf_counter())
+                else:
+                    tabs[handle] = None
+                    pending.append(order_no)
+
+            for handle in [home] + opened:
+                driver.switch_to.window(handle)
+                if pending:
+                    assign(handle)
+
+            while any(tabs.values()):
+                for handle, job in tabs.items():
+                    if job is None:
+                        continue
+                    order_no, started = job
+                    bank_info = None
+                    try:
+                        driver.switch_to.window(handle)
+                        # Tab vẫn còn trang cũ cho tới khi điều hướng xong
+                        if f"orderNo={order_no}" in driver.current_url and order_detail_ready(driver):
+                            bank_info = parse_order_detail(driver.page_source)
+                    except (TimeoutException, JavascriptException):
+                        pass  # Trang đang chuyển, kiểm tra lại ở vòng sau
+                    elapsed = time.perf_counter() - started
+                    healthy = True
+                    if bank_info is None:
+                        if elapsed < timeout:
+                            continue
+                        logger.warning(f"⚠️ Order {order_no} không sẵn sàng sau {timeout}s, "
+                                       f"bỏ tab này và trích xuất lại riêng")
+                        bank_info, healthy = {}, False
+                    EXTRACTION_LATENCY["total"].record(elapsed)
+                    tabs[handle] = None
+                    if healthy and pending:
+                        assign(handle)
+                    yield order_no, bank_info
+                time.sleep(0.05)
+
+            # Mọi tab đều đã bị bỏ: các order còn lại trả về rỗng để trích xuất riêng
+            while pending:
+                yield pending.pop(), {}
+        finally:
+            for handle in opened:
+                try:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                except WebDriverException:
+                    pass
+            driver.switch_to.window(home)
+            driver.set_page_load_timeout(pool.page_load_timeout or PAGE_LOAD_TIMEOUT)
+
+def extract_orders_info(order_numbers, max_tabs: int = EXTRACT_MAX_TABS, timeout: float = 30,
+                        profile: str = EXTRACT_PROFILE) -> dict:
+    """
+    Trích xuất thông tin người bán của nhiều order cùng lúc (xem iter_orders_info)
+    Returns:
+        dict: order_no -> bank_info (dict rỗng nếu order lỗi hoặc quá hạn)
+    """
+    results = {}
+    started = time.perf_counter()
+    try:
+        for order_no, bank_info in iter_orders_info(order_numbers, max_tabs, timeout, profile):
+            logger.info(f"✅ Order {order_no}: {len(bank_info)} fields")
+            results[order_no] = bank_info
+    except Exception as e:
+        logger.error(f"💥 Lỗi khi trích xuất theo lô: {str(e)}", exc_info=True)
+    for order_no in order_numbers:
+        results.setdefault(order_no, {})
+    logger.info(f"📦 Hoàn thành lô {len(results)} order sau {time.perf_counter() - started:.2f}s")
+    return results
+
+def wait_for_devtools(port: int = 9222, timeout: float = 15) -> bool:
+    """
+    Chờ tới khi cổng DevTools của Chrome trả lời
+    Args:
+        port: Cổng remote debugging
+        timeout: Thời gian chờ tối đa (giây)
+    Returns:
+        bool: True nếu cổng đã sẵn sàng
+    """
+    url = f"http://127.0.0.1:{port}/json/version"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.1)
+    return False
+
 def launch_chrome_remote_debugging(port: int = 9222) -> None:
     """Khởi chạy Chrome với chế độ remote debugging"""
     chrome_path = Path(CHROME_PATH)
@@ -192,7 +550,9 @@ def launch_chrome_remote_debugging(port: int = 9222) -> None:
             stderr=subprocess.PIPE,
             creationflags=subprocess.CREATE_NO_WINDOW  # Ẩn console window
         )
-        time.sleep(3)  # Đợi Chrome khởi động
+        # Đợi tới khi cổng DevTools trả lời thay vì ngủ cố định
+        if not wait_for_devtools(port):
+            raise TimeoutError(f"Chrome không mở cổng DevTools {port}")
         logger.info("Chrome đã được khởi chạy thành công")
     except Exception as e:
         logger.error(f"Lỗi khi khởi chạy Chrome: {e}")
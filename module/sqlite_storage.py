@@ -0,0 +1,282 @@
+"""
+Lưu giao dịch trong SQLite (transactions.db) thay cho các file JSON theo ngày.
+- Cùng các hàm với TransactionStorage, ảnh QR vẫn lưu file trong qr_codes/
+- WAL mode, index theo order_number, timestamp, type, bank_name: tra theo order
+  và lấy N giao dịch gần nhất không phải đọc toàn bộ lịch sử
+- Tự nhập các file transactions_*.json(l) có sẵn; file đã nhập được ghi lại trong
+  bảng imported_files nên lần mở sau chỉ nhập file mới/đã sửa (vd: file hỏng đã được sửa)
+"""
+
+import json
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+
+from module.transaction_storage import TransactionStorage, parse_amount, to_date, transaction_matches
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_number TEXT,
+    type TEXT,
+    bank_name TEXT,
+    amount REAL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_order ON transactions(order_number);
+CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
+CREATE INDEX IF NOT EXISTS idx_transactions_bank ON transactions(bank_name);
+CREATE TABLE IF NOT EXISTS imported_files (
+    name TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+
+# Thứ tự mới -> cũ dùng chung cho danh sách gần đây và phân trang (id phân định giao dịch trùng khóa)
+_RECENT_ORDER = "ORDER BY timestamp DESC, IFNULL(order_number, '') DESC, id DESC"
+
+
+def _day_bounds(date):
+    """Timestamp đầu ngày và đầu ngày hôm sau (giờ địa phương, giống cách chia file JSON)"""
+    date = to_date(date)
+    start = datetime(date.year, date.month, date.day)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+class SQLiteTransactionStorage(TransactionStorage):
+    def __init__(self, base_dir: str = "transactions", db_name: str = "transactions.db"):
+        """
+        Khởi tạo SQLiteTransactionStorage
+        Args:
+            base_dir: Thư mục lưu dữ liệu (transactions.db và qr_codes/)
+            db_name: Tên file database
+        """
+        super().__init__(base_dir, journal=False)
+        self.db_path = self.base_dir / db_name
+        # Một kết nối dùng chung cho mọi luồng, truy cập tuần tự qua self._lock
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        try:
+            self.import_json(only_new=True)
+        except Exception as e:
+            # Không chặn khởi động: các file chưa nhập được sẽ được thử lại ở lần mở sau
+            self.logger.error(f"Lỗi khi nhập giao dịch từ file JSON: {e}")
+
+    def _insert(self, transaction_info: dict) -> None:
+        self._conn.execute(
+            "INSERT INTO transactions (order_number, type, bank_name, amount, timestamp, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                transaction_info.get('order_number'),
+                transaction_info.get('type'),
+                transaction_info.get('bank_name'),
+                parse_amount(transaction_info.get('amount')),
+                transaction_info['timestamp'],
+                json.dumps(transaction_info, ensure_ascii=False),
+            ),
+        )
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def import_json(self, source_dir=None, only_new: bool = False) -> int:
+        """
+        Nhập các file transactions_*.json(l) vào database (bỏ qua giao dịch đã có)
+        Mỗi file ngày nhập trong một transaction riêng; file không đọc được bị bỏ qua (ghi log)
+        và không được đánh dấu đã nhập, để lần sau thử lại
+        Args:
+            source_dir: Thư mục chứa file JSON (None = base_dir)
+            only_new: Chỉ nhập file chưa nhập hoặc đã thay đổi từ lần nhập trước
+        Returns:
+            int: Số giao dịch đã nhập
+        """
+        source = TransactionStorage(source_dir, journal=False) if source_dir else self
+        imported = 0
+        skipped = 0
+        for date_file in source._day_files():
+            files = [path for path in (date_file, date_file.with_suffix(".jsonl")) if path.exists()]
+            mtime = max(path.stat().st_mtime for path in files)
+            with self._lock:
+                if only_new:
+                    row = self._conn.execute(
+                        "SELECT mtime FROM imported_files WHERE name = ?", (date_file.stem,)
+                    ).fetchone()
+                    if row and row[0] == mtime:
+                        continue
+                try:
+                    transactions = source._read_day(date_file)
+                except Exception as e:
+                    self.logger.error(f"Bỏ qua file giao dịch không đọc được {date_file}: {e}")
+                    skipped += 1
+                    continue
+                self._conn.execute("BEGIN")
+                try:
+                    for transaction in transactions:
+                        if 'timestamp' not in transaction:
+                            continue
+                        exists = self._conn.execute(
+                            "SELECT 1 FROM transactions WHERE order_number IS ? AND timestamp = ? LIMIT 1",
+                            (transaction.get('order_number'), transaction['timestamp']),
+                        ).fetchone()
+                        if not exists:
+                            self._insert(transaction)
+                            imported += 1
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO imported_files (name, mtime) VALUES (?, ?)",
+                        (date_file.stem, mtime),
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        if imported or skipped:
+            self.logger.info(f"Đã nhập {imported} giao dịch từ file JSON vào {self.db_path}"
+                             + (f", bỏ qua {skipped} file lỗi" if skipped else ""))
+        return imported
+
+    def save_transaction(self, transaction_info: dict, qr_image: bytes = None) -> dict:
+        """Lưu thông tin giao dịch và mã QR"""
+        try:
+            timestamp = datetime.fromtimestamp(transaction_info.get('timestamp', datetime.now().timestamp()))
+            transaction_info['timestamp'] = timestamp.timestamp()
+            self._save_qr(transaction_info, qr_image, timestamp)
+            with self._lock:
+                self._insert(transaction_info)
+
+            self.logger.info(f"Đã lưu giao dịch {transaction_info['order_number']} vào {self.db_path}")
+            return transaction_info
+
+        except Exception as e:
+            self.logger.error(f"Lỗi khi lưu giao dịch: {e}")
+            raise
+
+    def get_transactions_by_date(self, date: datetime) -> list:
+        """Lấy danh sách giao dịch theo ngày"""
+        try:
+            start, end = _day_bounds(date)
+            return self._query(
+                "SELECT data FROM transactions WHERE timestamp >= ? AND timestamp < ? ORDER BY id",
+                (start, end),
+            )
+        except Exception as e:
+            self.logger.error(f"Lỗi khi đọc giao dịch ngày {date}: {e}")
+            return []
+
+    def iter_transactions(self, start_date, end_date, workers: int = 4, batch_size: int = 500, **filters):
+        """
+        Duyệt giao dịch từ start_date tới end_date (tính cả hai ngày) theo thời gian
+        type/bank/số tiền lọc bằng SQL (có index), text lọc sau khi đọc
+        Args:
+            workers: Không dùng (giữ cùng tham số với TransactionStorage)
+            batch_size: Số dòng đọc mỗi lần
+            **filters: trade_type, bank, min_amount, max_amount, text (xem transaction_matches)
+        """
+        start, _ = _day_bounds(start_date)
+        _, end = _day_bounds(end_date)
+        sql = "SELECT data FROM transactions WHERE timestamp >= ? AND timestamp < ?"
+        params = [start, end]
+        if filters.get('trade_type'):
+            sql += " AND type = ?"
+            params.append(filters['trade_type'])
+        if filters.get('bank'):
+            sql += " AND bank_name LIKE ?"
+            params.append(f"%{filters['bank']}%")
+        if filters.get('min_amount') is not None:
+            sql += " AND amount >= ?"
+            params.append(filters['min_amount'])
+        if filters.get('max_amount') is not None:
+            sql += " AND amount <= ?"
+            params.append(filters['max_amount'])
+        sql += " ORDER BY timestamp, id"
+
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    transaction = json.loads(row[0])
+                    # bank LIKE của SQLite chỉ không phân biệt hoa thường với ASCII: kiểm tra lại
+                    if transaction_matches(transaction, **filters):
+                        yield transaction
+        finally:
+            cursor.close()
+
+    def get_transactions_by_date_range(self, start_date, end_date, **filters) -> list:
+        """Lấy danh sách giao dịch trong khoảng thời gian (tính cả ngày đầu và ngày cuối)"""
+        try:
+            return list(self.iter_transactions(start_date, end_date, **filters))
+        except Exception as e:
+            self.logger.error(f"Lỗi khi đọc giao dịch từ {start_date} đến {end_date}: {e}")
+            return []
+
+    def get_transaction_by_order(self, order_number: str) -> dict:
+        """Tìm giao dịch theo số order"""
+        try:
+            rows = self._query(
+                "SELECT data FROM transactions WHERE order_number = ? ORDER BY timestamp, id LIMIT 1",
+                (order_number,),
+            )
+            return rows[0] if rows else None
+        except Exception as e:
+            self.logger.error(f"Lỗi khi tìm giao dịch {order_number}: {e}")
+            return None
+
+    def get_recent_transactions(self, limit: int = 10, offset: int = 0) -> list:
+        """Lấy danh sách giao dịch gần đây nhất (bỏ qua offset giao dịch mới nhất)"""
+        try:
+            return self._query(
+                f"SELECT data FROM transactions {_RECENT_ORDER} LIMIT ? OFFSET ?",
+                (limit, offset),
+            )
+        except Exception as e:
+            self.logger.error(f"Lỗi khi lấy giao dịch gần đây: {e}")
+            return []
+
+    def get_recent_page(self, limit: int = 10, cursor: tuple = None) -> tuple:
+        """
+        Phân trang giao dịch từ mới tới cũ theo cursor, trả về (giao dịch, next_cursor)
+        cursor là (timestamp, order_number, id) của giao dịch cuối trang trước
+        """
+        try:
+            with self._lock:
+                if cursor:
+                    rows = self._conn.execute(
+                        "SELECT data, timestamp, IFNULL(order_number, ''), id FROM transactions "
+                        f"WHERE (timestamp, IFNULL(order_number, ''), id) < (?, ?, ?) {_RECENT_ORDER} LIMIT ?",
+                        (*cursor, limit),
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        f"SELECT data, timestamp, IFNULL(order_number, ''), id FROM transactions {_RECENT_ORDER} LIMIT ?",
+                        (limit,),
+                    ).fetchall()
+        except Exception as e:
+            self.logger.error(f"Lỗi khi phân trang giao dịch: {e}")
+            return [], None
+        transactions = [json.loads(row[0]) for row in rows]
+        if len(rows) < limit:
+            return transactions, None
+        return transactions, tuple(rows[-1][1:])
+
+    def compact(self, date: datetime = None) -> int:
+        """Không có journal để gộp"""
+        return 0
+
+    def close(self) -> None:
+        """Đóng kết nối database"""
+        with self._lock:
+            self._conn.close()
@@ -1,34 +1,322 @@
 import os
 import json
-from datetime import datetime
+import heapq
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, datetime, timedelta
 from io import BytesIO
 import logging
+import threading
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+from config_env import STORAGE_BACKEND
+
 logger = logging.getLogger(__name__)
 
+# Các trường được tìm khi lọc theo text
+TEXT_FIELDS = ("order_number", "account_name", "account_number", "bank_name", "message", "reference")
+
+
+def parse_amount(value):
+    """Số tiền (int/float/chuỗi có dấu phẩy) thành float, None nếu không đọc được"""
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def to_date(value) -> date_type:
+    """datetime / date / chuỗi 'YYYY-MM-DD' thành date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def transaction_matches(transaction: dict, trade_type: str = None, bank: str = None,
+                        min_amount: float = None, max_amount: float = None, text: str = None) -> bool:
+    """
+    Kiểm tra giao dịch có thỏa các bộ lọc không (bộ lọc None = bỏ qua)
+    Args:
+        trade_type: 'buy' hoặc 'sell'
+        bank: Chuỗi con của tên ngân hàng (không phân biệt hoa thường)
+        min_amount, max_amount: Khoảng số tiền (tính cả hai đầu)
+        text: Chuỗi con tìm trong số order, tên/số TK, ngân hàng, nội dung
+    """
+    if trade_type and transaction.get('type') != trade_type:
+        return False
+    if bank and bank.lower() not in str(transaction.get('bank_name') or '').lower():
+        return False
+    if min_amount is not None or max_amount is not None:
+        amount = parse_amount(transaction.get('amount'))
+        if amount is None:
+            return False
+        if min_amount is not None and amount < min_amount:
+            return False
+        if max_amount is not None and amount > max_amount:
+            return False
+    if text:
+        text = text.lower()
+        if not any(text in str(transaction.get(field) or '').lower() for field in TEXT_FIELDS):
+            return False
+    return True
+
+# Khóa dùng chung cho mọi TransactionStorage cùng thư mục trong tiến trình (MainWindow,
+# P2PBinance, TransactionViewer mỗi nơi tạo một instance): ghi file ngày/index không giẫm lên nhau
+_dir_locks = {}
+_dir_locks_guard = threading.Lock()
+
+
+def _shared_lock(base_dir: Path) -> threading.Lock:
+    key = str(base_dir.resolve())
+    with _dir_locks_guard:
+        return _dir_locks.setdefault(key, threading.Lock())
+
 class TransactionStorage:
-    def __init__(self, base_dir: str = "transactions"):
-        """Khởi tạo TransactionStorage với thư mục cơ sở"""
+    def __init__(self, base_dir: str = "transactions", journal: bool = None):
+        """
+        Khởi tạo TransactionStorage với thư mục cơ sở
+        Args:
+            base_dir: Thư mục lưu dữ liệu
+            journal: Ghi nối tiếp vào file JSON Lines (transactions_YYYY-MM-DD.jsonl)
+                thay vì ghi lại cả file JSON của ngày; compact() gộp về định dạng mảng cũ.
+                None = theo STORAGE_BACKEND
+        """
         self.base_dir = Path(base_dir)
         self.qr_dir = self.base_dir / "qr_codes"
+        self.journal = STORAGE_BACKEND == "jsonl" if journal is None else journal
         self.logger = logging.getLogger(__name__)
+        self._journal_day = None
+        # order_number -> (tên file ngày, vị trí trong mảng JSON / byte offset của dòng journal)
+        self.index_path = self.base_dir / "order_index.jsonl"
+        self._index = None
+        # (inode, số byte đã đọc) của file index: đọc tiếp các dòng instance khác ghi thêm
+        self._index_state = None
         
         # Tạo thư mục nếu chưa tồn tại
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.qr_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = _shared_lock(self.base_dir)
         
     def _get_date_file_path(self, date: datetime) -> Path:
         """Lấy đường dẫn file JSON cho một ngày cụ thể"""
         date_str = date.strftime("%Y-%m-%d")
         return self.base_dir / f"transactions_{date_str}.json"
+
+    def _get_journal_path(self, date: datetime) -> Path:
+        """Lấy đường dẫn file journal (JSON Lines) cho một ngày cụ thể"""
+        return self._get_date_file_path(date).with_suffix(".jsonl")
+
+    def _read_day(self, date_file: Path) -> list:
+        """Đọc giao dịch của một ngày: file mảng JSON rồi tới các dòng journal ghi sau"""
+        transactions = []
+        if date_file.exists():
+            with open(date_file, 'r', encoding='utf-8') as f:
+                transactions = json.load(f)
+        transactions.extend(transaction for _, transaction in self._iter_journal(date_file.with_suffix(".jsonl")))
+        return transactions
+
+    def _iter_journal(self, journal_file: Path):
+        """Duyệt các dòng journal: (byte offset của dòng, giao dịch)"""
+        if not journal_file.exists():
+            return
+        offset = 0
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                start, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    yield start, json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Dòng cuối ghi dở khi tiến trình bị dừng đột ngột
+                    self.logger.warning(f"Bỏ qua dòng journal hỏng trong {journal_file}")
+
+    def _day_files(self, reverse: bool = False) -> list:
+        """Danh sách file JSON của các ngày có dữ liệu (kể cả ngày chỉ có journal), theo ngày"""
+        dates = {path.stem for path in self.base_dir.glob("transactions_*.json")}
+        dates.update(path.stem for path in self.base_dir.glob("transactions_*.jsonl"))
+        return [self.base_dir / f"{stem}.json" for stem in sorted(dates, reverse=reverse)]
+
+    def _write_day(self, date_file: Path, transactions: list) -> None:
+        """Ghi file mảng JSON của ngày qua file tạm để không hỏng file khi bị dừng giữa chừng"""
+        tmp_path = date_file.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(transactions, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, date_file)
+
+    def _load_index(self) -> None:
+        """Nạp index order_number từ đĩa (gọi khi đang giữ self._lock); dựng lại nếu thiếu hoặc cũ"""
+        if self._index is not None:
+            return
+        try:
+            index_mtime = self.index_path.stat().st_mtime
+        except FileNotFoundError:
+            index_mtime = None
+        day_files = [*self.base_dir.glob("transactions_*.json"), *self.base_dir.glob("transactions_*.jsonl")]
+        # File ngày bị sửa sau lần ghi index cuối (sửa tay, chép từ máy khác...) thì dựng lại
+        if index_mtime is None or any(path.stat().st_mtime > index_mtime for path in day_files):
+            self._rebuild_index()
+            return
+        self._index = {}
+        self._read_index_file(0)
+
+    def _read_index_file(self, start: int) -> None:
+        """Đọc các dòng index đầy đủ từ byte start vào self._index (giữ mục có trước khi trùng)"""
+        with open(self.index_path, 'rb') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(start)
+            data = f.read()
+        # Dòng cuối chưa ghi xong thì để lần sau đọc
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.splitlines():
+            try:
+                order_number, file_name, position = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            self._index.setdefault(order_number, (file_name, position))
+        self._index_state = (inode, start + len(data))
+
+    def _sync_index(self) -> None:
+        """
+        Đồng bộ index trong bộ nhớ với file trên đĩa (gọi khi đang giữ self._lock):
+        đọc thêm các dòng instance khác vừa ghi, nạp lại nếu file đã bị ghi đè (gộp/dựng lại)
+        """
+        if self._index is None:
+            self._load_index()
+            return
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            self._rebuild_index()
+            return
+        inode, size = self._index_state
+        if stat.st_ino != inode or stat.st_size < size:
+            self._index = {}
+            self._read_index_file(0)
+        elif stat.st_size > size:
+            self._read_index_file(size)
+
+    def _rebuild_index(self) -> int:
+        index = {}
+        for date_file in self._day_files():
+            # File ngày hỏng chỉ làm thiếu order của ngày đó, không chặn cả index
+            try:
+                if date_file.exists():
+                    with open(date_file, 'r', encoding='utf-8') as f:
+                        for position, transaction in enumerate(json.load(f)):
+                            # Giữ giao dịch đầu tiên khi trùng order, giống thứ tự tìm kiếm tuần tự
+                            index.setdefault(transaction.get('order_number'), (date_file.name, position))
+                journal_file = date_file.with_suffix(".jsonl")
+                for offset, transaction in self._iter_journal(journal_file):
+                    index.setdefault(transaction.get('order_number'), (journal_file.name, offset))
+            except Exception as e:
+                self.logger.error(f"Bỏ qua file giao dịch không đọc được khi dựng index {date_file}: {e}")
+        index.pop(None, None)
+        self._index = index
+        self._write_index()
+        self.logger.info(f"Đã dựng index cho {len(index)} order")
+        return len(index)
+
+    def rebuild_index(self) -> int:
+        """
+        Dựng lại index order_number từ toàn bộ file giao dịch
+        Returns:
+            int: Số order trong index
+        """
+        with self._lock:
+            return self._rebuild_index()
+
+    def _write_index(self) -> None:
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for order_number, (file_name, position) in self._index.items():
+                f.write(json.dumps([order_number, file_name, position], ensure_ascii=False) + "\n")
+            size = f.tell()
+        os.replace(tmp_path, self.index_path)
+        self._index_state = (self.index_path.stat().st_ino, size)
+
+    def _index_add(self, order_number, file_name: str, position: int) -> None:
+        """Thêm một order vào index (gọi khi đang giữ self._lock), chỉ ghi nối tiếp một dòng"""
+        if order_number is None or order_number in self._index:
+            # Không có gì mới nhưng đánh dấu index vẫn khớp với file ngày vừa ghi
+            os.utime(self.index_path)
+            return
+        self._index[order_number] = (file_name, position)
+        with open(self.index_path, 'ab') as f:
+            f.write((json.dumps([order_number, file_name, position], ensure_ascii=False) + "\n").encode('utf-8'))
+            self._index_state = (os.fstat(f.fileno()).st_ino, f.tell())
+
+    def _reindex_compacted(self, date_file: Path, transactions: list) -> None:
+        """Journal của ngày đã gộp vào file mảng: trỏ các order của journal sang file mảng"""
+        if self._index is None:
+            return
+        # Lấy cả các order instance khác vừa ghi trước khi ghi đè file index
+        self._sync_index()
+        journal_name = date_file.with_suffix(".jsonl").name
+        for position, transaction in enumerate(transactions):
+            entry = self._index.get(transaction.get('order_number'))
+            if entry and entry[0] == journal_name:
+                self._index[transaction['order_number']] = (date_file.name, position)
+        self._write_index()
+
+    def compact(self, date: datetime = None) -> int:
+        """
+        Gộp journal vào file mảng JSON (định dạng cũ) rồi xóa journal
+        Args:
+            date: Ngày cần gộp (None = tất cả các ngày có journal)
+        Returns:
+            int: Số ngày đã gộp
+        """
+        if date is not None:
+            journals = [self._get_journal_path(date)]
+        else:
+            journals = sorted(self.base_dir.glob("transactions_*.jsonl"))
+        compacted = 0
+        with self._lock:
+            for journal_file in journals:
+                if not journal_file.exists():
+                    continue
+                date_file = journal_file.with_suffix(".json")
+                try:
+                    transactions = self._read_day(date_file)
+                    self._write_day(date_file, transactions)
+                    journal_file.unlink()
+                    self._reindex_compacted(date_file, transactions)
+                    compacted += 1
+                except Exception as e:
+                    self.logger.error(f"Lỗi khi gộp journal {journal_file}: {e}")
+        if compacted:
+            self.logger.info(f"Đã gộp journal của {compacted} ngày")
+        return compacted
+
+    def compact_cold_days(self) -> int:
+        """Gộp journal của các ngày trước hôm nay (không còn được ghi thêm)"""
+        today = self._get_journal_path(datetime.now()).name
+        cold = [p for p in self.base_dir.glob("transactions_*.jsonl") if p.name < today]
+        return sum(self.compact(datetime.strptime(p.stem[len("transactions_"):], "%Y-%m-%d")) for p in cold)
         
     def _get_qr_filename(self, transaction_type: str, order_number: str, timestamp: datetime) -> str:
         """Tạo tên file cho mã QR"""
         date_str = timestamp.strftime("%Y%m%d_%H%M%S")
         return f"{transaction_type}_{date_str}_{order_number}.png"
         
+    def _save_qr(self, transaction_info: dict, qr_image: bytes, timestamp: datetime) -> None:
+        """Lưu ảnh QR (nếu có) và ghi đường dẫn vào transaction_info['qr_path']"""
+        if not qr_image:
+            return
+        qr_filename = self._get_qr_filename(
+            transaction_info['type'],
+            transaction_info['order_number'],
+            timestamp
+        )
+        qr_path = self.qr_dir / qr_filename
+        with open(qr_path, 'wb') as f:
+            f.write(qr_image)
+        transaction_info['qr_path'] = str(qr_path)
+
     def save_transaction(self, transaction_info: dict, qr_image: bytes = None) -> dict:
         """Lưu thông tin giao dịch và mã QR"""
         try:
@@ -36,31 +324,45 @@ class TransactionStorage:
             timestamp = datetime.fromtimestamp(transaction_info.get('timestamp', datetime.now().timestamp()))
             date_file = self._get_date_file_path(timestamp)
             
-            # Đọc dữ liệu hiện có hoặc tạo mới
-            transactions = []
-            if date_file.exists():
-                with open(date_file, 'r', encoding='utf-8') as f:
-                    transactions = json.load(f)
-            
             # Thêm thông tin giao dịch mới
             transaction_info['timestamp'] = timestamp.timestamp()
             
             # Lưu mã QR nếu có
-            if qr_image:
-                qr_filename = self._get_qr_filename(
-                    transaction_info['type'],
-                    transaction_info['order_number'],
-                    timestamp
-                )
-                qr_path = self.qr_dir / qr_filename
-                with open(qr_path, 'wb') as f:
-                    f.write(qr_image)
-                transaction_info['qr_path'] = str(qr_path)
+            self._save_qr(transaction_info, qr_image, timestamp)
             
-            # Thêm vào danh sách và lưu lại
-            transactions.append(transaction_info)
-            with open(date_file, 'w', encoding='utf-8') as f:
-                json.dump(transactions, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                self._sync_index()
+                if self.journal:
+                    # Chỉ ghi thêm một dòng, không đọc lại dữ liệu cũ của ngày
+                    date_file = self._get_journal_path(timestamp)
+                    line = (json.dumps(transaction_info, ensure_ascii=False) + "\n").encode('utf-8')
+                    with open(date_file, 'ab+') as f:
+                        # Dòng cuối ghi dở (tiến trình bị dừng) thì xuống dòng trước khi ghi tiếp
+                        offset = f.seek(0, os.SEEK_END)
+                        if offset:
+                            f.seek(-1, os.SEEK_END)
+                            if f.read(1) != b"\n":
+                                line = b"\n" + line
+                                offset += 1
+                        f.write(line)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._index_add(transaction_info.get('order_number'), date_file.name, offset)
+                else:
+                    # Thêm vào danh sách và lưu lại (journal cũ của ngày nếu có cũng được gộp vào)
+                    transactions = self._read_day(date_file)
+                    transactions.append(transaction_info)
+                    self._write_day(date_file, transactions)
+                    journal_file = date_file.with_suffix(".jsonl")
+                    if journal_file.exists():
+                        journal_file.unlink()
+                        self._reindex_compacted(date_file, transactions)
+                    self._index_add(transaction_info.get('order_number'), date_file.name, len(transactions) - 1)
+
+            # Sang ngày mới thì journal các ngày trước không còn được ghi: gộp lại
+            if self.journal and date_file.name != self._journal_day:
+                self._journal_day = date_file.name
+                self.compact_cold_days()
             
             self.logger.info(f"Đã lưu giao dịch {transaction_info['order_number']} vào file {date_file}")
             return transaction_info
@@ -72,65 +374,197 @@ class TransactionStorage:
     def get_transactions_by_date(self, date: datetime) -> list:
         """Lấy danh sách giao dịch theo ngày"""
         try:
-            date_file = self._get_date_file_path(date)
-            if not date_file.exists():
-                return []
-                
-            with open(date_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read_day(self._get_date_file_path(date))
                 
         except Exception as e:
             self.logger.error(f"Lỗi khi đọc giao dịch ngày {date}: {e}")
             return []
             
-    def get_transactions_by_date_range(self, start_date: datetime, end_date: datetime) -> list:
-        """Lấy danh sách giao dịch trong khoảng thời gian"""
+    def _range_files(self, start_date, end_date) -> list:
+        """File ngày có dữ liệu từ start_date tới end_date (tính cả hai ngày), theo thứ tự ngày"""
+        existing = {path.stem for path in self._day_files()}
+        files = []
+        current, end = to_date(start_date), to_date(end_date)
+        while current <= end:
+            date_file = self._get_date_file_path(current)
+            if date_file.stem in existing:
+                files.append(date_file)
+            current += timedelta(days=1)
+        return files
+
+    def _read_range_day(self, date_file: Path) -> list:
+        """Đọc một file ngày cho iter_transactions; file lỗi chỉ bỏ qua ngày đó (ghi log)"""
         try:
-            all_transactions = []
-            current_date = start_date
-            
-            while current_date <= end_date:
-                transactions = self.get_transactions_by_date(current_date)
-                all_transactions.extend(transactions)
-                current_date = current_date.replace(day=current_date.day + 1)
-                
-            return all_transactions
+            return self._read_day(date_file)
+        except Exception as e:
+            self.logger.error(f"Bỏ qua file giao dịch không đọc được {date_file}: {e}")
+            return []
+
+    def iter_transactions(self, start_date, end_date, workers: int = 4, **filters):
+        """
+        Duyệt giao dịch từ start_date tới end_date (tính cả hai ngày) theo thứ tự ngày
+        Các file ngày được đọc song song, tối đa 2 * workers file nằm trong bộ nhớ cùng lúc;
+        file ngày không đọc được bị bỏ qua, các ngày khác vẫn được trả về
+        Args:
+            start_date, end_date: datetime / date / chuỗi 'YYYY-MM-DD'
+            workers: Số luồng đọc file
+            **filters: trade_type, bank, min_amount, max_amount, text (xem transaction_matches)
+        Yields:
+            dict: Giao dịch thỏa bộ lọc
+        """
+        files = self._range_files(start_date, end_date)
+        if not files:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files))),
+                                thread_name_prefix="storage-read") as executor:
+            pending = deque()
+            files = iter(files)
+            for date_file in files:
+                pending.append(executor.submit(self._read_range_day, date_file))
+                if len(pending) >= 2 * workers:
+                    break
+            try:
+                while pending:
+                    transactions = pending.popleft().result()
+                    next_file = next(files, None)
+                    if next_file is not None:
+                        pending.append(executor.submit(self._read_range_day, next_file))
+                    for transaction in transactions:
+                        if transaction_matches(transaction, **filters):
+                            yield transaction
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def get_transactions_by_date_range(self, start_date, end_date, **filters) -> list:
+        """
+        Lấy danh sách giao dịch trong khoảng thời gian (tính cả ngày đầu và ngày cuối)
+        Args:
+            **filters: trade_type, bank, min_amount, max_amount, text (xem transaction_matches)
+        """
+        try:
+            return list(self.iter_transactions(start_date, end_date, **filters))
             
         except Exception as e:
             self.logger.error(f"Lỗi khi đọc giao dịch từ {start_date} đến {end_date}: {e}")
             return []
             
+    def _read_indexed(self, file_name: str, position: int):
+        """Đọc giao dịch tại vị trí đã ghi trong index (một lần đọc file)"""
+        path = self.base_dir / file_name
+        try:
+            if path.suffix == ".jsonl":
+                with open(path, 'rb') as f:
+                    f.seek(position)
+                    return json.loads(f.readline())
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)[position]
+        except (OSError, ValueError, IndexError):
+            return None
+
     def get_transaction_by_order(self, order_number: str) -> dict:
-        """Tìm giao dịch theo số order"""
+        """
+        Tìm giao dịch theo số order (qua index order_number -> file ngày, vị trí)
+        Index đã đồng bộ mà không có order thì trả về None ngay; chỉ dựng lại index
+        khi vị trí trong index trỏ tới giao dịch khác (file ngày bị sửa ngoài storage)
+        """
         try:
-            # Tìm trong tất cả các file JSON
-            for date_file in self.base_dir.glob("transactions_*.json"):
-                with open(date_file, 'r', encoding='utf-8') as f:
-                    transactions = json.load(f)
-                    for transaction in transactions:
-                        if transaction.get('order_number') == order_number:
-                            return transaction
+            for attempt in range(2):
+                with self._lock:
+                    if attempt:
+                        self._rebuild_index()
+                    else:
+                        self._sync_index()
+                    entry = self._index.get(order_number)
+                if entry is None:
+                    return None
+                transaction = self._read_indexed(*entry)
+                if transaction and transaction.get('order_number') == order_number:
+                    return transaction
+                if not attempt:
+                    self.logger.warning(f"Index order {order_number} không khớp dữ liệu, dựng lại index")
             return None
             
         except Exception as e:
             self.logger.error(f"Lỗi khi tìm giao dịch {order_number}: {e}")
             return None
             
-    def get_recent_transactions(self, limit: int = 10) -> list:
-        """Lấy danh sách giao dịch gần đây nhất"""
+    def _recent(self, count: int, before: tuple = None) -> list:
+        """
+        count giao dịch mới nhất (cũ hơn before nếu có), mới nhất trước
+        Duyệt file ngày từ mới tới cũ với heap giới hạn count phần tử; file của ngày cũ hơn
+        chỉ chứa giao dịch cũ hơn nên dừng ngay khi heap đã đủ sau một ngày
+        """
+        if count <= 0:
+            return []
+        heap = []
+        sequence = 0
+        for date_file in self._day_files(reverse=True):
+            if before is not None:
+                day_start = datetime.strptime(date_file.stem[len("transactions_"):], "%Y-%m-%d").timestamp()
+                if day_start > before[0]:
+                    continue
+            for transaction in self._read_day(date_file):
+                key = (transaction.get('timestamp', 0), str(transaction.get('order_number') or ''))
+                if before is not None and key >= before:
+                    continue
+                sequence += 1
+                if len(heap) < count:
+                    heapq.heappush(heap, (key, -sequence, transaction))
+                elif key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, -sequence, transaction))
+            if len(heap) >= count:
+                break
+        return [transaction for _, _, transaction in sorted(heap, reverse=True)]
+
+    def get_recent_transactions(self, limit: int = 10, offset: int = 0) -> list:
+        """
+        Lấy danh sách giao dịch gần đây nhất
+        Args:
+            limit: Số giao dịch tối đa
+            offset: Bỏ qua offset giao dịch mới nhất (phân trang)
+        """
         try:
-            all_transactions = []
-            
-            # Đọc tất cả các file JSON
-            for date_file in sorted(self.base_dir.glob("transactions_*.json"), reverse=True):
-                with open(date_file, 'r', encoding='utf-8') as f:
-                    transactions = json.load(f)
-                    all_transactions.extend(transactions)
-                    
-            # Sắp xếp theo thời gian và lấy limit giao dịch gần nhất
-            all_transactions.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
-            return all_transactions[:limit]
+            return self._recent(offset + limit)[offset:]
             
         except Exception as e:
             self.logger.error(f"Lỗi khi lấy giao dịch gần đây: {e}")
-            return [] 
\ No newline at end of file
+            return []
+
+    def get_recent_page(self, limit: int = 10, cursor: tuple = None) -> tuple:
+        """
+        Phân trang giao dịch từ mới tới cũ theo cursor (không phải đọc lại các trang trước)
+        Args:
+            limit: Số giao dịch mỗi trang
+            cursor: next_cursor của trang trước (None = trang đầu)
+        Returns:
+            tuple: (danh sách giao dịch, next_cursor hoặc None nếu hết)
+        """
+        try:
+            transactions = self._recent(limit, tuple(cursor) if cursor else None)
+        except Exception as e:
+            self.logger.error(f"Lỗi khi phân trang giao dịch: {e}")
+            return [], None
+        if len(transactions) < limit:
+            return transactions, None
+        last = transactions[-1]
+        return transactions, (last.get('timestamp', 0), str(last.get('order_number') or ''))
+
+
+def create_storage(base_dir: str = "transactions", backend: str = None) -> TransactionStorage:
+    """
+    Tạo storage giao dịch theo cấu hình
+    Args:
+        base_dir: Thư mục lưu dữ liệu
+        backend: 'json', 'jsonl' hoặc 'sqlite' (None = theo STORAGE_BACKEND)
+    Returns:
+        TransactionStorage hoặc SQLiteTransactionStorage (cùng các hàm đọc/ghi)
+    """
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend == "sqlite":
+        from module.sqlite_storage import SQLiteTransactionStorage
+        return SQLiteTransactionStorage(base_dir)
+    if backend not in ("json", "jsonl"):
+        logger.warning(f"STORAGE_BACKEND không hợp lệ: {backend}, dùng 'json'")
+        backend = "json"
+    return TransactionStorage(base_dir, journal=backend == "jsonl")
@@ -0,0 +1,202 @@
+"""
+Client gọi API tạo QR của VietQR (api.vietqr.io) với độ trễ có giới hạn.
+- Dùng lại kết nối qua requests.Session (keep-alive)
+- Mỗi lần gọi có deadline tổng, không bao giờ treo luồng gọi
+- Gửi thêm một request song song (hedge) nếu request đầu chậm hơn p95 đã đo
+- Circuit breaker: lỗi liên tiếp thì ngừng gọi API một thời gian để bên gọi dùng QR dự phòng
+"""
+
+import io
+import time
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from module.latency import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+VIETQR_GENERATE_URL = "https://api.vietqr.io/v2/generate"
+
+
+class CircuitOpenError(Exception):
+    """API đang bị ngắt do lỗi liên tiếp"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        """
+        Khởi tạo CircuitBreaker
+        Args:
+            failure_threshold: Số lỗi liên tiếp để ngắt
+            reset_timeout: Thời gian ngắt (giây) trước khi cho thử lại một request
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Cho phép gọi API không; ở trạng thái half_open chỉ cho một request thử"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    logger.warning(f"⛔ Ngắt API VietQR trong {self.reset_timeout}s sau {self.failures} lỗi")
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class VietQRClient:
+    def __init__(self, client_id, api_key, deadline: float = 5, hedge: bool = True,
+                 initial_hedge_delay: float = 1.0, min_hedge_delay: float = 0.05,
+                 failure_threshold: int = 3, reset_timeout: float = 30, pool_size: int = 4):
+        """
+        Khởi tạo VietQRClient
+        Args:
+            client_id, api_key: Thông tin xác thực VietQR
+            deadline: Thời gian tối đa cho một lần tạo QR (giây), gồm cả request hedge
+            hedge: Gửi request thứ hai khi request đầu chậm hơn p95
+            initial_hedge_delay: Độ trễ hedge khi chưa có số liệu đo (giây)
+            min_hedge_delay: Độ trễ hedge nhỏ nhất (giây)
+            failure_threshold, reset_timeout: Cấu hình circuit breaker
+            pool_size: Số kết nối giữ sẵn tới api.vietqr.io
+        """
+        self.deadline = deadline
+        self.hedge = hedge
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "x-client-id": client_id or "",
+            "x-api-key": api_key or "",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="vietqr")
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def hedge_delay(self) -> float:
+        """Độ trễ trước khi gửi request hedge: p95 đã đo, hoặc giá trị ban đầu"""
+        if self.latency.count < 20:
+            return self.initial_hedge_delay
+        return max(self.latency.percentile(95) / 1000, self.min_hedge_delay)
+
+    def _post(self, payload: dict, timeout: float) -> bytes:
+        self.requests += 1
+        started = time.perf_counter()
+        response = self.session.post(VIETQR_GENERATE_URL, json=payload, timeout=timeout)
+        response.raise_for_status()
+        qr_data_url = response.json()["data"]["qrDataURL"]
+        self.latency.record(time.perf_counter() - started)
+        header, encoded = qr_data_url.split(",", 1)
+        return base64.b64decode(encoded)
+
+    def generate(self, payload: dict, deadline: float = None) -> io.BytesIO:
+        """
+        Gọi API tạo QR
+        Args:
+            payload: Body của /v2/generate (accountNo, accountName, acqId, addInfo, amount, template)
+            deadline: Ghi đè deadline mặc định (giây)
+        Returns:
+            io.BytesIO: Ảnh PNG
+        Raises:
+            CircuitOpenError: API đang bị ngắt
+            Exception: Lỗi/timeout của request (đã được tính vào circuit breaker)
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("API VietQR đang tạm ngắt")
+
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        futures = [self._executor.submit(self._post, payload, deadline or self.deadline)]
+        pending = set(futures)
+        error = None
+        try:
+            while pending:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                can_hedge = self.hedge and len(futures) == 1
+                done, pending = wait(
+                    pending,
+                    timeout=min(self.hedge_delay(), remaining) if can_hedge else remaining,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    try:
+                        image = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if future is not futures[0]:
+                        self.hedge_wins += 1
+                    self.breaker.record_success()
+                    return io.BytesIO(image)
+
+                # Request đầu chậm (hoặc lỗi) mà vẫn còn thời gian: gửi thêm một request
+                if can_hedge and time.monotonic() < deadline_at:
+                    self.hedged += 1
+                    remaining = deadline_at - time.monotonic()
+                    futures.append(self._executor.submit(self._post, payload, remaining))
+                    pending.add(futures[-1])
+        finally:
+            for future in pending:
+                future.cancel()
+
+        self.failures += 1
+        self.breaker.record_failure()
+        if error is not None:
+            raise error
+        raise TimeoutError(f"API VietQR không trả lời sau {deadline or self.deadline}s")
+
+    def metrics(self) -> dict:
+        """Trả về độ trễ và các chỉ số hedge/circuit breaker"""
+        return {
+            "latency": self.latency.snapshot(),
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+        }
@@ -0,0 +1,97 @@
+"""
+Tạo chuỗi payload VietQR (chuẩn EMVCo của NAPAS) để chuyển khoản tới tài khoản ngân hàng.
+Hàm thuần, không gọi mạng: TLV + CRC16-CCITT-FALSE, có thể test với dữ liệu cố định.
+"""
+
+import re
+import unicodedata
+
+# GUID của NAPAS trong Merchant Account Information (tag 38)
+NAPAS_GUID = "A000000727"
+# Dịch vụ chuyển nhanh tới tài khoản (QRIBFTTC là chuyển tới thẻ)
+SERVICE_TO_ACCOUNT = "QRIBFTTA"
+CURRENCY_VND = "704"
+COUNTRY_VN = "VN"
+# Point of Initiation: 11 = QR tĩnh, 12 = QR động (có số tiền)
+STATIC_QR = "11"
+DYNAMIC_QR = "12"
+
+
+def _build_crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC_TABLE = _build_crc_table()
+
+
+def crc16_ccitt(data: bytes) -> int:
+    """CRC16-CCITT-FALSE (poly 0x1021, init 0xFFFF), dùng cho tag 63 của EMVCo"""
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC_TABLE[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def tlv(tag: str, value: str) -> str:
+    """Ghép một trường TLV: tag 2 ký tự + độ dài 2 chữ số + giá trị"""
+    if len(value) > 99:
+        raise ValueError(f"Giá trị tag {tag} dài quá 99 ký tự: {len(value)}")
+    return f"{tag}{len(value):02d}{value}"
+
+
+def clean_add_info(text: str) -> str:
+    """Bỏ dấu tiếng Việt và ký tự ngoài ASCII in được trong nội dung chuyển khoản"""
+    text = unicodedata.normalize("NFD", str(text)).replace("đ", "d").replace("Đ", "D")
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return re.sub(r"[^\x20-\x7E]", "", text).strip()
+
+
+def format_amount(amount) -> str:
+    """Chuyển số tiền VND (str/float/int) thành chuỗi số nguyên, '' nếu không có"""
+    if amount in (None, ""):
+        return ""
+    value = round(float(str(amount).replace(",", "")))
+    if value <= 0:
+        raise ValueError(f"Số tiền không hợp lệ: {amount}")
+    return str(value)
+
+
+def build_vietqr_payload(bin_code, account_no, amount=None, add_info: str = "") -> str:
+    """
+    Tạo payload VietQR chuyển khoản tới tài khoản
+    Args:
+        bin_code: Mã BIN ngân hàng (6 chữ số, vd: 970415)
+        account_no: Số tài khoản người nhận
+        amount: Số tiền VND (None/'' = QR tĩnh không kèm số tiền)
+        add_info: Nội dung chuyển khoản
+    Returns:
+        str: Chuỗi payload để mã hóa thành QR
+    """
+    bin_code = str(bin_code or "").strip()
+    account_no = re.sub(r"\s+", "", str(account_no or ""))
+    if not re.fullmatch(r"\d{6}", bin_code):
+        raise ValueError(f"Mã BIN ngân hàng không hợp lệ: {bin_code!r}")
+    if not re.fullmatch(r"[0-9A-Za-z]{1,19}", account_no):
+        raise ValueError(f"Số tài khoản không hợp lệ: {account_no!r}")
+
+    amount = format_amount(amount)
+    add_info = clean_add_info(add_info)
+
+    beneficiary = tlv("00", bin_code) + tlv("01", account_no)
+    merchant_info = tlv("00", NAPAS_GUID) + tlv("01", beneficiary) + tlv("02", SERVICE_TO_ACCOUNT)
+
+    payload = tlv("00", "01") + tlv("01", DYNAMIC_QR if amount else STATIC_QR)
+    payload += tlv("38", merchant_info) + tlv("53", CURRENCY_VND)
+    if amount:
+        payload += tlv("54", amount)
+    payload += tlv("58", COUNTRY_VN)
+    if add_info:
+        payload += tlv("62", tlv("08", add_info))
+    payload += "6304"
+    return payload + f"{crc16_ccitt(payload.encode('utf-8')):04X}"
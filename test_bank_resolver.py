@@ -0,0 +1,89 @@
+import unittest
+import json
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Thêm thư mục gốc vào PYTHONPATH
+root_dir = str(Path(__file__).parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from module.bank_resolver import BankResolver
+from module.bank_aliases import BankAliasTable
+
+BANKS = {
+    "VietinBank": {"name": "Ngân hàng TMCP Công thương Việt Nam", "code": "ICB", "bin": "970415", "short_name": "VietinBank"},
+    "Vietcombank": {"name": "Ngân hàng TMCP Ngoại Thương Việt Nam", "code": "VCB", "bin": "970436", "short_name": "Vietcombank"},
+    "MBBank": {"name": "Ngân hàng TMCP Quân đội", "code": "MB", "bin": "970422", "short_name": "MBBank"},
+}
+
+
+class TestBankResolver(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "bank_list.json")
+        self.write_banks(BANKS)
+        self.resolver = BankResolver(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_banks(self, banks):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(banks, f, ensure_ascii=False)
+
+    def test_exact_aliases(self):
+        """Test khớp chính xác theo tên viết tắt, mã và tên đầy đủ"""
+        self.assertEqual(self.resolver.get_bin("vietcombank"), "970436")
+        self.assertEqual(self.resolver.get_bin("VCB"), "970436")
+        self.assertEqual(self.resolver.get_bin("Ngân hàng TMCP Quân Đội"), "970422")
+        self.assertEqual(self.resolver.metrics()["exact_hits"], 3)
+
+    def test_fuzzy_match(self):
+        """Test tên người bán nhập kèm ghi chú vẫn khớp, tên lạ thì bị bỏ"""
+        self.assertEqual(self.resolver.get_bin("Vietinbank ( Chau Duc Lam )"), "970415")
+        self.assertEqual(self.resolver.get_bin("MB Bank"), "970422")
+        self.assertIsNone(self.resolver.get_bin("xyz"))
+
+    def test_reload_on_change(self):
+        """Test tự nạp lại khi bank_list.json thay đổi"""
+        self.assertIsNone(self.resolver.get_bin("Timo"))
+        banks = dict(BANKS, Timo={"name": "Timo by Ban Viet Bank", "code": "TIMO", "bin": "963388", "short_name": "Timo"})
+        self.write_banks(banks)
+        os.utime(self.path, (0, os.path.getmtime(self.path) + 10))
+        self.assertEqual(self.resolver.get_bin("Timo"), "963388")
+
+    def test_alias_table(self):
+        """Test ghi nhớ alias, hàng chờ xác nhận và lưu qua các lần chạy"""
+        alias_path = os.path.join(self.test_dir, "bank_aliases.json")
+        resolver = BankResolver(self.path, aliases=BankAliasTable(alias_path))
+        self.assertEqual(resolver.get_bin("Vietinbank ( Chau Duc Lam )"), "970415")
+        self.assertIsNone(resolver.get_bin("Viettin"))
+        pending = resolver.aliases.pending()
+        self.assertEqual([p["raw"] for p in pending], ["Viettin"])
+        resolver.aliases.confirm(pending[0]["key"], "VietinBank")
+
+        # Lần chạy sau: cả hai tên đều tra từ bảng alias
+        resolver = BankResolver(self.path, aliases=BankAliasTable(alias_path))
+        self.assertEqual(resolver.get_bin("Vietinbank ( Chau Duc Lam )"), "970415")
+        self.assertEqual(resolver.get_bin("viettin"), "970415")
+        self.assertEqual(resolver.metrics()["alias_hits"], 2)
+        self.assertEqual(resolver.aliases.pending(), [])
+
+@unittest.skipUnless(os.path.exists(os.path.join(root_dir, "bank_list.json")), "cần bank_list.json")
+class TestBankResolverRealList(unittest.TestCase):
+    def setUp(self):
+        self.resolver = BankResolver(os.path.join(root_dir, "bank_list.json"))
+
+    def test_typo_names(self):
+        """Tên gõ thiếu chữ vẫn ra đúng ngân hàng, không ra ngân hàng khác cũng đạt ngưỡng"""
+        for name, bank in (("TBank", "TPBank"), ("LBank", "LPBank"), ("Uank", "Ubank"),
+                           ("Sacombak", "Sacombank"), ("Techcombnk", "Techcombank")):
+            self.assertEqual(self.resolver.resolve(name)[0], bank, name)
+            self.assertEqual(self.resolver.resolve_many([name])[0][0], self.resolver.banks[bank]["bin"], name)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
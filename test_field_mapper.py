@@ -0,0 +1,51 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Thêm thư mục gốc vào PYTHONPATH
+root_dir = str(Path(__file__).parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from module.field_mapper import FieldMapper
+
+
+class TestFieldMapper(unittest.TestCase):
+    def setUp(self):
+        self.mapper = FieldMapper()
+
+    def test_english_labels(self):
+        """Test nhãn tiếng Anh trên trang /en/ giống cách map cũ"""
+        data = {
+            "Fiat amount": 16301820.0,
+            "Name": "NGUYEN VAN A",
+            "Bank Card/Account Number": "0123456789",
+            "Bank Name": "Vietinbank",
+            "Reference message": "REF1",
+            "Price": "25,000",
+        }
+        self.assertEqual(self.mapper.map(data), {
+            "Fiat amount": 16301820.0,
+            "Full Name": "NGUYEN VAN A",
+            "Bank Card": "0123456789",
+            "Bank Name": "Vietinbank",
+            "Reference message": "REF1",
+        })
+
+    def test_vietnamese_labels(self):
+        """Test nhãn tiếng Việt và chuẩn hóa khoảng trắng/dấu ':'"""
+        self.assertEqual(self.mapper.canonical("Họ và tên:"), "Full Name")
+        self.assertEqual(self.mapper.canonical("Số  tài khoản"), "Bank Card")
+        self.assertEqual(self.mapper.canonical("Tên ngân hàng"), "Bank Name")
+        self.assertEqual(self.mapper.canonical("Nội dung chuyển khoản"), "Reference message")
+        self.assertIsNone(FieldMapper(locales=["en"]).canonical("Họ và tên"))
+
+    def test_priority_and_memo(self):
+        """Test nhãn khớp nhiều trường theo thứ tự ưu tiên và được ghi nhớ"""
+        self.assertEqual(self.mapper.canonical("Bank name / account number"), "Bank Card")
+        self.assertIsNone(self.mapper.canonical("Name of bank"))
+        self.mapper.canonical("Bank name / account number")
+        self.assertEqual(self.mapper.metrics()["hits"], 1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
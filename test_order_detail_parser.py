@@ -0,0 +1,57 @@
+import unittest
+import json
+import sys
+from pathlib import Path
+
+# Thêm thư mục gốc vào PYTHONPATH
+root_dir = str(Path(__file__).parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from module.order_detail_parser import parse_order_detail, parse_order_detail_json, parse_currency
+
+FIXTURE = Path(__file__).parent / "fixtures" / "order_detail_buy.html"
+JSON_FIXTURE = Path(__file__).parent / "fixtures" / "order_detail_buy.json"
+
+
+class TestOrderDetailParser(unittest.TestCase):
+    def test_parse_fixture(self):
+        """Test lấy fiat amount và các cặp nhãn/giá trị từ file HTML đã lưu"""
+        result = parse_order_detail(FIXTURE.read_text(encoding="utf-8"))
+        self.assertEqual(result["Fiat amount"], 16301820.0)
+        self.assertEqual(result["Name"], "NGUYEN VAN A")
+        self.assertEqual(result["Bank Card/Account Number"], "0123456789")
+        self.assertEqual(result["Bank Name"], "Vietinbank ( Chau Duc Lam )")
+        self.assertEqual(result["Reference message"], "REF22768168737054167040")
+        # Nhãn nằm ngoài khối thông tin người bán không được lấy
+        self.assertNotIn("Price", result)
+
+    def test_missing_container(self):
+        """Test trang chưa render phần thông tin người bán"""
+        html = '<div class="subtitle6 text-textBuy">₫1,000</div>'
+        self.assertEqual(parse_order_detail(html), {"Fiat amount": 1000.0})
+        self.assertEqual(parse_order_detail(""), {})
+
+    def test_parse_json_matches_html(self):
+        """Test JSON bắt qua CDP cho ra cùng dict với HTML, dùng phương thức thanh toán đã chọn"""
+        payload = json.loads(JSON_FIXTURE.read_text(encoding="utf-8"))
+        from_json = parse_order_detail_json(payload)
+        from_html = parse_order_detail(FIXTURE.read_text(encoding="utf-8"))
+        self.assertEqual(from_json["Fiat amount"], from_html["Fiat amount"])
+        self.assertEqual(from_json["Name"], "NGUYEN VAN A")
+        self.assertEqual(from_json["Reference message"], from_html["Reference message"])
+        self.assertNotIn("Phone number", from_json)
+        self.assertEqual(parse_order_detail_json({}), {})
+
+    def test_parse_json_other_order(self):
+        """Test response JSON của order khác (XHR muộn của trang trước) bị bỏ qua"""
+        payload = json.loads(JSON_FIXTURE.read_text(encoding="utf-8"))
+        self.assertEqual(parse_order_detail_json(payload, "22768168737054167040")["Name"], "NGUYEN VAN A")
+        self.assertEqual(parse_order_detail_json(payload, "11111111111111111111"), {})
+
+    def test_parse_currency(self):
+        self.assertEqual(parse_currency("₫16,301,820.00"), 16301820.0)
+        self.assertIsNone(parse_currency("N/A"))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -3,14 +3,18 @@ from datetime import datetime, timedelta
 import os
 import shutil
 import sys
+import json
+import tempfile
 from pathlib import Path
+from unittest import mock
 
 # Thêm thư mục gốc vào PYTHONPATH
 root_dir = str(Path(__file__).parent)
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from module.transaction_storage import TransactionStorage
+from module.transaction_storage import TransactionStorage, create_storage
+from module.sqlite_storage import SQLiteTransactionStorage
 from module.generate_qrcode import generate_vietqr
 from io import BytesIO
 
@@ -191,5 +195,317 @@ class TestTransactionStorage(unittest.TestCase):
         self.assertEqual(recent[2]["order_number"], "RECENT2")
         print("Thứ tự transaction đúng!")
 
+class TestTransactionJournal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="test_journal_")
+        self.storage = TransactionStorage(self.test_dir, journal=True)
+        self.now = datetime.now()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _save(self, order_number, when):
+        return self.storage.save_transaction({"type": "buy", "order_number": order_number, "timestamp": when.timestamp()})
+
+    def test_append_and_read(self):
+        """Journal chỉ ghi nối tiếp, các hàm đọc vẫn thấy giao dịch"""
+        self._save("J1", self.now)
+        self._save("J2", self.now)
+        journal_file = self.storage._get_journal_path(self.now)
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)["order_number"] for line in f], ["J1", "J2"])
+        self.assertFalse(self.storage._get_date_file_path(self.now).exists())
+        self.assertEqual(self.storage.get_transaction_by_order("J2")["order_number"], "J2")
+        self.assertEqual(len(self.storage.get_recent_transactions(limit=5)), 2)
+
+    def test_torn_line_is_skipped(self):
+        """Dòng ghi dở khi bị dừng đột ngột không làm mất các giao dịch khác"""
+        self._save("J1", self.now)
+        with open(self.storage._get_journal_path(self.now), 'a', encoding='utf-8') as f:
+            f.write('{"type": "buy", "order_')
+        self._save("J2", self.now)
+        orders = [t["order_number"] for t in self.storage.get_transactions_by_date(self.now)]
+        self.assertEqual(orders, ["J1", "J2"])
+
+    def test_compact_keeps_array_format(self):
+        """compact() gộp journal về file mảng JSON đọc được ở chế độ cũ"""
+        yesterday = self.now - timedelta(days=1)
+        self._save("OLD", yesterday)
+        self._save("NEW", self.now)
+        # Journal của ngày cũ được gộp khi có giao dịch ngày mới
+        self.assertFalse(self.storage._get_journal_path(yesterday).exists())
+        self.assertEqual(self.storage.compact(), 1)
+        with open(self.storage._get_date_file_path(self.now), 'r', encoding='utf-8') as f:
+            self.assertEqual([t["order_number"] for t in json.load(f)], ["NEW"])
+        legacy = TransactionStorage(self.test_dir, journal=False)
+        self.assertEqual(legacy.get_transaction_by_order("OLD")["order_number"], "OLD")
+
+class TestOrderIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="test_index_")
+        self.now = datetime.now()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _save(self, storage, order_number, days_ago=0):
+        when = self.now - timedelta(days=days_ago)
+        return storage.save_transaction({"type": "buy", "order_number": order_number, "timestamp": when.timestamp()})
+
+    def test_lookup_after_restart(self):
+        """Index nằm trên đĩa: storage mới mở tra được ngay, kể cả order trong journal"""
+        self._save(TransactionStorage(self.test_dir, journal=False), "A1", days_ago=2)
+        journal = TransactionStorage(self.test_dir, journal=True)
+        self._save(journal, "B1")
+        self._save(journal, "B2")
+
+        storage = TransactionStorage(self.test_dir, journal=True)
+        with storage._lock:
+            storage._load_index()
+        self.assertEqual(storage._index["A1"][0], storage._get_date_file_path(self.now - timedelta(days=2)).name)
+        self.assertEqual(storage._index["B2"][0], storage._get_journal_path(self.now).name)
+        self.assertEqual(storage.get_transaction_by_order("B2")["order_number"], "B2")
+        self.assertEqual(storage.get_transaction_by_order("A1")["order_number"], "A1")
+        self.assertIsNone(storage.get_transaction_by_order("MISSING"))
+
+        # Sau khi gộp journal, index trỏ sang file mảng JSON
+        storage.compact()
+        self.assertEqual(storage._index["B2"], (storage._get_date_file_path(self.now).name, 1))
+        self.assertEqual(storage.get_transaction_by_order("B2")["order_number"], "B2")
+
+    def test_rebuild_when_day_file_changes(self):
+        """File ngày bị sửa ngoài storage thì index được dựng lại"""
+        storage = TransactionStorage(self.test_dir, journal=False)
+        self._save(storage, "A1")
+        date_file = storage._get_date_file_path(self.now)
+        storage._write_day(date_file, [{"type": "buy", "order_number": "X1", "timestamp": self.now.timestamp()}])
+        os.utime(date_file, (self.now.timestamp() + 60, self.now.timestamp() + 60))
+
+        restarted = TransactionStorage(self.test_dir, journal=False)
+        self.assertEqual(restarted.get_transaction_by_order("X1")["order_number"], "X1")
+        self.assertIsNone(restarted.get_transaction_by_order("A1"))
+        # Index đang nạp trỏ tới vị trí giờ là order khác: dựng lại khi tra
+        self.assertIsNone(storage.get_transaction_by_order("A1"))
+        self.assertIn("X1", storage._index)
+
+    def test_two_instances_share_index(self):
+        """Nhiều instance cùng thư mục (MainWindow, P2PBinance, TransactionViewer) không làm mất order"""
+        first = TransactionStorage(self.test_dir, journal=True)
+        second = TransactionStorage(self.test_dir, journal=True)
+        self._save(first, "A1")
+        self.assertEqual(second.get_transaction_by_order("A1")["order_number"], "A1")
+        self._save(second, "B1", days_ago=1)
+        self._save(second, "B2")
+        self.assertEqual(first.get_transaction_by_order("B2")["order_number"], "B2")
+
+        # first gộp journal và ghi đè file index: không được bỏ mất order của second
+        self._save(second, "B3")
+        first.compact()
+        self._save(first, "A2")
+        restarted = TransactionStorage(self.test_dir, journal=True)
+        for storage in (first, second, restarted):
+            for order_number in ("A1", "A2", "B1", "B2", "B3"):
+                self.assertEqual(storage.get_transaction_by_order(order_number)["order_number"], order_number)
+        with open(restarted.index_path, 'r', encoding='utf-8') as f:
+            on_disk = {json.loads(line)[0] for line in f}
+        self.assertEqual(on_disk, {"A1", "A2", "B1", "B2", "B3"})
+
+    def test_miss_does_not_rebuild(self):
+        """Order không có trong index đã đồng bộ: trả về None, không đọc lại mọi file ngày"""
+        storage = TransactionStorage(self.test_dir, journal=False)
+        self._save(storage, "A1")
+        with mock.patch.object(storage, "_rebuild_index", wraps=storage._rebuild_index) as rebuild:
+            self.assertIsNone(storage.get_transaction_by_order("MISSING"))
+            self.assertEqual(storage.get_transaction_by_order("A1")["order_number"], "A1")
+        self.assertEqual(rebuild.call_count, 0)
+
+    def test_corrupt_day_file_does_not_break_lookup(self):
+        """Một file ngày hỏng không làm mất các order ở file ngày khác khi dựng index"""
+        storage = TransactionStorage(self.test_dir, journal=False)
+        self._save(storage, "A1", days_ago=2)
+        self._save(storage, "B1", days_ago=1)
+        with open(storage._get_date_file_path(self.now - timedelta(days=1)), 'w', encoding='utf-8') as f:
+            f.write('[{"order_number": "B1"')
+        os.remove(storage.index_path)
+
+        restarted = TransactionStorage(self.test_dir, journal=False)
+        self.assertEqual(restarted.get_transaction_by_order("A1")["order_number"], "A1")
+        self.assertIsNone(restarted.get_transaction_by_order("B1"))
+
+class TestRecentTransactions(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="test_recent_")
+        self.now = datetime.now().replace(hour=12)
+        self.storages = [
+            TransactionStorage(os.path.join(self.test_dir, "json"), journal=False),
+            SQLiteTransactionStorage(os.path.join(self.test_dir, "sqlite")),
+        ]
+        # 5 ngày, mỗi ngày 3 giao dịch; lưu không theo thứ tự thời gian
+        for day in (2, 0, 4, 1, 3):
+            for i in range(3):
+                when = self.now - timedelta(days=day, minutes=i)
+                for storage in self.storages:
+                    storage.save_transaction({"type": "buy", "order_number": f"D{day}-{i}", "timestamp": when.timestamp()})
+
+    def tearDown(self):
+        self.storages[1].close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_limit_and_offset(self):
+        for storage in self.storages:
+            orders = [t["order_number"] for t in storage.get_recent_transactions(limit=4, offset=2)]
+            self.assertEqual(orders, ["D0-2", "D1-0", "D1-1", "D1-2"])
+
+    def test_cursor_pages(self):
+        """Các trang nối tiếp nhau đủ 15 giao dịch, không trùng, không sót"""
+        for storage in self.storages:
+            pages, cursor = [], None
+            while True:
+                page, cursor = storage.get_recent_page(limit=4, cursor=cursor)
+                pages.append([t["order_number"] for t in page])
+                if cursor is None:
+                    break
+            self.assertEqual([len(page) for page in pages], [4, 4, 4, 3])
+            expected = [f"D{day}-{i}" for day in range(5) for i in range(3)]
+            self.assertEqual(sum(pages, []), expected)
+
+    def test_stops_reading_early(self):
+        """Lấy giao dịch mới nhất chỉ đọc các file ngày gần nhất"""
+        storage = self.storages[0]
+        with mock.patch.object(storage, "_read_day", wraps=storage._read_day) as read_day:
+            storage.get_recent_transactions(limit=4)
+        self.assertEqual(read_day.call_count, 2)
+
+class TestDateRange(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="test_range_")
+        self.storages = [
+            TransactionStorage(os.path.join(self.test_dir, "json"), journal=False),
+            SQLiteTransactionStorage(os.path.join(self.test_dir, "sqlite")),
+        ]
+        # Từ 28/01 tới 04/02: khoảng ngày đi qua cuối tháng
+        start = datetime(2026, 1, 28, 9)
+        for i in range(8):
+            transaction = {
+                "type": "buy" if i % 2 else "sell",
+                "order_number": f"R{i}",
+                "amount": f"{(i + 1) * 1000:,}",
+                "bank_name": "Vietcombank" if i % 3 else "ACB",
+                "account_name": "NGUYEN VAN A" if i == 5 else "TRAN THI B",
+                "timestamp": (start + timedelta(days=i)).timestamp(),
+            }
+            for storage in self.storages:
+                storage.save_transaction(dict(transaction))
+
+    def tearDown(self):
+        self.storages[1].close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _orders(self, storage, start, end, **filters):
+        return [t["order_number"] for t in storage.get_transactions_by_date_range(start, end, **filters)]
+
+    def test_range_across_month_end(self):
+        for storage in self.storages:
+            self.assertEqual(self._orders(storage, datetime(2026, 1, 30), datetime(2026, 2, 2)),
+                             ["R2", "R3", "R4", "R5"])
+            self.assertEqual(self._orders(storage, "2026-01-01", "2026-12-31"), [f"R{i}" for i in range(8)])
+            self.assertEqual(self._orders(storage, "2026-03-01", "2026-03-31"), [])
+
+    def test_filters(self):
+        for storage in self.storages:
+            start, end = "2026-01-01", "2026-02-28"
+            self.assertEqual(self._orders(storage, start, end, trade_type="buy"), ["R1", "R3", "R5", "R7"])
+            self.assertEqual(self._orders(storage, start, end, bank="acb"), ["R0", "R3", "R6"])
+            self.assertEqual(self._orders(storage, start, end, min_amount=3000, max_amount=5000), ["R2", "R3", "R4"])
+            self.assertEqual(self._orders(storage, start, end, text="nguyen", trade_type="buy"), ["R5"])
+
+    def test_corrupt_day_is_skipped(self):
+        """Một file ngày hỏng chỉ làm mất ngày đó, không làm rỗng cả khoảng"""
+        storage = self.storages[0]
+        with open(storage._get_date_file_path(datetime(2026, 1, 31)), 'w', encoding='utf-8') as f:
+            f.write('[{"order_number": "R3"')
+        self.assertEqual(self._orders(storage, datetime(2026, 1, 30), datetime(2026, 2, 1)), ["R2", "R4"])
+
+    def test_iter_is_lazy(self):
+        """iter_transactions trả về generator, chỉ đọc trước một số file giới hạn"""
+        storage = self.storages[0]
+        with mock.patch.object(storage, "_read_day", wraps=storage._read_day) as read_day:
+            transactions = storage.iter_transactions("2026-01-01", "2026-12-31", workers=1)
+            self.assertEqual(next(transactions)["order_number"], "R0")
+            transactions.close()
+        self.assertLessEqual(read_day.call_count, 3)
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="test_sqlite_")
+        self.now = datetime.now()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _transaction(self, order_number, when, **extra):
+        return dict({"type": "buy", "order_number": order_number, "timestamp": when.timestamp()}, **extra)
+
+    def test_same_results_as_json(self):
+        """SQLite trả về cùng kết quả với bản JSON cho các hàm đọc"""
+        json_storage = TransactionStorage(self.test_dir, journal=False)
+        sqlite_storage = SQLiteTransactionStorage(os.path.join(self.test_dir, "db"))
+        for i in range(4):
+            for storage in (json_storage, sqlite_storage):
+                storage.save_transaction(self._transaction(f"S{i}", self.now - timedelta(days=i), amount="1,000"))
+        yesterday = self.now - timedelta(days=1)
+        for method, args in (
+            ("get_transactions_by_date", (yesterday,)),
+            ("get_transactions_by_date_range", (self.now - timedelta(days=2), self.now)),
+            ("get_transaction_by_order", ("S3",)),
+            ("get_recent_transactions", (2,)),
+        ):
+            self.assertEqual(getattr(sqlite_storage, method)(*args), getattr(json_storage, method)(*args), method)
+        self.assertIsNone(sqlite_storage.get_transaction_by_order("MISSING"))
+        sqlite_storage.close()
+
+    def test_imports_existing_json_once(self):
+        """Lần mở đầu tiên nhập file JSON có sẵn, nhập lại không tạo bản trùng"""
+        json_storage = TransactionStorage(self.test_dir, journal=False)
+        json_storage.save_transaction(self._transaction("OLD", self.now - timedelta(days=3)))
+        storage = create_storage(self.test_dir, backend="sqlite")
+        self.assertIsInstance(storage, SQLiteTransactionStorage)
+        self.assertEqual(storage.get_transaction_by_order("OLD")["order_number"], "OLD")
+        self.assertEqual(storage.import_json(), 0)
+        storage.close()
+
+    def test_recent_page_same_key(self):
+        """Giao dịch trùng (timestamp, order_number) không bị bỏ sót giữa các trang"""
+        storage = SQLiteTransactionStorage(self.test_dir)
+        for i in range(5):
+            storage.save_transaction(self._transaction(None, self.now, type="sell", seq=i))
+        pages, cursor = [], None
+        while True:
+            page, cursor = storage.get_recent_page(limit=2, cursor=cursor)
+            pages.extend(t["seq"] for t in page)
+            if cursor is None:
+                break
+        self.assertEqual(pages, [4, 3, 2, 1, 0])
+        self.assertEqual([t["seq"] for t in storage.get_recent_transactions(limit=5)], [4, 3, 2, 1, 0])
+        storage.close()
+
+    def test_corrupt_file_does_not_block_import(self):
+        """File JSON hỏng không làm lỗi khởi tạo; sửa xong thì lần mở sau nhập nốt"""
+        json_storage = TransactionStorage(self.test_dir, journal=False)
+        json_storage.save_transaction(self._transaction("GOOD", self.now - timedelta(days=2)))
+        bad_file = json_storage._get_date_file_path(self.now - timedelta(days=1))
+        with open(bad_file, 'w', encoding='utf-8') as f:
+            f.write('[{"type": "buy", "order_')
+
+        storage = create_storage(self.test_dir, backend="sqlite")
+        self.assertEqual(storage.get_transaction_by_order("GOOD")["order_number"], "GOOD")
+        storage.close()
+
+        json_storage._write_day(bad_file, [self._transaction("FIXED", self.now - timedelta(days=1))])
+        storage = create_storage(self.test_dir, backend="sqlite")
+        self.assertEqual(storage.get_transaction_by_order("FIXED")["order_number"], "FIXED")
+        self.assertEqual(len(storage.get_recent_transactions(10)), 2)
+        storage.close()
+
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
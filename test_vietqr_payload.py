@@ -0,0 +1,59 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Thêm thư mục gốc vào PYTHONPATH
+root_dir = str(Path(__file__).parent)
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from module.vietqr_payload import build_vietqr_payload, crc16_ccitt, clean_add_info
+
+
+def parse_tlv(payload: str) -> dict:
+    """Tách chuỗi TLV một cấp thành dict tag -> giá trị"""
+    fields, i = {}, 0
+    while i < len(payload):
+        tag, length = payload[i:i + 2], int(payload[i + 2:i + 4])
+        fields[tag] = payload[i + 4:i + 4 + length]
+        i += 4 + length
+    return fields
+
+
+class TestVietQRPayload(unittest.TestCase):
+    def test_crc16_check_value(self):
+        """Test giá trị kiểm tra chuẩn của CRC16-CCITT-FALSE"""
+        self.assertEqual(crc16_ccitt(b"123456789"), 0x29B1)
+
+    def test_dynamic_payload(self):
+        """Test payload có số tiền và nội dung chuyển khoản"""
+        payload = build_vietqr_payload("970415", "0123 456789", 16301820.0, "REF22768168737054167040")
+        fields = parse_tlv(payload)
+        self.assertEqual(fields["00"], "01")
+        self.assertEqual(fields["01"], "12")
+        merchant = parse_tlv(fields["38"])
+        self.assertEqual(merchant["00"], "A000000727")
+        self.assertEqual(parse_tlv(merchant["01"]), {"00": "970415", "01": "0123456789"})
+        self.assertEqual(merchant["02"], "QRIBFTTA")
+        self.assertEqual(fields["53"], "704")
+        self.assertEqual(fields["54"], "16301820")
+        self.assertEqual(fields["58"], "VN")
+        self.assertEqual(parse_tlv(fields["62"])["08"], "REF22768168737054167040")
+        self.assertEqual(fields["63"], f"{crc16_ccitt(payload[:-4].encode()):04X}")
+
+    def test_static_payload_and_validation(self):
+        """Test QR tĩnh không có số tiền và kiểm tra dữ liệu đầu vào"""
+        fields = parse_tlv(build_vietqr_payload("970436", "0818331300"))
+        self.assertEqual(fields["01"], "11")
+        self.assertNotIn("54", fields)
+        self.assertNotIn("62", fields)
+        with self.assertRaises(ValueError):
+            build_vietqr_payload(None, "0818331300")
+        with self.assertRaises(ValueError):
+            build_vietqr_payload("970436", "")
+
+    def test_clean_add_info(self):
+        self.assertEqual(clean_add_info("Chuyển tiền đơn hàng"), "Chuyen tien don hang")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
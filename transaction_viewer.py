@@ -1,11 +1,12 @@
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QLabel, QPushButton, QTableWidget, 
-                           QTableWidgetItem, QDateEdit, QMessageBox, QHeaderView)
+                           QTableWidgetItem, QDateEdit, QMessageBox, QHeaderView,
+                           QComboBox, QLineEdit)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QPixmap
 from datetime import datetime
-from module.transaction_storage import TransactionStorage
+from module.transaction_storage import create_storage, parse_amount
 import os
 from PyQt5.QtCore import pyqtSignal
 
@@ -17,7 +18,7 @@ class TransactionViewer(QMainWindow):
 
     def __init__(self, storage=None):
         super().__init__()
-        self.storage = storage if storage else TransactionStorage()
+        self.storage = storage if storage else create_storage()
         self.initUI()
         
     def initUI(self):
@@ -35,10 +36,30 @@ class TransactionViewer(QMainWindow):
         self.date_picker = QDateEdit()
         self.date_picker.setCalendarPopup(True)
         self.date_picker.setDate(QDate.currentDate())
-        self.date_picker.dateChanged.connect(self.load_transactions)
+        self.date_picker.dateChanged.connect(self.on_start_date_change)
+
+        # Ngày kết thúc: mặc định trùng ngày bắt đầu (xem một ngày), chọn xa hơn để xem cả khoảng
+        self.end_date_picker = QDateEdit()
+        self.end_date_picker.setCalendarPopup(True)
+        self.end_date_picker.setDate(QDate.currentDate())
+        self.end_date_picker.dateChanged.connect(self.load_transactions)
+
+        # Bộ lọc
+        self.type_filter = QComboBox()
+        self.type_filter.addItem('Tất cả', None)
+        self.type_filter.addItem('Mua', 'buy')
+        self.type_filter.addItem('Bán', 'sell')
+        self.type_filter.currentIndexChanged.connect(self.load_transactions)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('Tìm order, tên TK, ngân hàng...')
+        self.search_input.returnPressed.connect(self.load_transactions)
         
-        date_layout.addWidget(QLabel('Chọn ngày:'))
+        date_layout.addWidget(QLabel('Từ ngày:'))
         date_layout.addWidget(self.date_picker)
+        date_layout.addWidget(QLabel('Đến ngày:'))
+        date_layout.addWidget(self.end_date_picker)
+        date_layout.addWidget(self.type_filter)
+        date_layout.addWidget(self.search_input)
         date_layout.addStretch()
         
         # Nút xem QR
@@ -80,31 +101,46 @@ class TransactionViewer(QMainWindow):
         # Load dữ liệu ban đầu
         self.load_transactions()
         
+    def on_start_date_change(self):
+        """Đổi ngày bắt đầu thì ngày kết thúc theo cùng ngày (xem một ngày)"""
+        self.end_date_picker.blockSignals(True)
+        self.end_date_picker.setDate(self.date_picker.date())
+        self.end_date_picker.blockSignals(False)
+        self.load_transactions()
+
     def load_transactions(self):
-        """Load danh sách giao dịch theo ngày đã chọn"""
+        """Load danh sách giao dịch theo khoảng ngày và bộ lọc đã chọn"""
         try:
-            # Lấy ngày từ date picker
-            qdate = self.date_picker.date()
-            date = datetime(qdate.year(), qdate.month(), qdate.day())
+            # Lấy khoảng ngày từ date picker
+            start_date = self.date_picker.date().toPyDate()
+            end_date = self.end_date_picker.date().toPyDate()
+            if end_date < start_date:
+                start_date, end_date = end_date, start_date
+            multi_day = end_date != start_date
             
             # Lấy danh sách giao dịch
-            transactions = self.storage.get_transactions_by_date(date)
+            transactions = self.storage.get_transactions_by_date_range(
+                start_date, end_date,
+                trade_type=self.type_filter.currentData(),
+                text=self.search_input.text().strip() or None,
+            )
             
-            # Hiển thị lên bảng
+            # Hiển thị lên bảng (tắt vẽ lại trong lúc điền để khoảng nhiều ngày không bị chậm)
+            self.table.setUpdatesEnabled(False)
             self.table.setRowCount(len(transactions))
             for row, trans in enumerate(transactions):
                 # Loại giao dịch
                 self.table.setItem(row, 0, QTableWidgetItem(
-                    "Mua" if trans['type'] == 'buy' else "Bán"
+                    "Mua" if trans.get('type') == 'buy' else "Bán"
                 ))
                 
                 # Số order
                 self.table.setItem(row, 1, QTableWidgetItem(
-                    str(trans['order_number'])
+                    str(trans.get('order_number', ''))
                 ))
                 
                 # Số tiền
-                amount = f"{int(trans['amount']):,} VND"
+                amount = f"{int(parse_amount(trans.get('amount')) or 0):,} VND"
                 self.table.setItem(row, 2, QTableWidgetItem(amount))
                 
                 # Ngân hàng
@@ -129,7 +165,8 @@ class TransactionViewer(QMainWindow):
                 
                 # Thời gian
                 timestamp = trans.get('timestamp', 0)
-                time_str = datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
+                time_format = '%d/%m/%Y %H:%M:%S' if multi_day else '%H:%M:%S'
+                time_str = datetime.fromtimestamp(timestamp).strftime(time_format)
                 self.table.setItem(row, 7, QTableWidgetItem(time_str))
                 
                 # Lưu đường dẫn QR vào item
@@ -142,6 +179,7 @@ class TransactionViewer(QMainWindow):
                     item = self.table.item(row, col)
                     if item:
                         item.setTextAlignment(Qt.AlignCenter)
+            self.table.setUpdatesEnabled(True)
             
             # Thông báo nếu không có giao dịch
             if not transactions:
@@ -153,6 +191,7 @@ class TransactionViewer(QMainWindow):
                 pass # Giữ lại pass để tránh lỗi cú pháp nếu không có lệnh nào khác
                 
         except Exception as e:
+            self.table.setUpdatesEnabled(True)
             QMessageBox.critical(
                 self,
                 "Lỗi",